@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Benchmark and size-regression suite for the patent landscape visualizations
+Runs every chart builder and save_all_visualizations over synthetic landscapes,
+recording build and HTML/JSON serialization time, output bytes per figure and
+peak RSS as JSON, and compares the results against a stored baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+DEFAULT_SIZES = [10, 10000, 1000000]
+BASELINE_FILENAME = "benchmark_visualizations_baseline.json"
+
+# Allowed relative increase per metric kind before a run counts as a regression
+DEFAULT_THRESHOLDS = {'time': 0.5, 'bytes': 0.1, 'memory': 0.25}
+# Timing differences below this many seconds are noise, whatever the ratio
+MIN_SECONDS = 0.05
+
+SYNTHETIC_SCAFFOLDS = ['Quinolines', 'Indole derivatives', 'Azepino[4,5-b]indolones', 'Benzofuran-pyrimidines',
+                       'Pyrido[4,3-b]indoles', 'Thiazoles', 'Pyrazoles', 'Triazoles']
+SYNTHETIC_JURISDICTIONS = ['WO/PCT', 'US', 'EP', 'CN', 'JP']
+COMPANY_GROUPS = ['large_pharma', 'biotech_companies', 'academic_institutions']
+PHASES = ['Preclinical', 'Phase 1', 'Phase 2', 'Phase 3']
+
+
+def synthetic_landscape(count: int, seed: int = 7):
+    """Deterministic LandscapeData with count patent families
+
+    Assignees, companies, candidates and indications grow with the family count, so
+    the category folding and binning paths are exercised at the larger sizes.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from landscape_data import LandscapeData
+
+    rng = np.random.RandomState(seed)
+    assignee_count = max(3, min(count // 20, 20000))
+    assignees = np.array([f"Assignee {i:05d} Therapeutics" for i in range(assignee_count)], dtype=object)
+    # Skewed portfolio sizes, like real landscapes: a few large filers and a long tail
+    assignee_codes = np.minimum(rng.zipf(1.3, count) - 1, assignee_count - 1)
+    jurisdiction_counts = rng.randint(1, len(SYNTHETIC_JURISDICTIONS) + 1, count)
+
+    families = pd.DataFrame({
+        'assignee': pd.Categorical.from_codes(assignee_codes, categories=assignees),
+        'priority_year': pd.array(rng.randint(2013, 2025, count), dtype='Int64'),
+        'publication_year': pd.array(rng.randint(2015, 2026, count), dtype='Int64'),
+        'scaffold': pd.Categorical.from_codes(rng.randint(0, len(SYNTHETIC_SCAFFOLDS), count),
+                                              categories=SYNTHETIC_SCAFFOLDS),
+        'jurisdictions': [SYNTHETIC_JURISDICTIONS[:n] for n in jurisdiction_counts]
+    }, index=pd.Index([f"WO{2013 + i % 12}{i:07d}A1" for i in range(count)], name='publication_number'))
+
+    company_count = max(3, min(count // 100, 500))
+    companies = [str(name) for name in assignees[:company_count]]
+    key_companies = {group: {} for group in COMPANY_GROUPS}
+    candidates = {}
+    for i, company in enumerate(companies):
+        compound = f"SYN-{i:04d}"
+        key_companies[COMPANY_GROUPS[i % len(COMPANY_GROUPS)]][company] = {
+            'chemical_focus': SYNTHETIC_SCAFFOLDS[i % len(SYNTHETIC_SCAFFOLDS)],
+            'funding': f"${10 + i % 400}M",
+            'lead_candidate': compound
+        }
+        if i % 4 == 0:
+            candidates[compound] = {'company': company, 'status': PHASES[i % len(PHASES)],
+                                    'target_indications': {'primary': f"Indication {i % 60}"}}
+
+    landscape = {
+        'key_companies': key_companies,
+        'clinical_candidates': candidates,
+        'chemical_scaffolds': {
+            scaffold.lower().replace(' ', '_'): {'companies': companies[i::len(SYNTHETIC_SCAFFOLDS)],
+                                                 'lead_compound': f"SYN-{i:04d}"}
+            for i, scaffold in enumerate(SYNTHETIC_SCAFFOLDS)
+        },
+        'target_diseases': {
+            'primary_indications': {f"Indication {i}": {'clinical_candidates': [c for j, c in enumerate(candidates)
+                                                                                 if j % 60 == i]}
+                                    for i in range(min(60, max(3, len(candidates))))}
+        },
+        'geographic_distribution': {}
+    }
+    return LandscapeData({}, landscape, {}, {}, families=families)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (Linux reports KB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def measure_figure(builder, frame) -> Dict:
+    """Build time, HTML and JSON serialization time and bytes for one chart"""
+    start = time.perf_counter()
+    fig = builder(frame)
+    built = time.perf_counter()
+    # plotly.js is the same ~4 MB for every figure, so only the figure's own HTML is measured
+    html = fig.to_html(include_plotlyjs=False, full_html=True)
+    serialized_html = time.perf_counter()
+    figure_json = fig.to_json()
+    serialized_json = time.perf_counter()
+    return {
+        'build_seconds': round(built - start, 4),
+        'html_seconds': round(serialized_html - built, 4),
+        'json_seconds': round(serialized_json - serialized_html, 4),
+        'html_bytes': len(html.encode('utf-8')),
+        'json_bytes': len(figure_json.encode('utf-8'))
+    }
+
+
+def run_size(count: int, output_dir: str) -> Dict:
+    """Benchmark one synthetic landscape; runs in its own process so peak RSS is per size"""
+    import contextlib
+    import io
+
+    from create_patent_visualizations import figure_jobs, save_all_visualizations
+
+    start = time.perf_counter()
+    data = synthetic_landscape(count)
+    landscape_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    jobs = figure_jobs(data)
+    aggregate_seconds = time.perf_counter() - start
+
+    figures = {name: measure_figure(builder, frame) for name, builder, frame in jobs}
+
+    # The full stage as the CLI runs it: per-figure HTML plus the dashboard, no figure cache
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_all_visualizations(data, output_dir=output_dir, cache_dir='')
+    save_all_seconds = time.perf_counter() - start
+
+    return {
+        'families': count,
+        'landscape_seconds': round(landscape_seconds, 4),
+        'aggregate_seconds': round(aggregate_seconds, 4),
+        'figures': figures,
+        'save_all_seconds': round(save_all_seconds, 4),
+        'output_bytes': directory_bytes(output_dir),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_benchmarks(sizes: List[int], keep_output: Optional[str] = None) -> Dict:
+    import pandas as pd
+    import plotly
+
+    report = {
+        'generated_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'runs': []
+    }
+
+    for count in sizes:
+        print(f"Benchmarking {count} patent families...")
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = os.path.join(keep_output, f"size_{count}") if keep_output else tmp
+            os.makedirs(output_dir, exist_ok=True)
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                run = executor.submit(run_size, count, output_dir).result()
+        report['runs'].append(run)
+        print_run(run)
+
+    return report
+
+
+def print_run(run: Dict):
+    print(f"  {'Figure':<26}{'build s':>9}{'html s':>9}{'json s':>9}{'html KB':>10}{'json KB':>10}")
+    for name, figure in run['figures'].items():
+        print(f"  {name:<26}{figure['build_seconds']:>9}{figure['html_seconds']:>9}{figure['json_seconds']:>9}"
+              f"{figure['html_bytes'] / 1024:>10.1f}{figure['json_bytes'] / 1024:>10.1f}")
+    print(f"  landscape {run['landscape_seconds']}s, aggregate {run['aggregate_seconds']}s, "
+          f"save_all {run['save_all_seconds']}s, output {run['output_bytes'] / 1024:.0f} KB, "
+          f"peak RSS {run['peak_rss_mb']} MB")
+
+
+def run_metrics(run: Dict) -> Dict[str, float]:
+    """Flat metric name -> value for one run, e.g. 'family_portfolio.html_bytes'"""
+    metrics = {name: value for name, value in run.items() if isinstance(value, (int, float)) and name != 'families'}
+    for figure, values in run['figures'].items():
+        metrics.update({f"{figure}.{name}": value for name, value in values.items()})
+    return metrics
+
+
+def metric_kind(name: str) -> str:
+    if name.endswith('_seconds'):
+        return 'time'
+    return 'memory' if name.endswith('_mb') else 'bytes'
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, thresholds: Optional[Dict[str, float]] = None,
+                        min_seconds: float = MIN_SECONDS) -> List[Dict]:
+    """Metrics that grew past their threshold relative to the baseline run of the same size"""
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    baseline_runs = {run['families']: run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in report['runs']:
+        previous = baseline_runs.get(run['families'])
+        if previous is None:
+            continue
+        old_metrics = run_metrics(previous)
+        for name, value in run_metrics(run).items():
+            old = old_metrics.get(name)
+            if not old:
+                continue
+            kind = metric_kind(name)
+            if kind == 'time' and value - old < min_seconds:
+                continue
+            change = (value - old) / old
+            if change > thresholds[kind]:
+                regressions.append({'families': run['families'], 'metric': name, 'baseline': old, 'value': value,
+                                    'change': round(change, 3), 'threshold': thresholds[kind]})
+    return regressions
+
+
+def print_regressions(regressions: List[Dict]):
+    if not regressions:
+        print("No regressions against the baseline")
+        return
+    print(f"{len(regressions)} regressions against the baseline:")
+    for r in regressions:
+        print(f"  {r['families']:>8} families  {r['metric']:<40} {r['baseline']} -> {r['value']} "
+              f"(+{r['change']:.0%}, limit +{r['threshold']:.0%})")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the patent landscape visualizations")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated synthetic patent family counts")
+    parser.add_argument("--output", default="benchmark_visualizations.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=None,
+                        help=f"Results to compare against (e.g. {BASELINE_FILENAME}); exits 1 on regressions")
+    parser.add_argument("--save-baseline", default=None, help="Also write the results here as the new baseline")
+    parser.add_argument("--max-time-regression", type=float, default=DEFAULT_THRESHOLDS['time'],
+                        help="Allowed relative increase in build/serialization/save time (0.5 = +50%%)")
+    parser.add_argument("--max-bytes-regression", type=float, default=DEFAULT_THRESHOLDS['bytes'],
+                        help="Allowed relative increase in HTML/JSON/output bytes")
+    parser.add_argument("--max-memory-regression", type=float, default=DEFAULT_THRESHOLDS['memory'],
+                        help="Allowed relative increase in peak RSS")
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS,
+                        help="Ignore time increases smaller than this")
+    parser.add_argument("--keep-output", default=None, help="Keep the generated charts under this directory")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    report = run_benchmarks(sizes, args.keep_output)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved: {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        thresholds = {'time': args.max_time_regression, 'bytes': args.max_bytes_regression,
+                      'memory': args.max_memory_regression}
+        regressions = compare_to_baseline(report, baseline, thresholds, args.min_seconds)
+        print_regressions(regressions)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
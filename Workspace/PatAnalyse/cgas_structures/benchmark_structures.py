@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the cGAS structure generation pipeline
+Runs CGASStructureGenerator over synthetic compound sets against a local PubChem
+stub and records the per-stage span times, throughput and peak RSS as JSON
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SIZES = [10, 1000, 100000]
+
+# Aromatic cores whose first and last atoms can carry a substituent
+SYNTHETIC_SCAFFOLDS = [
+    "c1ccc2ncccc2c1",
+    "c1ccc2[nH]ccc2c1",
+    "c1ccc2occc2c1",
+    "c1ncc2[nH]c3ccccc3c2c1",
+    "c1ccc2oc(-c3ncccn3)cc2c1",
+]
+PREFIX_GROUPS = ["", "C", "CC", "OC", "CN(C)", "NC(=O)", "Cl", "F", "FC(F)(F)", "N#C"]
+SUFFIX_GROUPS = ["", "C", "F", "Cl", "OC", "N", "C(=O)O", "CCO"]
+
+
+def synthetic_compounds(count: int) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """Deterministic target_compounds plus the PubChem records the stub should serve
+
+    Every other compound is PubChem-backed so the lookup stage sees real traffic.
+    """
+    targets = {}
+    pubchem = {}
+    for i in range(count):
+        chain = "C" * (i // (len(PREFIX_GROUPS) * len(SUFFIX_GROUPS) * len(SYNTHETIC_SCAFFOLDS)) % 6)
+        prefix = PREFIX_GROUPS[i % len(PREFIX_GROUPS)]
+        suffix = SUFFIX_GROUPS[(i // len(PREFIX_GROUPS)) % len(SUFFIX_GROUPS)]
+        scaffold = SYNTHETIC_SCAFFOLDS[(i // (len(PREFIX_GROUPS) * len(SUFFIX_GROUPS))) % len(SYNTHETIC_SCAFFOLDS)]
+        smiles = f"{prefix}{chain}{scaffold}{suffix}"
+        name = f"SYN-{i:06d}"
+
+        if i % 2 == 0:
+            targets[name] = {'type': 'clinical_candidate', 'company': 'Synthetic', 'pubchem_search_terms': [name],
+                             'fallback_smiles': smiles}
+            pubchem[name] = {'CanonicalSMILES': smiles, 'IUPACName': name, 'MolecularFormula': '',
+                             'MolecularWeight': ''}
+        else:
+            targets[name] = {'type': 'scaffold', 'description': 'Synthetic scaffold', 'smiles': smiles,
+                             'skip_pubchem': True}
+    return targets, pubchem
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process and its finished children (Linux reports KB)"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return round(max(own, children) / scale, 1)
+
+
+def stage_times(recorder, count: int) -> Dict[str, Dict]:
+    """Total seconds per span recorded during the run; stage.* spans also get throughput"""
+    stages = {}
+    for entry in recorder.summary():
+        stage = {'seconds': round(entry['total'], 4), 'calls': entry['calls']}
+        if entry['span'].startswith('stage.'):
+            stage['items_per_second'] = round(count / entry['total'], 1) if entry['total'] else None
+        stages[entry['span']] = stage
+    return stages
+
+
+def run_size(count: int, output_dir: str, lookup_workers: int, requests_per_second: float,
+             render_options: Optional[Dict], compute_workers: int = 1) -> Dict:
+    """Benchmark one synthetic set; runs in its own process so peak RSS is per size
+
+    Drives CGASStructureGenerator.generate_all_structures itself (bulk lookup against
+    the stub, compute, descriptors, save) and reads the stage times from its spans.
+    """
+    from rdkit import RDLogger
+
+    from descriptor_engine import DEFAULT_DESCRIPTORS
+    from generate_cgas_structures import CGASStructureGenerator
+    from pubchem_client import PubChemClient
+    from pubchem_stub import PubChemStubServer
+    # structure_pipeline puts the workspace directory (with instrumentation.py) on sys.path
+    import instrumentation
+
+    RDLogger.DisableLog('rdApp.*')
+    targets, pubchem_records = synthetic_compounds(count)
+    recorder = instrumentation.enable()
+    instrumentation.set_verbose(False)
+
+    with PubChemStubServer(pubchem_records) as stub, contextlib.redirect_stdout(io.StringIO()):
+        # The stub is local, so pacing is raised well above PubChem's public limit
+        client = PubChemClient(base_url=stub.base_url, requests_per_second=requests_per_second,
+                               pool_size=lookup_workers)
+        generator = CGASStructureGenerator(output_dir, pubchem_client=client, lookup_workers=lookup_workers,
+                                           bulk_lookup=True, compute_workers=compute_workers,
+                                           render_options=render_options, descriptors=DEFAULT_DESCRIPTORS)
+        generator.target_compounds = targets
+        start = time.perf_counter()
+        generator.generate_all_structures()
+        total = time.perf_counter() - start
+
+    stages = stage_times(recorder, count)
+    stages['stage.fetch']['http_requests'] = stub.request_count
+    return {
+        'compounds': count,
+        'valid_structures': sum(1 for result in generator.results if result['smiles']),
+        'errors': len(generator.errors),
+        'stages': stages,
+        'counters': dict(recorder.counters),
+        'total_seconds': round(total, 4),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_benchmarks(sizes: List[int], lookup_workers: int = 8, requests_per_second: float = 2000,
+                   render_options: Optional[Dict] = None, keep_output: Optional[str] = None,
+                   compute_workers: int = 1) -> Dict:
+    from rdkit import rdBase
+
+    report = {
+        'generated_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'rdkit': rdBase.rdkitVersion,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'settings': {'lookup_workers': lookup_workers, 'compute_workers': compute_workers,
+                     'requests_per_second': requests_per_second, 'render_options': render_options},
+        'runs': []
+    }
+
+    for count in sizes:
+        print(f"Benchmarking {count} compounds...")
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = os.path.join(keep_output, f"size_{count}") if keep_output else tmp
+            os.makedirs(os.path.join(output_dir, "images"), exist_ok=True)
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                run = executor.submit(run_size, count, output_dir, lookup_workers, requests_per_second,
+                                      render_options, compute_workers).result()
+        report['runs'].append(run)
+        print_run(run)
+
+    return report
+
+
+def print_run(run: Dict):
+    print(f"  {'Span':<22}{'Calls':>8}{'Seconds':>10}{'Items/s':>12}")
+    for name, stage in run['stages'].items():
+        print(f"  {name:<22}{stage['calls']:>8}{stage['seconds']:>10}{stage.get('items_per_second') or '':>12}")
+    print(f"  total {run['total_seconds']}s, peak RSS {run['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cGAS structure generation pipeline")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated synthetic compound counts")
+    parser.add_argument("--lookup-workers", type=int, default=8)
+    parser.add_argument("--compute-workers", type=int, default=1)
+    parser.add_argument("--requests-per-second", type=float, default=2000,
+                        help="Token bucket rate against the local stub")
+    parser.add_argument("--image-format", choices=["jpeg", "png", "svg"], default=None)
+    parser.add_argument("--output", default="benchmark_structures.json", help="Where to write the JSON results")
+    parser.add_argument("--keep-output", default=None, help="Keep generated files under this directory")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    render_options = {'format': args.image_format} if args.image_format else None
+    report = run_benchmarks(sizes, args.lookup_workers, args.requests_per_second, render_options, args.keep_output,
+                            args.compute_workers)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Streaming compound input and result output for large libraries
+Reads compounds lazily from SMILES, CSV or SDF files and appends each finished
+result to JSON Lines and CSV files, so memory stays flat and completed work
+survives a crash
+"""
+
+import csv
+import json
+import os
+from typing import Dict, Iterator, Set, Tuple
+
+from rdkit import Chem
+
+# Column order of the master CSV, matching the generator's result records
+RESULT_FIELDS = ['compound_name', 'type', 'company', 'scaffold', 'status', 'description',
+                 'smiles', 'iupac_name', 'molecular_formula', 'molecular_weight', 'image_path', 'source',
+                 'structure_key', 'same_structure_as']
+
+SMILES_COLUMNS = ('smiles', 'SMILES', 'canonical_smiles', 'CanonicalSMILES')
+NAME_COLUMNS = ('compound_name', 'name', 'Name', 'id', 'ID')
+
+
+def library_compound(name: str, smiles: str, **metadata) -> Dict:
+    """Compound info in the same shape as target_compounds entries"""
+    info = {'type': 'library', 'source': 'Input file', **metadata}
+    if smiles:
+        info.update({'smiles': smiles, 'skip_pubchem': True})
+    else:
+        info['pubchem_search_terms'] = [name]
+    return info
+
+
+def iter_smiles_file(path: str) -> Iterator[Tuple[str, Dict]]:
+    """One 'SMILES [name]' per line; unnamed compounds are numbered by line"""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split(None, 1)
+            name = parts[1].strip() if len(parts) > 1 else f"compound_{line_number}"
+            yield name, library_compound(name, parts[0])
+
+
+def iter_csv_file(path: str) -> Iterator[Tuple[str, Dict]]:
+    """CSV with a SMILES and/or name column; other columns are kept as metadata"""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        smiles_column = next((c for c in SMILES_COLUMNS if c in reader.fieldnames), None)
+        name_column = next((c for c in NAME_COLUMNS if c in reader.fieldnames), None)
+        if smiles_column is None and name_column is None:
+            raise ValueError(f"{path} needs a SMILES or name column")
+
+        for row_number, row in enumerate(reader, 1):
+            name = (row.get(name_column) or '').strip() if name_column else ''
+            smiles = (row.get(smiles_column) or '').strip() if smiles_column else ''
+            name = name or f"compound_{row_number}"
+            metadata = {k: v for k, v in row.items()
+                        if k not in (smiles_column, name_column) and k in RESULT_FIELDS and v}
+            yield name, library_compound(name, smiles, **metadata)
+
+
+def iter_sdf_file(path: str) -> Iterator[Tuple[str, Dict]]:
+    """SDF records via RDKit's forward supplier, which never holds the whole file"""
+    with open(path, 'rb') as f:
+        for record_number, mol in enumerate(Chem.ForwardSDMolSupplier(f), 1):
+            if mol is None:
+                print(f"Skipping unreadable SDF record {record_number} in {path}")
+                continue
+            name = mol.GetProp('_Name').strip() if mol.HasProp('_Name') else ''
+            yield name or f"compound_{record_number}", library_compound(name, Chem.MolToSmiles(mol))
+
+
+def iter_compounds(path: str) -> Iterator[Tuple[str, Dict]]:
+    """Yield (compound_name, compound_info) from a .smi/.smiles, .csv or .sdf file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.smi', '.smiles', '.txt'):
+        return iter_smiles_file(path)
+    if extension == '.csv':
+        return iter_csv_file(path)
+    if extension in ('.sdf', '.sd', '.mol'):
+        return iter_sdf_file(path)
+    raise ValueError(f"Unsupported compound file type: {path}")
+
+
+def completed_compounds(jsonl_path: str) -> Set[str]:
+    """Names already written to a results file, for resuming an interrupted run"""
+    done = set()
+    if not os.path.exists(jsonl_path):
+        return done
+    with open(jsonl_path) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['compound_name'])
+            except (ValueError, KeyError):
+                # A crash can leave a truncated final line; that compound is redone
+                continue
+    return done
+
+
+def truncate_partial_line(path: str):
+    """Cut a file back to its last newline, dropping a line a crash left half-written"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 65536)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+
+
+class StreamingResultWriter:
+    """Appends each result to JSON Lines and CSV as soon as it is finished"""
+
+    def __init__(self, output_dir: str, basename: str = "cgas_structures_master", append: bool = False):
+        self.jsonl_path = os.path.join(output_dir, f"{basename}.jsonl")
+        self.csv_path = os.path.join(output_dir, f"{basename}.csv")
+        self.errors_path = os.path.join(output_dir, f"{basename}_errors.jsonl")
+        self.count = 0
+
+        mode = 'a' if append else 'w'
+        if append:
+            # Appending onto a truncated final row would corrupt it and the next result
+            for path in (self.jsonl_path, self.csv_path, self.errors_path):
+                truncate_partial_line(path)
+        write_header = not (append and os.path.exists(self.csv_path) and os.path.getsize(self.csv_path) > 0)
+        self.jsonl_file = open(self.jsonl_path, mode)
+        self.csv_file = open(self.csv_path, mode, newline='')
+        self.errors_file = open(self.errors_path, mode)
+        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        if write_header:
+            self.csv_writer.writeheader()
+
+    def write(self, result: Dict):
+        self.jsonl_file.write(json.dumps(result) + '\n')
+        self.csv_writer.writerow(result)
+        self.count += 1
+
+    def write_error(self, error: Dict):
+        self.errors_file.write(json.dumps(error) + '\n')
+
+    def flush(self):
+        for f in (self.jsonl_file, self.csv_file, self.errors_file):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        self.flush()
+        for f in (self.jsonl_file, self.csv_file, self.errors_file):
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Compound registry for the cGAS structure generator
+Keys each compound by the InChIKey of its standardized parent structure (salts
+stripped, charges neutralized, canonical tautomer), so repeated entries, salt
+forms and tautomers are computed and rendered once; names map many-to-one onto
+structures in a SQLite file next to the outputs (so a streaming run does not hold
+the library in memory and --resume picks it up), exported as JSON after each run
+"""
+
+import json
+import sqlite3
+import time
+from functools import lru_cache
+from itertools import groupby
+from typing import Dict, Iterator, Optional, Tuple
+
+from rdkit import Chem, RDLogger
+from rdkit.Chem.MolStandardize import rdMolStandardize
+
+REGISTRY_FILENAME = "cgas_structures_registry.json"
+REGISTRY_DB_FILENAME = "cgas_structures_registry.sqlite"
+
+# Input SMILES whose standardized key is kept in memory; repeats beyond this are re-standardized
+KEY_CACHE_SIZE = 100000
+
+# Fields an alias takes over from the compound its structure was computed for
+STRUCTURE_FIELDS = ('smiles', 'molecular_formula', 'molecular_weight', 'iupac_name', 'image_path')
+
+_tautomer_enumerator = None
+
+
+def standardize(mol, strip_salts: bool = True, tautomers: bool = True):
+    """Parent structure used for the key: largest fragment, uncharged, canonical tautomer"""
+    global _tautomer_enumerator
+    # The standardizer logs every step at info level
+    RDLogger.DisableLog('rdApp.info')
+    mol = rdMolStandardize.ChargeParent(mol) if strip_salts else rdMolStandardize.Cleanup(mol)
+    if tautomers:
+        if _tautomer_enumerator is None:
+            _tautomer_enumerator = rdMolStandardize.TautomerEnumerator()
+        mol = _tautomer_enumerator.Canonicalize(mol)
+    return mol
+
+
+def structure_key(smiles: str, strip_salts: bool = True, tautomers: bool = True) -> Optional[Dict]:
+    """InChIKey and canonical SMILES of the standardized parent, or None if RDKit cannot parse it
+
+    Structures InChI cannot represent fall back to 'SMILES:<canonical SMILES>' as key.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    try:
+        mol = standardize(mol, strip_salts, tautomers)
+    except Exception:
+        # Keep the sanitized input when standardization fails
+        pass
+    canonical = Chem.MolToSmiles(mol)
+    inchikey = Chem.MolToInchiKey(mol)
+    return {'key': inchikey or f"SMILES:{canonical}", 'inchikey': inchikey, 'smiles': canonical}
+
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS settings (
+        name TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS structures (
+        key TEXT PRIMARY KEY,
+        inchikey TEXT,
+        smiles TEXT NOT NULL,
+        result TEXT
+    );
+    CREATE TABLE IF NOT EXISTS names (
+        compound_name TEXT NOT NULL UNIQUE,
+        key TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_names_key ON names(key);
+"""
+
+
+class CompoundRegistry:
+    """Structures by key, the names registered for each, and the first computed result per structure
+
+    Names are kept in registration order, so the first name of a structure is the
+    one it is computed under. Without resume, a registry left by an earlier run is cleared.
+    """
+
+    def __init__(self, path: str = ':memory:', strip_salts: bool = True, tautomers: bool = True,
+                 resume: bool = False):
+        self.strip_salts = strip_salts
+        self.tautomers = tautomers
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        settings = {'strip_salts': str(strip_salts), 'tautomers': str(tautomers)}
+        # Keys from other standardization settings do not match this run's
+        if not resume or dict(self.conn.execute("SELECT name, value FROM settings")) != settings:
+            with self.conn:
+                self.conn.execute("DELETE FROM names")
+                self.conn.execute("DELETE FROM structures")
+                self.conn.execute("DELETE FROM settings")
+                self.conn.executemany("INSERT INTO settings (name, value) VALUES (?, ?)", settings.items())
+        # Input SMILES -> structure_key() entry, so repeated inputs are standardized once
+        self.key_for = lru_cache(maxsize=KEY_CACHE_SIZE)(
+            lambda smiles: structure_key(smiles, self.strip_salts, self.tautomers))
+
+    def register(self, compound_name: str, smiles: str) -> Optional[str]:
+        """Add a name for this structure; returns the structure key (None for unparseable SMILES)"""
+        entry = self.key_for(smiles)
+        if entry is None:
+            return None
+        key = entry['key']
+        # A name keeps the structure it was first registered with
+        if self.conn.execute("INSERT OR IGNORE INTO names (compound_name, key) VALUES (?, ?)",
+                             (compound_name, key)).rowcount:
+            self.conn.execute("INSERT OR IGNORE INTO structures (key, inchikey, smiles) VALUES (?, ?, ?)",
+                              (key, entry['inchikey'], entry['smiles']))
+        return key
+
+    def primary(self, key: str) -> str:
+        """The name a structure was first registered under"""
+        return self.conn.execute("SELECT compound_name FROM names WHERE key = ? ORDER BY rowid LIMIT 1",
+                                 (key,)).fetchone()[0]
+
+    def store(self, key: str, result: Dict):
+        """Keep the structure fields of a computed result for later aliases of the same structure"""
+        computed = {'compound_name': result['compound_name'],
+                    **{field: result.get(field, '') for field in STRUCTURE_FIELDS}}
+        self.conn.execute("UPDATE structures SET result = ? WHERE key = ? AND result IS NULL",
+                          (json.dumps(computed), key))
+
+    def computed_result(self, key: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT result FROM structures WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def computed(self, key: str) -> bool:
+        return self.computed_result(key) is not None
+
+    def apply(self, key: str, result: Dict) -> Optional[Dict]:
+        """Fill an alias's empty structure fields from the computed structure, or None if there is none"""
+        computed = self.computed_result(key)
+        if computed is None:
+            return None
+        for field in STRUCTURE_FIELDS:
+            if not result.get(field):
+                result[field] = computed[field]
+        result['same_structure_as'] = computed['compound_name']
+        return result
+
+    def duplicates(self) -> int:
+        """Registered names beyond the first for each structure"""
+        names, structures = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM names), (SELECT COUNT(*) FROM structures)").fetchone()
+        return names - structures
+
+    def commit(self):
+        self.conn.commit()
+
+    def iter_structures(self) -> Iterator[Tuple[str, Dict]]:
+        """(key, {inchikey, smiles, names}) per structure, in registration order"""
+        rows = self.conn.execute(
+            "SELECT s.key, s.inchikey, s.smiles, n.compound_name FROM structures s "
+            "JOIN names n ON n.key = s.key ORDER BY s.rowid, n.rowid")
+        for key, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            yield key, {'inchikey': group[0][1], 'smiles': group[0][2], 'names': [row[3] for row in group]}
+
+    def save(self, path: str) -> str:
+        """Export structures and aliases as JSON, written entry by entry rather than built in memory"""
+        self.commit()
+        names, structures = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM names), (SELECT COUNT(*) FROM structures)").fetchone()
+        metadata = {
+            'generated_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'names': names,
+            'structures': structures,
+            'strip_salts': self.strip_salts,
+            'tautomers': self.tautomers
+        }
+        with open(path, 'w') as f:
+            f.write('{\n  "metadata": ' + json.dumps(metadata) + ',\n  "structures": {')
+            for i, (key, structure) in enumerate(self.iter_structures()):
+                f.write((',' if i else '') + '\n    ' + json.dumps(key) + ': ' + json.dumps(structure))
+            f.write('\n  },\n  "aliases": {')
+            for i, (name, key) in enumerate(self.conn.execute("SELECT compound_name, key FROM names ORDER BY rowid")):
+                f.write((',' if i else '') + '\n    ' + json.dumps(name) + ': ' + json.dumps(key))
+            f.write('\n  }\n}\n')
+        print(f"Compound registry saved: {names} names -> {structures} structures in {path}")
+        return path
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Batch descriptor engine for the cGAS structure generator
+Computes a configurable descriptor set for a whole batch of molecules into
+typed NumPy columns and exports them as Parquet next to the master CSV
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from rdkit import Chem
+from rdkit.Chem import QED, Crippen, Descriptors, Lipinski, rdMolDescriptors
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# name -> (function, dtype); integer counts stay integers in the exported table
+DESCRIPTORS = {
+    'mw': (Descriptors.MolWt, np.float64),
+    'clogp': (Crippen.MolLogP, np.float64),
+    'tpsa': (rdMolDescriptors.CalcTPSA, np.float64),
+    'hbd': (Lipinski.NumHDonors, np.int32),
+    'hba': (Lipinski.NumHAcceptors, np.int32),
+    'rotatable_bonds': (rdMolDescriptors.CalcNumRotatableBonds, np.int32),
+    'heavy_atoms': (Lipinski.HeavyAtomCount, np.int32),
+    'qed': (QED.qed, np.float64),
+}
+DEFAULT_DESCRIPTORS = ['mw', 'clogp', 'tpsa', 'hbd', 'hba', 'rotatable_bonds', 'qed']
+
+DESCRIPTOR_FILENAME = "cgas_structures_descriptors.parquet"
+
+
+def _compute_columns(smiles_list: List[str], names: List[str]) -> Dict[str, np.ndarray]:
+    """Parse each molecule once, then fill one typed column per descriptor"""
+    mols = [Chem.MolFromSmiles(s) if s else None for s in smiles_list]
+    valid = np.array([mol is not None for mol in mols], dtype=bool)
+
+    columns = {'valid': valid}
+    for name in names:
+        function, dtype = DESCRIPTORS[name]
+        column = np.zeros(len(mols), dtype=dtype)
+        if np.issubdtype(dtype, np.floating):
+            column[:] = np.nan
+        for i, mol in enumerate(mols):
+            if mol is not None:
+                column[i] = function(mol)
+        columns[name] = column
+    return columns
+
+
+def compute_descriptor_table(compound_names: Sequence[str], smiles_list: Sequence[str],
+                             descriptors: Optional[Sequence[str]] = None,
+                             workers: int = 1, chunk_size: int = 5000) -> Dict[str, np.ndarray]:
+    """Columnar descriptor table for a batch; invalid SMILES are flagged in 'valid'"""
+    names = list(descriptors or DEFAULT_DESCRIPTORS)
+    unknown = [name for name in names if name not in DESCRIPTORS]
+    if unknown:
+        raise ValueError(f"Unknown descriptors: {', '.join(unknown)} (available: {', '.join(DESCRIPTORS)})")
+
+    smiles_list = list(smiles_list)
+    chunks = [smiles_list[i:i + chunk_size] for i in range(0, len(smiles_list), chunk_size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_compute_columns, chunks, [names] * len(chunks)))
+    else:
+        parts = [_compute_columns(chunk, names) for chunk in chunks]
+
+    table = {'compound_name': np.array(list(compound_names), dtype=object),
+             'smiles': np.array(smiles_list, dtype=object)}
+    for column in ['valid'] + names:
+        if parts:
+            table[column] = np.concatenate([part[column] for part in parts])
+        else:
+            table[column] = np.zeros(0, dtype=bool if column == 'valid' else DESCRIPTORS[column][1])
+    return table
+
+
+def to_arrow(table: Dict[str, np.ndarray]):
+    """Arrow table with nulls for molecules RDKit could not parse"""
+    invalid = ~table['valid']
+    arrays = {}
+    for name, column in table.items():
+        if name == 'valid':
+            continue
+        if column.dtype == object:
+            arrays[name] = pa.array(column.tolist(), type=pa.string())
+        else:
+            arrays[name] = pa.array(column, mask=invalid)
+    return pa.table(arrays)
+
+
+class DescriptorParquetWriter:
+    """Writes descriptor tables as Parquet row groups, one per batch"""
+
+    def __init__(self, path: str):
+        if pq is None:
+            raise ImportError("pyarrow is required for the Parquet descriptor export (pip install pyarrow)")
+        self.path = path
+        self.writer = None
+        self.rows = 0
+
+    def write(self, table: Dict[str, np.ndarray]):
+        arrow_table = to_arrow(table)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, arrow_table.schema)
+        self.writer.write_table(arrow_table)
+        self.rows += arrow_table.num_rows
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            print(f"Descriptor table saved: {self.rows} rows in {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -7,36 +7,79 @@ Generates SMILES, IUPAC names, and JPG structure images for key cGAS inhibitor c
 import os
 import json
 import csv
-import requests
 import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from typing import Dict, List, Optional, Tuple
-import pandas as pd
 
-# Install required packages
-try:
-    from rdkit import Chem
-    from rdkit.Chem import Draw, Descriptors
-    from rdkit.Chem.Draw import rdMolDraw2D
-    from PIL import Image
-    import io
-except ImportError:
-    print("Installing required packages...")
-    os.system("pip install rdkit-pypi requests pillow pandas")
-    from rdkit import Chem
-    from rdkit.Chem import Draw, Descriptors
-    from rdkit.Chem.Draw import rdMolDraw2D
-    from PIL import Image
-    import io
+import numpy as np
+
+from pubchem_client import PubChemClient, PUBCHEM_BASE_URL
+from pubchem_cache import PubChemCache, DEFAULT_TTL_SECONDS
+from structure_pipeline import (RENDER_OPTIONS, canonicalize_smiles, compute_structure, generate_iupac_name,
+                                render_structure_image, run_compute_stage)
+from structure_manifest import StructureManifest, compound_hash
+from compound_io import StreamingResultWriter, completed_compounds, iter_compounds
+from structure_render import benchmark_backends, print_backend_report, write_sprite_sheets
+from structure_index import INDEX_DIRNAME, StructureIndexWriter
+from descriptor_engine import DESCRIPTORS, DESCRIPTOR_FILENAME, DescriptorParquetWriter, compute_descriptor_table
+from compound_registry import REGISTRY_DB_FILENAME, REGISTRY_FILENAME, CompoundRegistry
+# structure_pipeline puts the workspace directory (with instrumentation.py) on sys.path
+import instrumentation
+from instrumentation import TRACE_FORMATS, progress, span
+
+# Outputs go next to this script unless --output-dir says otherwise
+DEFAULT_OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 class CGASStructureGenerator:
-    def __init__(self, output_dir: str = "/home/ubuntu/cgas_structures"):
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR,
+                 pubchem_client: Optional[PubChemClient] = None, lookup_workers: int = 1,
+                 bulk_lookup: bool = False, compute_workers: int = 1, incremental: bool = False,
+                 render_options: Optional[Dict] = None, sprite_sheet: bool = False,
+                 render_report: bool = False, build_index: bool = False,
+                 descriptors: Optional[List[str]] = None, dedup: bool = True, dedup_tautomers: bool = True):
         self.output_dir = output_dir
-        self.results = []
-        
-        # Ensure output directory exists
+        # Ensure output directory exists (the manifest and lookup cache live in it)
         os.makedirs(output_dir, exist_ok=True)
         os.makedirs(os.path.join(output_dir, "images"), exist_ok=True)
         
+        self.results = []
+        self.errors = []
+        self.compute_workers = compute_workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        
+        # Image backend (jpeg/png/svg) and size; sprite sheets are written in addition
+        self.render_options = dict(RENDER_OPTIONS, **(render_options or {}))
+        self.sprite_sheet = sprite_sheet
+        self.render_report = render_report
+        
+        # Fingerprint search index written next to the master JSON/CSV
+        self.build_index = build_index
+        
+        # Batch descriptor set exported as Parquet; None disables the export
+        self.descriptors = descriptors
+        
+        # Compounds with the same parent structure are computed once; the registry is
+        # opened per run (see open_registry) and stays None when dedup is off
+        self.dedup = dedup
+        self.dedup_tautomers = dedup_tautomers
+        self.registry: Optional[CompoundRegistry] = None
+        
+        # Incremental mode reuses outputs whose input hash matches the manifest
+        self.incremental = incremental
+        self.manifest = StructureManifest(output_dir) if incremental else None
+        self.unchanged = set()
+        
+        # Shared, rate-limited PubChem client; lookup_workers > 1 prefetches concurrently
+        if pubchem_client is None:
+            cache = PubChemCache(os.path.join(output_dir, "pubchem_cache.sqlite"))
+            pubchem_client = PubChemClient(pool_size=max(1, lookup_workers), cache=cache)
+        self.pubchem = pubchem_client
+        self.lookup_workers = lookup_workers
+        self.bulk_lookup = bulk_lookup
+        self.pubchem_results: Dict[str, Optional[Dict]] = {}
+        
         # Define target compounds with known information and fallback SMILES for scaffolds
         self.target_compounds = {
             # Clinical Candidates
@@ -113,76 +156,44 @@ class CGASStructureGenerator:
 
     def query_pubchem(self, compound_name: str, search_terms: List[str]) -> Optional[Dict]:
         """Query PubChem for compound information"""
-        print(f"Searching PubChem for {compound_name}...")
+        if compound_name in self.pubchem_results:
+            return self.pubchem_results[compound_name]
         
-        for term in search_terms:
-            try:
-                # Try name-based search first
-                url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{term}/property/CanonicalSMILES,IUPACName,MolecularFormula,MolecularWeight/JSON"
-                response = requests.get(url, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'PropertyTable' in data and 'Properties' in data['PropertyTable']:
-                        props = data['PropertyTable']['Properties'][0]
-                        return {
-                            'smiles': props.get('CanonicalSMILES'),
-                            'iupac_name': props.get('IUPACName'),
-                            'molecular_formula': props.get('MolecularFormula'),
-                            'molecular_weight': props.get('MolecularWeight'),
-                            'source': f'PubChem ({term})'
-                        }
-                
-                time.sleep(0.5)  # Rate limiting
-                
-            except Exception as e:
-                print(f"PubChem search failed for {term}: {e}")
-                continue
+        progress(f"Searching PubChem for {compound_name}...")
+        with span('pubchem.lookup', compound=compound_name):
+            return self.pubchem.lookup(search_terms)
+
+    def prefetch_pubchem(self, compounds: Optional[Dict] = None):
+        """Look up all PubChem-backed compounds concurrently before processing"""
+        compounds = self.target_compounds if compounds is None else compounds
+        queries = {
+            name: info.get('pubchem_search_terms', [name])
+            for name, info in compounds.items()
+            if not info.get('skip_pubchem', False)
+        }
+        if not queries:
+            return
         
-        return None
+        print(f"Prefetching {len(queries)} compounds from PubChem with {self.lookup_workers} workers...")
+        with span('pubchem.prefetch', compounds=len(queries), bulk=self.bulk_lookup):
+            if self.bulk_lookup:
+                # Names resolve to CIDs first, then properties arrive in batched POSTs
+                results = self.pubchem.lookup_bulk(queries, max_workers=self.lookup_workers, errors=self.errors)
+            else:
+                results = self.pubchem.lookup_many(queries, max_workers=self.lookup_workers)
+        self.pubchem_results.update(results)
 
     def generate_iupac_name(self, mol) -> str:
         """Generate IUPAC name using RDKit (basic implementation)"""
-        try:
-            # RDKit doesn't have built-in IUPAC name generation
-            # Return molecular formula as fallback
-            return Chem.rdMolDescriptors.CalcMolFormula(mol)
-        except:
-            return "Unknown"
+        return generate_iupac_name(mol)
 
     def create_structure_image(self, mol, compound_name: str) -> str:
         """Create high-quality structure image"""
-        try:
-            # Create high-resolution image
-            drawer = rdMolDraw2D.MolDraw2DCairo(800, 600)
-            drawer.SetFontSize(0.8)
-            drawer.DrawMolecule(mol)
-            drawer.FinishDrawing()
-            
-            # Save as PNG first
-            png_data = drawer.GetDrawingText()
-            
-            # Convert to PIL Image and save as JPG
-            img = Image.open(io.BytesIO(png_data))
-            
-            # Convert to RGB if necessary (for JPG)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Save as JPG
-            image_path = os.path.join(self.output_dir, "images", f"{compound_name.replace('/', '_')}.jpg")
-            img.save(image_path, "JPEG", quality=95)
-            
-            print(f"Structure image saved: {image_path}")
-            return image_path
-            
-        except Exception as e:
-            print(f"Error creating image for {compound_name}: {e}")
-            return ""
+        return render_structure_image(mol, compound_name, self.output_dir, self.render_options)
 
-    def process_compound(self, compound_name: str, compound_info: Dict) -> Dict:
-        """Process a single compound"""
-        print(f"\n=== Processing {compound_name} ===")
+    def resolve_compound(self, compound_name: str, compound_info: Dict) -> Tuple[Dict, Optional[str]]:
+        """Build the result record and pick the SMILES to use (fetch stage)"""
+        progress(f"\n=== Processing {compound_name} ===")
         
         result = {
             'compound_name': compound_name,
@@ -196,13 +207,15 @@ class CGASStructureGenerator:
             'molecular_formula': '',
             'molecular_weight': '',
             'image_path': '',
-            'source': ''
+            'source': '',
+            'structure_key': '',
+            'same_structure_as': ''
         }
         
         # Check if we should skip PubChem search
         if compound_info.get('skip_pubchem', False):
             smiles = compound_info.get('smiles')
-            result['source'] = 'Predefined scaffold'
+            result['source'] = compound_info.get('source', 'Predefined scaffold')
         else:
             # Try PubChem first
             pubchem_data = self.query_pubchem(compound_name, compound_info.get('pubchem_search_terms', [compound_name]))
@@ -219,63 +232,298 @@ class CGASStructureGenerator:
                 # Use fallback SMILES
                 smiles = compound_info.get('fallback_smiles')
                 result['source'] = 'Fallback structure'
-                print(f"Using fallback SMILES for {compound_name}")
+                progress(f"Using fallback SMILES for {compound_name}")
         
         if not smiles:
             print(f"No SMILES available for {compound_name}")
+            self.errors.append({'compound_name': compound_name, 'stage': 'fetch', 'error': 'No SMILES available'})
+        
+        return result, smiles
+
+    def process_compound(self, compound_name: str, compound_info: Dict) -> Dict:
+        """Process a single compound"""
+        result, smiles = self.resolve_compound(compound_name, compound_info)
+        if not smiles:
             return result
         
-        # Validate and process SMILES
-        try:
-            mol = Chem.MolFromSmiles(smiles)
-            if mol is None:
-                print(f"Invalid SMILES for {compound_name}: {smiles}")
-                return result
-            
-            # Sanitize molecule
-            Chem.SanitizeMol(mol)
-            
-            # Get canonical SMILES
-            canonical_smiles = Chem.MolToSmiles(mol)
-            result['smiles'] = canonical_smiles
-            
-            # Generate additional properties if not from PubChem
-            if not result['molecular_formula']:
-                result['molecular_formula'] = Chem.rdMolDescriptors.CalcMolFormula(mol)
-            if not result['molecular_weight']:
-                result['molecular_weight'] = f"{Descriptors.MolWt(mol):.2f}"
-            if not result['iupac_name']:
-                result['iupac_name'] = self.generate_iupac_name(mol)
-            
-            # Create structure image
-            result['image_path'] = self.create_structure_image(mol, compound_name)
-            
-            print(f"Successfully processed {compound_name}")
-            print(f"  SMILES: {canonical_smiles}")
-            print(f"  Formula: {result['molecular_formula']}")
-            print(f"  MW: {result['molecular_weight']}")
+        result, error = compute_structure(result, smiles, self.output_dir, self.render_options)
+        if error:
+            self.errors.append({'compound_name': compound_name, 'stage': 'compute', 'error': error})
+        return result
+
+    def fetch_stage(self) -> List[Tuple[Dict, Optional[str]]]:
+        """Resolve every target compound to a result record and SMILES"""
+        with span('stage.fetch'):
+            if self.lookup_workers > 1 or self.bulk_lookup:
+                self.prefetch_pubchem()
             
-        except Exception as e:
-            print(f"Error processing {compound_name}: {e}")
+            return [self.resolve_compound(name, info) for name, info in self.target_compounds.items()]
+
+    def compute_stage(self, jobs: List[Tuple[Dict, Optional[str]]]) -> List[Dict]:
+        """Run the RDKit work for all resolved compounds, in a process pool if configured"""
+        results = [result for result, _ in jobs]
+        computable = [i for i, (_, smiles) in enumerate(jobs) if smiles]
         
-        return result
+        self.open_registry()
+        if self.registry is not None:
+            with span('registry.register', compounds=len(computable)):
+                for i in computable:
+                    result, smiles = jobs[i]
+                    result['structure_key'] = self.registry.register(result['compound_name'], smiles) or ''
+        
+        hashes = {}
+        if self.incremental:
+            stale = []
+            reusable = {}
+            for i in computable:
+                result, smiles = jobs[i]
+                # Hash the record as resolved, before compute_structure fills it in
+                hashes[i] = compound_hash(result, canonicalize_smiles(smiles), self.render_options)
+                cached = self.manifest.lookup(result['compound_name'], hashes[i])
+                if cached is None:
+                    stale.append(i)
+                else:
+                    reusable[i] = cached
+            # A duplicate shows its first compound's image, which is redrawn if that compound is regenerated
+            regenerated = {jobs[i][0]['compound_name'] for i in stale}
+            for i, cached in reusable.items():
+                if cached.get('same_structure_as') in regenerated:
+                    stale.append(i)
+                    continue
+                results[i] = cached
+                self.unchanged.add(cached['compound_name'])
+                if self.registry is not None and cached.get('structure_key') and not cached.get('same_structure_as'):
+                    self.registry.store(cached['structure_key'], cached)
+            stale.sort()
+            print(f"\nIncremental run: {len(self.unchanged)} unchanged, {len(stale)} to regenerate")
+            instrumentation.count('manifest.unchanged', len(computable) - len(stale))
+            computable = stale
+        
+        # Only the first compound per structure is computed; the others become aliases of it
+        aliases = []
+        if self.registry is not None:
+            unique = []
+            seen = set()
+            for i in computable:
+                key = jobs[i][0]['structure_key']
+                if key and (key in seen or self.registry.computed(key)):
+                    aliases.append(i)
+                else:
+                    seen.add(key)
+                    unique.append(i)
+            if aliases:
+                progress(f"{len(aliases)} compounds share a structure with another compound")
+            instrumentation.count('registry.duplicates', len(aliases))
+            computable = unique
+        
+        if self.compute_workers > 1:
+            print(f"\nComputing {len(computable)} structures with {self.compute_workers} processes...")
+        
+        with span('stage.compute', compounds=len(computable), workers=self.compute_workers):
+            computed, errors = run_compute_stage([jobs[i] for i in computable], self.output_dir,
+                                                 workers=self.compute_workers, executor=self.executor,
+                                                 render_options=self.render_options)
+        self.errors.extend(errors)
+        failed = {error['compound_name'] for error in errors}
+        
+        # Results come back in submission order, so output order matches target_compounds
+        for i, result in zip(computable, computed):
+            results[i] = result
+            if result['compound_name'] in failed:
+                continue
+            if self.registry is not None and result['structure_key']:
+                self.registry.store(result['structure_key'], result)
+            if self.incremental:
+                self.manifest.record(result['compound_name'], hashes[i], result)
+        
+        for i in aliases:
+            result = results[i]
+            key = result['structure_key']
+            if self.registry.apply(key, result) is None:
+                self.errors.append({'compound_name': result['compound_name'], 'stage': 'compute',
+                                    'error': f"Same structure as {self.registry.primary(key)}, which failed"})
+            elif self.incremental:
+                self.manifest.record(result['compound_name'], hashes[i], result)
+        return results
 
     def generate_all_structures(self):
         """Generate structures for all target compounds"""
         print("=== cGAS Inhibitor Structure Generation ===")
         print(f"Output directory: {self.output_dir}")
         
-        for compound_name, compound_info in self.target_compounds.items():
-            result = self.process_compound(compound_name, compound_info)
-            self.results.append(result)
+        jobs = self.fetch_stage()
+        self.results.extend(self.compute_stage(jobs))
+        
+        entries = [(r['compound_name'], r['smiles']) for r in self.results if r['smiles']]
+        if self.sprite_sheet:
+            with span('stage.sprites'):
+                write_sprite_sheets(entries, self.output_dir, self.render_options)
+        if self.render_report:
+            self.report_render_backends([smiles for _, smiles in entries])
         
         # Save results
-        self.save_results()
+        with span('stage.save'):
+            self.save_results()
+        self.record_counters()
         
         print(f"\n=== Generation Complete ===")
         print(f"Processed {len(self.results)} compounds")
+        if self.errors:
+            print(f"{len(self.errors)} compounds had errors:")
+            for error in self.errors:
+                print(f"  {error['compound_name']} ({error['stage']}): {error['error']}")
         print(f"Results saved to {self.output_dir}")
 
+    def record_counters(self):
+        """Add PubChem request, retry and cache counts to the run's instrumentation"""
+        instrumentation.count('pubchem.requests', self.pubchem.requests)
+        instrumentation.count('pubchem.retries', self.pubchem.retries)
+        if self.pubchem.cache is not None:
+            instrumentation.count('pubchem_cache.hits', self.pubchem.cache.hits)
+            instrumentation.count('pubchem_cache.misses', self.pubchem.cache.misses)
+
+    def report_render_backends(self, smiles_list: List[str]) -> Dict:
+        """Measure throughput and disk size of each image backend on these molecules"""
+        report = benchmark_backends(smiles_list, self.render_options)
+        print_backend_report(report)
+        report_path = os.path.join(self.output_dir, "render_backend_report.json")
+        with open(report_path, 'w') as f:
+            json.dump({'render_options': self.render_options, 'backends': report}, f, indent=2)
+        print(f"Render backend report saved: {report_path}")
+        return report
+
+    def open_descriptor_writer(self) -> Optional[DescriptorParquetWriter]:
+        """Parquet writer for the descriptor table, or None if disabled or pyarrow is missing"""
+        if not self.descriptors:
+            return None
+        try:
+            return DescriptorParquetWriter(os.path.join(self.output_dir, DESCRIPTOR_FILENAME))
+        except ImportError as e:
+            print(f"Skipping descriptor export: {e}")
+            return None
+
+    def write_descriptors(self, writer: DescriptorParquetWriter, results: List[Dict]):
+        """Compute the configured descriptors for a batch of results in one pass
+        
+        Each distinct SMILES is described once and its row repeated for every compound with it.
+        """
+        computed = [r for r in results if r['smiles']]
+        rows = {}
+        for r in computed:
+            rows.setdefault(r['smiles'], len(rows))
+        table = compute_descriptor_table(list(rows), list(rows), self.descriptors, workers=self.compute_workers)
+        take = np.array([rows[r['smiles']] for r in computed], dtype=np.int64)
+        table = {name: column[take] for name, column in table.items()}
+        table['compound_name'] = np.array([r['compound_name'] for r in computed], dtype=object)
+        writer.write(table)
+
+    def open_registry(self, resume: bool = False):
+        """Open the on-disk compound registry once per generator; resume keeps an earlier run's names"""
+        if self.dedup and self.registry is None:
+            self.registry = CompoundRegistry(os.path.join(self.output_dir, REGISTRY_DB_FILENAME),
+                                             tautomers=self.dedup_tautomers, resume=resume)
+
+    def save_registry(self):
+        if self.registry is not None:
+            self.registry.save(os.path.join(self.output_dir, REGISTRY_FILENAME))
+
+    def generate_streaming(self, input_path: str, batch_size: int = 1000, resume: bool = False):
+        """Generate structures for a compound file, writing each batch as it finishes
+        
+        Results go to cgas_structures_master.jsonl/.csv instead of being held in
+        self.results, so memory is bounded by batch_size rather than library size.
+        With resume=True, compounds already in the JSONL file are skipped and the
+        compound registry of the interrupted run is kept.
+        """
+        print("=== cGAS Inhibitor Structure Generation (streaming) ===")
+        print(f"Input: {input_path}")
+        print(f"Output directory: {self.output_dir}")
+        
+        done = completed_compounds(os.path.join(self.output_dir, "cgas_structures_master.jsonl")) if resume else set()
+        if done:
+            print(f"Resuming: {len(done)} compounds already completed")
+        
+        compounds = ((name, info) for name, info in iter_compounds(input_path) if name not in done)
+        self.open_registry(resume=resume)
+        if self.compute_workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.compute_workers)
+        
+        error_count = 0
+        # Names in this run's input, for pruning the manifest once the whole file has been read
+        input_names = set() if self.incremental else None
+        index_writer = None
+        if self.build_index:
+            if resume:
+                print("Note: --resume rebuilds the structure index from this run's compounds only")
+            index_writer = StructureIndexWriter(os.path.join(self.output_dir, INDEX_DIRNAME))
+        descriptor_writer = self.open_descriptor_writer()
+        if descriptor_writer is not None and resume:
+            print("Note: --resume rewrites the descriptor table with this run's compounds only")
+        try:
+            with StreamingResultWriter(self.output_dir, append=resume) as writer:
+                while True:
+                    pairs = list(islice(compounds, batch_size))
+                    if not pairs:
+                        break
+                    
+                    # A name repeated within the input keeps its first entry; outputs are keyed by name
+                    batch = {}
+                    for name, info in pairs:
+                        if name in batch:
+                            self.errors.append({'compound_name': name, 'stage': 'input',
+                                                'error': 'Duplicate compound name, later entry skipped'})
+                        else:
+                            batch[name] = info
+                    if input_names is not None:
+                        input_names.update(batch)
+                    
+                    with span('stage.fetch'):
+                        if self.lookup_workers > 1 or self.bulk_lookup:
+                            self.prefetch_pubchem(batch)
+                        jobs = [self.resolve_compound(name, info) for name, info in batch.items()]
+                    results = self.compute_stage(jobs)
+                    with span('stage.write', compounds=len(results)):
+                        for result in results:
+                            writer.write(result)
+                            if index_writer is not None:
+                                index_writer.add(result['compound_name'], result['smiles'])
+                    if descriptor_writer is not None:
+                        with span('stage.descriptors'):
+                            self.write_descriptors(descriptor_writer, results)
+                    
+                    # Errors and lookups are per batch; nothing accumulates across the library
+                    for error in self.errors:
+                        writer.write_error(error)
+                    error_count += len(self.errors)
+                    self.errors.clear()
+                    self.pubchem_results.clear()
+                    writer.flush()
+                    if self.registry is not None:
+                        self.registry.commit()
+                    progress(f"Wrote {writer.count} compounds")
+                
+                total = writer.count
+            if input_names is not None:
+                # Only after a complete pass: an interrupted run has not seen the rest of the input
+                self.manifest.prune(done | input_names)
+        finally:
+            self.save_registry()
+            if self.incremental:
+                self.manifest.save()
+            if index_writer is not None:
+                index_writer.close()
+            if descriptor_writer is not None:
+                descriptor_writer.close()
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+        
+        self.record_counters()
+        instrumentation.count('compute.errors', error_count)
+        print(f"\n=== Generation Complete ===")
+        print(f"Processed {total} compounds ({error_count} with errors)")
+        print(f"Results streamed to {writer.jsonl_path} and {writer.csv_path}")
+
     def save_results(self):
         """Save results to multiple formats"""
         # Save as JSON
@@ -286,31 +534,136 @@ class CGASStructureGenerator:
                     'generated_date': time.strftime('%Y-%m-%d %H:%M:%S'),
                     'total_compounds': len(self.results),
                     'clinical_candidates': len([r for r in self.results if r['type'] == 'clinical_candidate']),
-                    'scaffolds': len([r for r in self.results if r['type'] == 'scaffold'])
+                    'scaffolds': len([r for r in self.results if r['type'] == 'scaffold']),
+                    'errors': self.errors
                 },
                 'compounds': self.results
             }, f, indent=2)
         
         # Save as CSV
+        import pandas as pd
+        
         csv_path = os.path.join(self.output_dir, "cgas_structures_master.csv")
         df = pd.DataFrame(self.results)
         df.to_csv(csv_path, index=False)
         
-        # Save individual compound files
+        # Save individual compound files (unchanged ones are already on disk)
         for result in self.results:
-            if result['smiles']:
+            if result['smiles'] and result['compound_name'] not in self.unchanged:
                 compound_file = os.path.join(self.output_dir, f"{result['compound_name'].replace('/', '_')}_data.json")
                 with open(compound_file, 'w') as f:
                     json.dump(result, f, indent=2)
         
+        descriptor_writer = self.open_descriptor_writer()
+        if descriptor_writer is not None:
+            with span('stage.descriptors'), descriptor_writer:
+                self.write_descriptors(descriptor_writer, self.results)
+        
+        if self.build_index:
+            with StructureIndexWriter(os.path.join(self.output_dir, INDEX_DIRNAME)) as index_writer:
+                for result in self.results:
+                    index_writer.add(result['compound_name'], result['smiles'])
+        
+        self.save_registry()
+        
+        if self.incremental:
+            self.manifest.prune(r['compound_name'] for r in self.results)
+            self.manifest.save()
+        
         print(f"Master JSON saved: {json_path}")
         print(f"Master CSV saved: {csv_path}")
         print(f"Individual compound files saved to: {self.output_dir}")
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main execution function"""
-    generator = CGASStructureGenerator()
-    generator.generate_all_structures()
+    parser = argparse.ArgumentParser(description="Generate cGAS inhibitor structures")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--lookup-workers", type=int, default=1,
+                        help="Concurrent PubChem lookups (requests stay rate limited)")
+    parser.add_argument("--pubchem-url", default=PUBCHEM_BASE_URL,
+                        help="PUG-REST base URL, e.g. a local stub server for testing")
+    parser.add_argument("--compute-workers", type=int, default=1,
+                        help="Processes for RDKit sanitize/descriptor/render work")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only regenerate compounds whose inputs changed since the last run")
+    parser.add_argument("--image-format", choices=["jpeg", "png", "svg"], default=RENDER_OPTIONS['format'],
+                        help="png and svg are written directly by RDKit without a PIL round-trip")
+    parser.add_argument("--image-size", default=f"{RENDER_OPTIONS['width']}x{RENDER_OPTIONS['height']}",
+                        help="Image (or thumbnail) size as WIDTHxHEIGHT")
+    parser.add_argument("--sprite-sheet", action="store_true",
+                        help="Also render all structures into grid sprite sheets")
+    parser.add_argument("--render-report", action="store_true",
+                        help="Report render throughput and disk size per image backend")
+    parser.add_argument("--index", action="store_true",
+                        help="Build a memory-mapped fingerprint index for similarity/substructure search")
+    parser.add_argument("--descriptors", default=None,
+                        help="Comma-separated descriptors for the Parquet export, or 'all' "
+                             f"(available: {', '.join(DESCRIPTORS)})")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Compute every compound, even when another one has the same parent structure")
+    parser.add_argument("--no-tautomer-dedup", action="store_true",
+                        help="Skip tautomer canonicalization when matching structures (faster on large libraries)")
+    parser.add_argument("--input", default=None,
+                        help="Stream compounds from a .smi, .csv or .sdf file instead of the built-in targets")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Compounds per streaming batch")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip compounds already written by an interrupted streaming run")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Resolve names to CIDs and fetch properties in batched POSTs")
+    parser.add_argument("--cache", default=None,
+                        help="PubChem lookup cache (default: <output-dir>/pubchem_cache.sqlite)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the PubChem lookup cache")
+    parser.add_argument("--cache-ttl-days", type=float, default=DEFAULT_TTL_SECONDS / 86400)
+    parser.add_argument("--offline", action="store_true",
+                        help="Answer PubChem lookups from the cache only, never the network")
+    parser.add_argument("--trace", default=None, help="Write the run's span trace to this file")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="chrome",
+                        help="chrome: Trace Event JSON for chrome://tracing / Perfetto; json: spans, counters, summary")
+    parser.add_argument("--verbose", action="store_true", help="Print per-compound progress")
+    args = parser.parse_args(argv)
+    # Both work on the whole result set, which a streaming run never holds in memory
+    if args.input and (args.sprite_sheet or args.render_report):
+        parser.error("--sprite-sheet and --render-report are not supported with --input")
+    try:
+        width, height = (int(v) for v in args.image_size.lower().split('x'))
+    except ValueError:
+        parser.error(f"--image-size must be WIDTHxHEIGHT, e.g. 300x300 (got {args.image_size!r})")
+    if width <= 0 or height <= 0:
+        parser.error(f"--image-size must be positive (got {args.image_size!r})")
+    descriptors = None
+    if args.descriptors:
+        descriptors = list(DESCRIPTORS) if args.descriptors == 'all' else args.descriptors.split(',')
+        unknown = [name for name in descriptors if name not in DESCRIPTORS]
+        if unknown:
+            parser.error(f"unknown descriptors: {', '.join(unknown)} (available: {', '.join(DESCRIPTORS)})")
+    
+    recorder = instrumentation.enable()
+    instrumentation.set_verbose(args.verbose)
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = None
+    if not args.no_cache:
+        cache = PubChemCache(args.cache or os.path.join(args.output_dir, "pubchem_cache.sqlite"),
+                             ttl_seconds=args.cache_ttl_days * 86400)
+    render_options = {'format': args.image_format, 'width': width, 'height': height}
+    
+    client = PubChemClient(base_url=args.pubchem_url, pool_size=max(1, args.lookup_workers),
+                           cache=cache, offline=args.offline)
+    generator = CGASStructureGenerator(args.output_dir, pubchem_client=client,
+                                       lookup_workers=args.lookup_workers, bulk_lookup=args.bulk,
+                                       compute_workers=args.compute_workers, incremental=args.incremental,
+                                       render_options=render_options, sprite_sheet=args.sprite_sheet,
+                                       render_report=args.render_report, build_index=args.index,
+                                       descriptors=descriptors, dedup=not args.no_dedup,
+                                       dedup_tautomers=not args.no_tautomer_dedup)
+    if args.input:
+        generator.generate_streaming(args.input, batch_size=args.batch_size, resume=args.resume)
+    else:
+        generator.generate_all_structures()
+    
+    recorder.print_summary("Structure generation")
+    if args.trace:
+        print(f"Trace saved: {recorder.export(args.trace, args.trace_format)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite cache for PubChem lookups
+Stores hits and "not found" misses per search term with separate TTLs and
+evicts least-recently-used entries once the cache grows past its size bound
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 100000
+
+
+class PubChemCache:
+    """Search-term keyed lookup cache with TTL, negative caching and LRU eviction"""
+
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS lookups (
+                term TEXT PRIMARY KEY,
+                value TEXT,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_lookups_last_used ON lookups(last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def normalize(term: str) -> str:
+        """PubChem name search is case-insensitive, so the cache key is too"""
+        return term.strip().lower()
+
+    def get(self, term: str, allow_stale: bool = False) -> Tuple[bool, Optional[Dict]]:
+        """Return (found, value); value None with found True is a cached miss"""
+        key = self.normalize(term)
+        with self.lock:
+            row = self.conn.execute("SELECT value, fetched_at FROM lookups WHERE term = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            value, fetched_at = row
+            ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+            if not allow_stale and time.time() - fetched_at > ttl:
+                self.misses += 1
+                return False, None
+
+            self.conn.execute("UPDATE lookups SET last_used = ? WHERE term = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits += 1
+            return True, json.loads(value) if value is not None else None
+
+    def put(self, term: str, value: Optional[Dict]):
+        """Store a lookup result; pass None to record that PubChem had no match"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO lookups (term, value, fetched_at, last_used) VALUES (?, ?, ?, ?)",
+                (self.normalize(term), json.dumps(value) if value is not None else None, now, now)
+            )
+            self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        """Drop least-recently-used entries beyond max_entries (caller holds the lock)"""
+        count = self.conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM lookups WHERE term IN (SELECT term FROM lookups ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
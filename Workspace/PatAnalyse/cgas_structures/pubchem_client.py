@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+PubChem PUG-REST client for the cGAS structure generator
+Shares one HTTP session across lookup threads, paces requests with a token bucket,
+retries throttled or failed requests with exponential backoff and can answer
+from a persistent lookup cache (optionally without touching the network)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pubchem_cache import PubChemCache
+
+PUBCHEM_BASE_URL = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
+PROPERTY_FIELDS = "CanonicalSMILES,IUPACName,MolecularFormula,MolecularWeight"
+
+# CIDs per POST to the batch property endpoint; PubChem accepts several hundred per call
+BULK_CHUNK_SIZE = 200
+
+# PubChem usage policy allows at most 5 requests per second and 400 per minute;
+# a sustained 5/s stays under the per-minute cap as well
+PUBCHEM_REQUESTS_PER_SECOND = 5.0
+
+# Status codes PubChem uses for throttling (503 "server busy") and transient failures
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace outgoing requests"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested number of tokens is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PubChemClient:
+    """Rate-limited, retrying PubChem client safe to share between threads"""
+
+    def __init__(self, base_url: str = PUBCHEM_BASE_URL,
+                 requests_per_second: float = PUBCHEM_REQUESTS_PER_SECOND,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 timeout: float = 10, pool_size: int = 8,
+                 cache: Optional[PubChemCache] = None, offline: bool = False):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache
+        self.offline = offline
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.bucket = TokenBucket(requests_per_second)
+
+        # Counters for the run summary: HTTP requests sent and how many of them were retries
+        self.requests = 0
+        self.retries = 0
+
+        # One session for all lookups so connections are kept alive and reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a paced request, retrying transient failures with exponential backoff"""
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self.requests += 1
+            if attempt:
+                self.retries += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"PubChem request failed ({e}), retrying...")
+                time.sleep(self.backoff_factor * (2 ** attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+
+            retry_after = response.headers.get('Retry-After')
+            delay = self.backoff_factor * (2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+
+    def get_json(self, path: str) -> Optional[Dict]:
+        """GET a PUG-REST path and return the decoded JSON, or None if not found"""
+        response = self.request('GET', path)
+        if response.status_code == 404:
+            return None
+        # Anything else that failed must not be mistaken for "not found" and negatively cached
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_properties(self, term: str) -> Optional[Dict]:
+        """Fetch the property record for a single compound name"""
+        data = self.get_json(f"compound/name/{quote(term, safe='')}/property/{PROPERTY_FIELDS}/JSON")
+        if data and 'PropertyTable' in data and 'Properties' in data['PropertyTable']:
+            return data['PropertyTable']['Properties'][0]
+        return None
+
+    def resolve_cid(self, term: str) -> Optional[int]:
+        """Resolve a compound name to its first PubChem CID"""
+        data = self.get_json(f"compound/name/{quote(term, safe='')}/cids/JSON")
+        cids = (data or {}).get('IdentifierList', {}).get('CID', [])
+        return cids[0] if cids and cids[0] else None
+
+    def fetch_properties_bulk(self, cids: List[int], chunk_size: int = BULK_CHUNK_SIZE,
+                              failed: Optional[Dict[int, str]] = None) -> Dict[int, Dict]:
+        """Fetch property records for many CIDs, one POST per chunk
+
+        A chunk that fails (network error or HTTP error other than 404) is skipped;
+        its CIDs and the error are added to failed when given.
+        """
+        properties = {}
+        unique_cids = list(dict.fromkeys(cids))
+        for start in range(0, len(unique_cids), chunk_size):
+            chunk = unique_cids[start:start + chunk_size]
+            try:
+                response = self.request('POST', f"compound/cid/property/{PROPERTY_FIELDS}/JSON",
+                                        data={'cid': ','.join(str(cid) for cid in chunk)})
+                if response.status_code == 404:
+                    continue
+                response.raise_for_status()
+                records = response.json().get('PropertyTable', {}).get('Properties', [])
+            except (requests.RequestException, ValueError) as e:
+                print(f"PubChem bulk property fetch failed for {len(chunk)} CIDs: {e}")
+                if failed is not None:
+                    failed.update((cid, str(e)) for cid in chunk)
+                continue
+            for props in records:
+                properties[props.get('CID')] = props
+        return properties
+
+    def format_result(self, props: Dict, term: str) -> Dict:
+        """Map a PubChem property record onto the generator's result fields"""
+        return {
+            'smiles': props.get('CanonicalSMILES'),
+            'iupac_name': props.get('IUPACName'),
+            'molecular_formula': props.get('MolecularFormula'),
+            'molecular_weight': props.get('MolecularWeight'),
+            'source': f'PubChem ({term})'
+        }
+
+    def from_cache(self, search_terms: List[str]) -> Tuple[Optional[Dict], Optional[List[str]]]:
+        """Answer from the cache if possible; otherwise return the terms still to query"""
+        if self.cache is None:
+            return None, (None if self.offline else list(search_terms))
+
+        for i, term in enumerate(search_terms):
+            found, cached = self.cache.get(term, allow_stale=self.offline)
+            if found and cached:
+                return cached, None
+            if not found and not self.offline:
+                return None, list(search_terms[i:])
+        return None, None
+
+    def lookup(self, search_terms: List[str]) -> Optional[Dict]:
+        """Try each search term in turn and return the first PubChem hit"""
+        result, remaining = self.from_cache(search_terms)
+        if remaining is None:
+            return result
+
+        for term in remaining:
+            try:
+                props = self.fetch_properties(term)
+            except Exception as e:
+                print(f"PubChem search failed for {term}: {e}")
+                continue
+
+            result = self.format_result(props, term) if props else None
+            if self.cache is not None:
+                self.cache.put(term, result)
+            if result:
+                return result
+
+        return None
+
+    def lookup_many(self, queries: Dict[str, List[str]], max_workers: int = 8) -> Dict[str, Optional[Dict]]:
+        """Look up many compounds concurrently, keyed by compound name"""
+        names = list(queries)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda name: self.lookup(queries[name]), names)
+            return dict(zip(names, results))
+
+    def resolve_first_cid(self, search_terms: List[str]) -> Optional[Tuple[int, str]]:
+        """Return (cid, term) for the first search term PubChem recognises"""
+        for term in search_terms:
+            try:
+                cid = self.resolve_cid(term)
+            except Exception as e:
+                print(f"PubChem CID lookup failed for {term}: {e}")
+                continue
+            if cid:
+                return cid, term
+            if self.cache is not None:
+                self.cache.put(term, None)
+        return None
+
+    def lookup_bulk(self, queries: Dict[str, List[str]], max_workers: int = 8,
+                    chunk_size: int = BULK_CHUNK_SIZE,
+                    errors: Optional[List[Dict]] = None) -> Dict[str, Optional[Dict]]:
+        """Resolve names to CIDs, then fetch all properties through the batch endpoint
+
+        Compounds in a chunk the batch endpoint failed on are looked up by name
+        instead, and the failure is added to errors when given.
+        """
+        results = {}
+        pending = {}
+        for name, terms in queries.items():
+            result, remaining = self.from_cache(terms)
+            if remaining is None:
+                results[name] = result
+            else:
+                pending[name] = remaining
+
+        names = list(pending)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resolved = dict(zip(names, executor.map(lambda name: self.resolve_first_cid(pending[name]), names)))
+
+        failed = {}
+        properties = self.fetch_properties_bulk([hit[0] for hit in resolved.values() if hit], chunk_size, failed)
+
+        fallback = {}
+        for name in names:
+            hit = resolved[name]
+            if hit and hit[0] in failed:
+                fallback[name] = pending[name]
+                if errors is not None:
+                    errors.append({'compound_name': name, 'stage': 'fetch',
+                                   'error': f"Bulk property fetch failed ({failed[hit[0]]}), looked up by name"})
+                continue
+            props = properties.get(hit[0]) if hit else None
+            results[name] = self.format_result(props, hit[1]) if props else None
+            if props and self.cache is not None:
+                self.cache.put(hit[1], results[name])
+        if fallback:
+            results.update(self.lookup_many(fallback, max_workers=max_workers))
+        return {name: results[name] for name in queries}
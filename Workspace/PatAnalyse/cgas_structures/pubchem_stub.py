@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Local PubChem PUG-REST stub server
+Serves the name -> property, name -> CID and batch CID property endpoints used by
+PubChemClient from an in-memory table, for benchmarks and offline testing
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import parse_qs, unquote
+
+
+class PubChemStubServer:
+    """Threaded HTTP server answering PubChem lookups for a fixed set of compounds"""
+
+    def __init__(self, compounds: Dict[str, Dict], host: str = "127.0.0.1", port: int = 0):
+        # compounds maps a search term to its property record (CanonicalSMILES, IUPACName, ...)
+        self.by_name = {}
+        self.by_cid = {}
+        for cid, (name, props) in enumerate(compounds.items(), 1):
+            record = dict(props, CID=cid)
+            self.by_name[name.lower()] = record
+            self.by_cid[cid] = record
+        self.request_count = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status: int, payload: Dict):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def not_found(self):
+                self.send_json(404, {'Fault': {'Code': 'PUGREST.NotFound', 'Message': 'No CID found'}})
+
+            def do_GET(self):
+                stub.request_count += 1
+                parts = self.path.split('/')
+                if 'name' not in parts or parts.index('name') + 1 >= len(parts):
+                    return self.not_found()
+                record = stub.by_name.get(unquote(parts[parts.index('name') + 1]).lower())
+                if record is None:
+                    return self.not_found()
+                if 'cids' in parts:
+                    return self.send_json(200, {'IdentifierList': {'CID': [record['CID']]}})
+                return self.send_json(200, {'PropertyTable': {'Properties': [record]}})
+
+            def do_POST(self):
+                stub.request_count += 1
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                cids = [int(cid) for cid in form.get('cid', [''])[0].split(',') if cid]
+                records = [stub.by_cid[cid] for cid in cids if cid in stub.by_cid]
+                if not records:
+                    return self.not_found()
+                self.send_json(200, {'PropertyTable': {'Properties': records}})
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/rest/pug"
+
+    def start(self) -> 'PubChemStubServer':
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
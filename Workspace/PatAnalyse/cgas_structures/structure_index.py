@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Fingerprint search index over generated cGAS structures
+Morgan and pattern fingerprints are packed into fixed-width byte rows and
+appended to flat files, then memory-mapped with NumPy for vectorized Tanimoto
+top-k and substructure-prefilter queries without loading the index into RAM
+"""
+
+import argparse
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+from rdkit import Chem, DataStructs
+from rdkit.Chem import rdFingerprintGenerator
+
+INDEX_DIRNAME = "structure_index"
+DEFAULT_BITS = 2048
+DEFAULT_RADIUS = 2
+
+# Rows scored per step, bounding temporary memory for 10^6-row indexes
+QUERY_CHUNK_ROWS = 1 << 16
+
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Set bits per row of a packed uint8 matrix"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int32)
+    return POPCOUNT_TABLE[bits].sum(axis=1, dtype=np.int32)
+
+
+def pack_fingerprint(fp) -> np.ndarray:
+    """ExplicitBitVect -> packed bytes (bit i lives in byte i // 8)"""
+    return np.frombuffer(bytes.fromhex(DataStructs.BitVectToFPSText(fp)), dtype=np.uint8)
+
+
+class StructureIndexWriter:
+    """Appends compounds to an on-disk index one at a time"""
+
+    def __init__(self, index_dir: str, n_bits: int = DEFAULT_BITS, radius: int = DEFAULT_RADIUS):
+        os.makedirs(index_dir, exist_ok=True)
+        self.index_dir = index_dir
+        self.n_bits = n_bits
+        self.radius = radius
+        self.count = 0
+        self.morgan_generator = rdFingerprintGenerator.GetMorganGenerator(radius=radius, fpSize=n_bits)
+
+        self.files = {name: open(os.path.join(index_dir, name), 'wb')
+                      for name in ('morgan.bin', 'pattern.bin', 'counts.bin', 'strings.txt', 'offsets.bin')}
+        self.offset = 0
+
+    def add(self, compound_name: str, smiles: str) -> bool:
+        mol = Chem.MolFromSmiles(smiles) if smiles else None
+        if mol is None:
+            return False
+
+        morgan = pack_fingerprint(self.morgan_generator.GetFingerprint(mol))
+        pattern = pack_fingerprint(Chem.PatternFingerprint(mol, fpSize=self.n_bits))
+        self.files['morgan.bin'].write(morgan.tobytes())
+        self.files['pattern.bin'].write(pattern.tobytes())
+        self.files['counts.bin'].write(np.int32(popcount_rows(morgan[None, :])[0]).tobytes())
+
+        # Names and SMILES share one text file; offsets let readers fetch single rows
+        name = compound_name.replace('\t', ' ').replace('\n', ' ')
+        line = f"{name}\t{smiles}\n".encode('utf-8')
+        self.files['strings.txt'].write(line)
+        self.files['offsets.bin'].write(np.uint64(self.offset).tobytes())
+        self.offset += len(line)
+        self.count += 1
+        return True
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        with open(os.path.join(self.index_dir, "index_meta.json"), 'w') as f:
+            json.dump({'count': self.count, 'n_bits': self.n_bits, 'radius': self.radius}, f, indent=2)
+        print(f"Structure index saved: {self.count} compounds in {self.index_dir}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StructureIndex:
+    """Memory-mapped reader answering similarity and substructure queries"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "index_meta.json")) as f:
+            meta = json.load(f)
+        self.count = meta['count']
+        self.n_bits = meta['n_bits']
+        self.morgan_generator = rdFingerprintGenerator.GetMorganGenerator(radius=meta['radius'], fpSize=self.n_bits)
+
+        n_bytes = self.n_bits // 8
+        self.morgan = self._map('morgan.bin', np.uint8, (self.count, n_bytes))
+        self.pattern = self._map('pattern.bin', np.uint8, (self.count, n_bytes))
+        self.counts = self._map('counts.bin', np.int32, (self.count,))
+        self.offsets = self._map('offsets.bin', np.uint64, (self.count,))
+        self.strings_path = os.path.join(index_dir, "strings.txt")
+
+    def _map(self, filename: str, dtype, shape) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.index_dir, filename), dtype=dtype, mode='r', shape=shape)
+
+    def entries(self, rows) -> List[Tuple[str, str]]:
+        """(compound_name, smiles) for the given index rows"""
+        found = []
+        with open(self.strings_path, 'rb') as f:
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                name, smiles = f.readline().decode('utf-8').rstrip('\n').split('\t', 1)
+                found.append((name, smiles))
+        return found
+
+    def similar(self, smiles: str, k: int = 10) -> List[Tuple[str, str, float]]:
+        """Top-k compounds by Morgan Tanimoto similarity to a query SMILES"""
+        mol = Chem.MolFromSmiles(smiles)
+        if mol is None:
+            raise ValueError(f"Invalid query SMILES: {smiles}")
+        query = pack_fingerprint(self.morgan_generator.GetFingerprint(mol))
+        query_count = int(popcount_rows(query[None, :])[0])
+
+        scores = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, QUERY_CHUNK_ROWS):
+            stop = min(start + QUERY_CHUNK_ROWS, self.count)
+            common = popcount_rows(np.bitwise_and(self.morgan[start:stop], query))
+            union = self.counts[start:stop] + query_count - common
+            scores[start:stop] = np.divide(common, union, out=np.zeros(stop - start, dtype=np.float32),
+                                           where=union > 0)
+
+        k = min(k, self.count)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(name, smiles, float(scores[row])) for row, (name, smiles) in zip(top, self.entries(top))]
+
+    def substructure_candidates(self, query_mol) -> np.ndarray:
+        """Rows whose pattern fingerprint contains every bit of the query's"""
+        query = pack_fingerprint(Chem.PatternFingerprint(query_mol, fpSize=self.n_bits))
+        hits = []
+        for start in range(0, self.count, QUERY_CHUNK_ROWS):
+            block = self.pattern[start:start + QUERY_CHUNK_ROWS]
+            mask = (np.bitwise_and(block, query) == query).all(axis=1)
+            hits.append(np.nonzero(mask)[0] + start)
+        return np.concatenate(hits) if hits else np.array([], dtype=np.int64)
+
+    def substructure(self, query: str, max_results: Optional[int] = None,
+                     verify: bool = True) -> List[Tuple[str, str]]:
+        """Compounds containing a SMARTS/SMILES query; verify=False returns the prefilter only"""
+        query_mol = Chem.MolFromSmarts(query) or Chem.MolFromSmiles(query)
+        if query_mol is None:
+            raise ValueError(f"Invalid substructure query: {query}")
+
+        matches = []
+        for name, smiles in self.entries(self.substructure_candidates(query_mol)):
+            if verify:
+                mol = Chem.MolFromSmiles(smiles)
+                if mol is None or not mol.HasSubstructMatch(query_mol):
+                    continue
+            matches.append((name, smiles))
+            if max_results and len(matches) >= max_results:
+                break
+        return matches
+
+
+def main():
+    """Query an index built by generate_cgas_structures.py --index"""
+    parser = argparse.ArgumentParser(description="Search the cGAS structure fingerprint index")
+    parser.add_argument("index_dir")
+    parser.add_argument("--similar", help="Query SMILES for Tanimoto top-k search")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--substructure", help="SMARTS or SMILES substructure query")
+    args = parser.parse_args()
+
+    index = StructureIndex(args.index_dir)
+    if args.similar:
+        for name, smiles, score in index.similar(args.similar, args.k):
+            print(f"{score:.3f}  {name}  {smiles}")
+    if args.substructure:
+        for name, smiles in index.substructure(args.substructure):
+            print(f"{name}  {smiles}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Content-addressed manifest for incremental structure regeneration
+Maps each compound to a hash of its inputs (canonical SMILES, metadata and
+rendering options) and the result produced from them, so unchanged compounds
+can reuse their existing image and data files
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+MANIFEST_FILENAME = "cgas_structures_manifest.json"
+
+
+def compound_hash(result: Dict, canonical_smiles: str, render_options: Dict) -> str:
+    """Hash everything that determines a compound's image and data file"""
+    payload = json.dumps({
+        'record': result,
+        'smiles': canonical_smiles,
+        'render_options': render_options
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StructureManifest:
+    """Input hashes and results from the previous run, stored next to the master JSON"""
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.load(f).get('compounds', {})
+
+    def lookup(self, compound_name: str, input_hash: str) -> Optional[Dict]:
+        """Return the stored result if the inputs are unchanged and its image still exists
+
+        A compound that took its structure from another one (same_structure_as) is only
+        unchanged while that compound's recorded inputs are too.
+        """
+        entry = self.entries.get(compound_name)
+        if not entry or entry.get('hash') != input_hash:
+            return None
+        result = entry['result']
+        if result.get('image_path') and not os.path.exists(result['image_path']):
+            return None
+        primary = result.get('same_structure_as')
+        if primary and self.entries.get(primary, {}).get('hash') != entry.get('primary_hash'):
+            return None
+        return dict(result)
+
+    def record(self, compound_name: str, input_hash: str, result: Dict):
+        entry = {'hash': input_hash, 'result': result}
+        if result.get('same_structure_as'):
+            entry['primary_hash'] = self.entries.get(result['same_structure_as'], {}).get('hash')
+        self.entries[compound_name] = entry
+
+    def prune(self, compound_names):
+        """Forget compounds that are no longer in the target set"""
+        keep = set(compound_names)
+        self.entries = {name: entry for name, entry in self.entries.items() if name in keep}
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({'compounds': self.entries}, f, indent=2)
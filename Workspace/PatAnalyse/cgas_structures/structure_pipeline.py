@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Compute stage for the cGAS structure generator
+RDKit parsing, sanitization, descriptors and rendering as module-level functions,
+so the stage can run in a process pool with compounds passed as SMILES strings
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+from rdkit import Chem
+from rdkit.Chem import Descriptors
+
+from structure_render import DEFAULT_RENDER_OPTIONS, finish_image, image_filename, make_drawer
+
+# instrumentation.py is shared with the chart scripts in the workspace directory above
+WORKSPACE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if WORKSPACE_DIR not in sys.path:
+    sys.path.append(WORKSPACE_DIR)
+
+import instrumentation
+from instrumentation import progress, span
+
+# Rendering settings; part of each compound's content hash for incremental runs
+RENDER_OPTIONS = DEFAULT_RENDER_OPTIONS
+
+
+def generate_iupac_name(mol) -> str:
+    """Generate IUPAC name using RDKit (basic implementation)"""
+    try:
+        # RDKit doesn't have built-in IUPAC name generation
+        # Return molecular formula as fallback
+        return Chem.rdMolDescriptors.CalcMolFormula(mol)
+    except:
+        return "Unknown"
+
+
+def render_structure_image(mol, compound_name: str, output_dir: str, options: Optional[Dict] = None) -> str:
+    """Create high-quality structure image"""
+    options = options or RENDER_OPTIONS
+    try:
+        image_path = os.path.join(output_dir, "images", image_filename(compound_name, options))
+        # Same steps as render_image_bytes, timed separately (draw, then PNG/JPEG/SVG encode)
+        with span('render.draw'):
+            drawer = make_drawer(options)
+            drawer.DrawMolecule(mol)
+        with span('render.encode', format=options['format']):
+            data = finish_image(drawer, options)
+        with span('render.write'):
+            with open(image_path, 'wb') as f:
+                f.write(data)
+
+        progress(f"Structure image saved: {image_path}")
+        return image_path
+
+    except Exception as e:
+        print(f"Error creating image for {compound_name}: {e}")
+        return ""
+
+
+def canonicalize_smiles(smiles: str) -> str:
+    """Canonical form of a SMILES string, or the input unchanged if RDKit cannot parse it"""
+    mol = Chem.MolFromSmiles(smiles)
+    return Chem.MolToSmiles(mol) if mol is not None else smiles
+
+
+def compute_structure(result: Dict, smiles: str, output_dir: str,
+                      render_options: Optional[Dict] = None) -> Tuple[Dict, Optional[str]]:
+    """Validate, canonicalize, describe and render one compound; returns (result, error)"""
+    compound_name = result['compound_name']
+    try:
+        with span('rdkit.sanitize'):
+            mol = Chem.MolFromSmiles(smiles)
+            if mol is None:
+                print(f"Invalid SMILES for {compound_name}: {smiles}")
+                return result, f"Invalid SMILES: {smiles}"
+
+            # Sanitize molecule
+            Chem.SanitizeMol(mol)
+
+            # Get canonical SMILES
+            canonical_smiles = Chem.MolToSmiles(mol)
+            result['smiles'] = canonical_smiles
+
+        # Generate additional properties if not from PubChem
+        with span('rdkit.properties'):
+            if not result['molecular_formula']:
+                result['molecular_formula'] = Chem.rdMolDescriptors.CalcMolFormula(mol)
+            if not result['molecular_weight']:
+                result['molecular_weight'] = f"{Descriptors.MolWt(mol):.2f}"
+            if not result['iupac_name']:
+                result['iupac_name'] = generate_iupac_name(mol)
+
+        # Create structure image
+        result['image_path'] = render_structure_image(mol, compound_name, output_dir, render_options)
+
+        progress(f"Successfully processed {compound_name}")
+        progress(f"  SMILES: {canonical_smiles}")
+        progress(f"  Formula: {result['molecular_formula']}")
+        progress(f"  MW: {result['molecular_weight']}")
+
+    except Exception as e:
+        print(f"Error processing {compound_name}: {e}")
+        return result, str(e)
+
+    return result, None
+
+
+def _compute_job(job: Tuple[Dict, str], output_dir: str, render_options: Optional[Dict],
+                 instrumentation_state: Optional[Dict] = None) -> Tuple[Dict, Optional[str], Optional[Dict]]:
+    result, smiles = job
+    with instrumentation.worker_scope(instrumentation_state) as recorder:
+        result, error = compute_structure(result, smiles, output_dir, render_options)
+        return result, error, recorder.snapshot() if recorder is not None else None
+
+
+def run_compute_stage(jobs: List[Tuple[Dict, str]], output_dir: str, workers: int = 1,
+                      executor: Optional[ProcessPoolExecutor] = None,
+                      render_options: Optional[Dict] = None) -> Tuple[List[Dict], List[Dict]]:
+    """Run compute_structure over (result, smiles) jobs, preserving input order
+
+    Pass a long-lived executor to reuse worker processes across batches.
+    Returns the results plus one error record per compound that failed.
+    """
+    if (executor is not None or workers > 1) and len(jobs) > 1:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        # Workers record their own spans and send them back with each result
+        args = (jobs, repeat(output_dir), repeat(render_options), repeat(instrumentation.worker_state()))
+        if executor is not None:
+            outcomes = list(executor.map(_compute_job, *args, chunksize=chunksize))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(_compute_job, *args, chunksize=chunksize))
+    else:
+        outcomes = [(*compute_structure(result, smiles, output_dir, render_options), None)
+                    for result, smiles in jobs]
+
+    results = []
+    errors = []
+    recorder = instrumentation.active()
+    for result, error, snapshot in outcomes:
+        results.append(result)
+        if recorder is not None:
+            recorder.merge(snapshot)
+        if error:
+            errors.append({'compound_name': result['compound_name'], 'stage': 'compute', 'error': error})
+    return results, errors
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Structure image rendering backends
+PNG and SVG are written straight from rdMolDraw2D; the JPEG backend keeps the
+original Cairo -> PIL -> JPEG path for existing consumers of the .jpg files.
+Grid rendering packs many molecules into one sprite sheet per drawer call.
+"""
+
+import io
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from rdkit import Chem
+from rdkit.Chem.Draw import rdMolDraw2D
+
+IMAGE_EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'svg': 'svg'}
+
+DEFAULT_RENDER_OPTIONS = {'width': 800, 'height': 600, 'font_size': 0.8, 'format': 'jpeg', 'quality': 95}
+
+
+def make_drawer(options: Dict, columns: int = 1, rows: int = 1):
+    """Cairo or SVG drawer sized for a single molecule or a grid of tiles"""
+    width, height = options['width'], options['height']
+    drawer_class = rdMolDraw2D.MolDraw2DSVG if options['format'] == 'svg' else rdMolDraw2D.MolDraw2DCairo
+    if columns == 1 and rows == 1:
+        drawer = drawer_class(width, height)
+    else:
+        drawer = drawer_class(width * columns, height * rows, width, height)
+    drawer.SetFontSize(options['font_size'])
+    return drawer
+
+
+def encode_jpeg(png_data: bytes, quality: int) -> bytes:
+    """Re-encode Cairo PNG output as JPEG (the legacy two-codec path)"""
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(png_data))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def finish_image(drawer, options: Dict) -> bytes:
+    drawer.FinishDrawing()
+    data = drawer.GetDrawingText()
+    if options['format'] == 'svg':
+        return data.encode('utf-8')
+    if options['format'] == 'jpeg':
+        return encode_jpeg(data, options['quality'])
+    return data
+
+
+def render_image_bytes(mol, options: Dict) -> bytes:
+    """Render one molecule in the configured format"""
+    drawer = make_drawer(options)
+    drawer.DrawMolecule(mol)
+    return finish_image(drawer, options)
+
+
+def image_filename(compound_name: str, options: Dict) -> str:
+    return f"{compound_name.replace('/', '_')}.{IMAGE_EXTENSIONS[options['format']]}"
+
+
+def render_grid(mols: Sequence, legends: Sequence[str], options: Dict, columns: int) -> bytes:
+    """Render many molecules as tiles of one image with a single drawer call"""
+    rows = max(1, math.ceil(len(mols) / columns))
+    drawer = make_drawer(options, columns=columns, rows=rows)
+    drawer.DrawMolecules(list(mols), legends=list(legends))
+    return finish_image(drawer, options)
+
+
+def write_sprite_sheets(entries: List[Tuple[str, str]], output_dir: str, options: Dict,
+                        columns: int = 10, per_sheet: int = 100) -> str:
+    """Render (name, smiles) pairs into sprite sheets plus a JSON index of tile positions"""
+    sprite_dir = os.path.join(output_dir, "images", "sprites")
+    os.makedirs(sprite_dir, exist_ok=True)
+    extension = IMAGE_EXTENSIONS[options['format']]
+
+    index = {'tile_width': options['width'], 'tile_height': options['height'], 'sheets': [], 'tiles': {}}
+    parsed = ((name, Chem.MolFromSmiles(smiles)) for name, smiles in entries)
+    valid = [(name, mol) for name, mol in parsed if mol is not None]
+
+    for start in range(0, len(valid), per_sheet):
+        chunk = valid[start:start + per_sheet]
+        names = [name for name, _ in chunk]
+        mols = [mol for _, mol in chunk]
+        sheet_name = f"sheet_{start // per_sheet:04d}.{extension}"
+        with open(os.path.join(sprite_dir, sheet_name), 'wb') as f:
+            f.write(render_grid(mols, names, options, columns))
+
+        index['sheets'].append(sheet_name)
+        for position, name in enumerate(names):
+            index['tiles'][name] = {
+                'sheet': sheet_name,
+                'x': (position % columns) * options['width'],
+                'y': (position // columns) * options['height']
+            }
+
+    index_path = os.path.join(sprite_dir, "sprites_index.json")
+    with open(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    print(f"Sprite sheets saved: {len(index['sheets'])} sheets in {sprite_dir}")
+    return index_path
+
+
+def _backend_stats(molecules: int, elapsed: float, total_bytes: int) -> Dict:
+    return {
+        'molecules': molecules,
+        'seconds': round(elapsed, 4),
+        'molecules_per_second': round(molecules / elapsed, 1) if elapsed else None,
+        'total_bytes': total_bytes,
+        'bytes_per_molecule': total_bytes // molecules
+    }
+
+
+def benchmark_backends(smiles_list: List[str], base_options: Optional[Dict] = None,
+                       formats: Sequence[str] = ('jpeg', 'png', 'svg'),
+                       grid_columns: int = 10) -> Dict[str, Dict]:
+    """Time each backend over the same molecules and report throughput and bytes"""
+    base_options = dict(base_options or DEFAULT_RENDER_OPTIONS)
+    mols = [mol for mol in (Chem.MolFromSmiles(s) for s in smiles_list) if mol is not None]
+    report = {}
+    if not mols:
+        return report
+
+    for fmt in formats:
+        options = dict(base_options, format=fmt)
+        start = time.perf_counter()
+        total_bytes = sum(len(render_image_bytes(mol, options)) for mol in mols)
+        report[fmt] = _backend_stats(len(mols), time.perf_counter() - start, total_bytes)
+
+    # Grid mode: one drawer call per sheet of grid_columns x grid_columns tiles
+    per_sheet = grid_columns * grid_columns
+    for fmt in formats:
+        if fmt == 'jpeg':
+            continue
+        options = dict(base_options, format=fmt)
+        start = time.perf_counter()
+        total_bytes = 0
+        for begin in range(0, len(mols), per_sheet):
+            chunk = mols[begin:begin + per_sheet]
+            total_bytes += len(render_grid(chunk, [''] * len(chunk), options, grid_columns))
+        report[f"{fmt}_grid"] = _backend_stats(len(mols), time.perf_counter() - start, total_bytes)
+
+    return report
+
+
+def print_backend_report(report: Dict[str, Dict]):
+    print(f"\n{'Backend':<12}{'Mol/s':>10}{'Bytes/mol':>12}{'Total bytes':>14}")
+    for backend, stats in report.items():
+        print(f"{backend:<12}{stats['molecules_per_second'] or 0:>10}{stats['bytes_per_molecule']:>12}"
+              f"{stats['total_bytes']:>14}")
@@ -9,22 +9,39 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import json
 import numpy as np
+import argparse
+import os
+from functools import partial
+from typing import List, Optional, Sequence
 
-def create_patent_filing_trends():
+import instrumentation
+from figure_cache import CACHE_DIRNAME, CACHE_MAX_MB, FigureCache
+from figure_export import EXPORT_FORMATS, export_figures, parse_formats
+from landscape_dashboard import (PLOTLYJS_MODES, compare_layouts, print_layout_report, write_dashboard,
+                                 write_iframe_dashboard)
+from crossref_index import INDEX_FILENAME, CrossReferenceIndex, load_crossref
+from landscape_data import DATA_DIR, LandscapeData, load_landscape
+from instrumentation import TRACE_FORMATS, progress, span
+from landscape_scaling import (BIN_POINT_THRESHOLD, MAX_CATEGORIES, WEBGL_POINT_THRESHOLD, category_codes,
+                               fold_categories, grid_counts, point_trace, top_rows)
+
+# Editorial annotations placed on the filing trend line: (year, text, arrow color)
+FILING_ANNOTATIONS = [
+    (2017, "Peak Activity<br>Key Players Active", "red"),
+    (2022, "Clinical Candidates<br>Emerge", "green")
+]
+
+def create_patent_filing_trends(trends: Optional[pd.Series] = None):
     """Create patent filing trends visualization"""
-    years = list(range(2015, 2025))
-    # Based on patent landscape data - activity levels converted to approximate numbers
-    activity_mapping = {
-        'Low': 5, 'Moderate': 15, 'Moderate-High': 25, 'High': 35
-    }
-    
-    patent_counts = [5, 15, 25, 35, 35, 35, 30, 25, 25, 20]  # Estimated based on activity descriptions
+    if trends is None:
+        trends = load_landscape().filings_per_year()
+    years = [int(year) for year in trends.index]
     
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
         x=years,
-        y=patent_counts,
+        y=trends.to_numpy(),
         mode='lines+markers',
         name='Patent Filings',
         line=dict(color='#1f77b4', width=3),
@@ -32,26 +49,21 @@ def create_patent_filing_trends():
     ))
     
     # Add annotations for key events
-    fig.add_annotation(
-        x=2017, y=25,
-        text="Peak Activity<br>Key Players Active",
-        showarrow=True,
-        arrowhead=2,
-        arrowcolor="red",
-        font=dict(size=10)
-    )
-    
-    fig.add_annotation(
-        x=2022, y=25,
-        text="Clinical Candidates<br>Emerge",
-        showarrow=True,
-        arrowhead=2,
-        arrowcolor="green",
-        font=dict(size=10)
-    )
+    for year, text, color in FILING_ANNOTATIONS:
+        if year not in trends.index:
+            continue
+        fig.add_annotation(
+            x=year, y=float(trends.loc[year]),
+            text=text,
+            showarrow=True,
+            arrowhead=2,
+            arrowcolor=color,
+            font=dict(size=10)
+        )
     
+    year_range = f" ({years[0]}-{years[-1]})" if years else ""
     fig.update_layout(
-        title='cGAS Inhibitor Patent Filing Trends (2015-2024)',
+        title=f'cGAS Inhibitor Patent Filing Trends{year_range}',
         xaxis_title='Year',
         yaxis_title='Estimated Patent Filings',
         template='plotly_white',
@@ -61,17 +73,18 @@ def create_patent_filing_trends():
     
     return fig
 
-def create_geographic_distribution():
+def create_geographic_distribution(shares: Optional[pd.Series] = None):
     """Create geographic distribution of patents"""
-    jurisdictions = ['WO/PCT', 'US', 'EP', 'CN', 'JP']
-    percentages = [75, 75, 70, 50, 50]
+    if shares is None:
+        shares = load_landscape().filings_per_jurisdiction()
+    colors = px.colors.qualitative.D3
     
     fig = go.Figure(data=[
         go.Bar(
-            x=jurisdictions,
-            y=percentages,
-            marker_color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd'],
-            text=[f'{p}%' for p in percentages],
+            x=shares.index.tolist(),
+            y=shares.to_numpy(),
+            marker_color=[colors[i % len(colors)] for i in range(len(shares))],
+            text=[f'{p:g}%' for p in shares],
             textposition='auto'
         )
     ])
@@ -87,12 +100,13 @@ def create_geographic_distribution():
     
     return fig
 
-def create_company_landscape():
+def create_company_landscape(companies: Optional[pd.DataFrame] = None, max_companies: int = MAX_CATEGORIES):
     """Create competitive landscape visualization"""
-    companies = ['Ventus Therapeutics', 'ImmuneSensor', 'Novartis', 'Merck & Co', 'Roche', 'Pfizer', 'Boehringer Ingelheim']
-    clinical_stage = [2, 1, 0, 0, 0, 0, 0]  # Phase numbers
-    patent_count = [5, 3, 8, 10, 6, 4, 3]  # Estimated patent families
-    funding = [300, 50, 835, 0, 0, 0, 0]  # Million USD
+    if companies is None:
+        companies = load_landscape().company_summary()
+    companies = top_rows(companies, max_companies, ['patent_families', 'clinical_phase', 'funding_musd'])
+    names = companies.index.tolist()
+    type_counts = companies['company_type'].value_counts()
     
     fig = make_subplots(
         rows=2, cols=2,
@@ -104,30 +118,28 @@ def create_company_landscape():
     
     # Clinical stage
     fig.add_trace(
-        go.Bar(x=companies, y=clinical_stage, name='Clinical Stage',
+        go.Bar(x=names, y=companies['clinical_phase'].to_numpy(), name='Clinical Stage',
                marker_color='#2ca02c'),
         row=1, col=1
     )
     
     # Patent count
     fig.add_trace(
-        go.Bar(x=companies, y=patent_count, name='Patent Families',
+        go.Bar(x=names, y=companies['patent_families'].to_numpy(), name='Patent Families',
                marker_color='#1f77b4'),
         row=1, col=2
     )
     
     # Funding
     fig.add_trace(
-        go.Bar(x=companies, y=funding, name='Funding/Investment',
+        go.Bar(x=names, y=companies['funding_musd'].to_numpy(), name='Funding/Investment',
                marker_color='#ff7f0e'),
         row=2, col=1
     )
     
     # Company types
-    company_types = ['Biotech', 'Large Pharma']
-    type_counts = [2, 5]
     fig.add_trace(
-        go.Pie(labels=company_types, values=type_counts, name='Company Types'),
+        go.Pie(labels=type_counts.index.tolist(), values=type_counts.to_numpy(), name='Company Types'),
         row=2, col=2
     )
     
@@ -140,12 +152,13 @@ def create_company_landscape():
     
     return fig
 
-def create_chemical_scaffold_analysis():
+def create_chemical_scaffold_analysis(scaffolds: Optional[pd.DataFrame] = None,
+                                      max_scaffolds: int = MAX_CATEGORIES):
     """Create chemical scaffold distribution"""
-    scaffolds = ['Azepino[4,5-b]indolones', 'Quinolines', 'Indole derivatives', 
-                'Pyrido[4,3-b]indoles', 'Benzofurans', 'Thiazoles', 'Others']
-    companies = [1, 1, 2, 2, 2, 1, 3]  # Number of companies working on each
-    clinical_candidates = [1, 1, 0, 0, 0, 0, 2]  # Clinical candidates per scaffold
+    if scaffolds is None:
+        scaffolds = load_landscape().scaffold_summary()
+    scaffolds = top_rows(scaffolds, max_scaffolds, ['companies', 'clinical_candidates'])
+    names = scaffolds.index.tolist()
     
     fig = make_subplots(
         rows=1, cols=2,
@@ -154,13 +167,13 @@ def create_chemical_scaffold_analysis():
     )
     
     fig.add_trace(
-        go.Bar(x=scaffolds, y=companies, name='Companies',
+        go.Bar(x=names, y=scaffolds['companies'].to_numpy(), name='Companies',
                marker_color='#1f77b4'),
         row=1, col=1
     )
     
     fig.add_trace(
-        go.Bar(x=scaffolds, y=clinical_candidates, name='Clinical Candidates',
+        go.Bar(x=names, y=scaffolds['clinical_candidates'].to_numpy(), name='Clinical Candidates',
                marker_color='#2ca02c'),
         row=1, col=2
     )
@@ -177,27 +190,33 @@ def create_chemical_scaffold_analysis():
     
     return fig
 
-def create_clinical_pipeline():
+def create_clinical_pipeline(pipeline: Optional[pd.DataFrame] = None):
     """Create clinical pipeline visualization"""
-    compounds = ['IMSB-301', 'VENT-03', 'G150', 'PF-06928215']
-    phases = [1, 2, 0, 0]  # Phase numbers (0 = preclinical/research)
-    companies = ['ImmuneSensor', 'Ventus', 'Roche', 'Pfizer']
-    indications = ['AGS/SLE', 'SLE/RA', 'Research', 'Early Research']
+    if pipeline is None:
+        pipeline = load_landscape().clinical_pipeline()
+    compounds = pipeline.index.tolist()
     
     # Create timeline visualization
     fig = go.Figure()
     
     colors = ['#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
     
-    for i, (compound, phase, company, indication) in enumerate(zip(compounds, phases, companies, indications)):
+    for i, (compound, row) in enumerate(pipeline.iterrows()):
+        label = f'{compound}<br>({row["company"]})' if row['company'] else compound
+        hover = compound
+        if 'patent_families' in pipeline:
+            # Added from the cross-reference index by figure_jobs
+            hover += f'<br>Patent families: {row["patent_families"] or "none indexed"}'
         fig.add_trace(go.Scatter(
-            x=[phase],
+            x=[row['phase']],
             y=[i],
             mode='markers+text',
-            marker=dict(size=20, color=colors[i]),
-            text=f'{compound}<br>({company})',
+            marker=dict(size=20, color=colors[i % len(colors)]),
+            text=label,
             textposition='middle right',
-            name=f'{compound} - {indication}',
+            hovertext=hover,
+            hoverinfo='text',
+            name=f'{compound} - {row["indication"]}',
             showlegend=True
         ))
     
@@ -222,11 +241,13 @@ def create_clinical_pipeline():
     
     return fig
 
-def create_indication_analysis():
+def create_indication_analysis(indications: Optional[pd.DataFrame] = None,
+                               max_indications: int = MAX_CATEGORIES):
     """Create target indication analysis"""
-    indications = ['SLE', 'AGS', 'RA', 'CLE', 'Dermatomyositis', 'Systemic Sclerosis', 'NASH', 'Neurodegeneration']
-    clinical_programs = [2, 1, 1, 1, 0, 0, 1, 0]  # Number of clinical programs
-    market_size = [7.5, 0.01, 25, 1.2, 0.8, 2.5, 35, 150]  # Billion USD (estimated)
+    if indications is None:
+        indications = load_landscape().indication_summary()
+    indications = top_rows(indications, max_indications, ['clinical_programs', 'market_size_busd'])
+    names = indications.index.tolist()
     
     fig = make_subplots(
         rows=1, cols=2,
@@ -235,13 +256,14 @@ def create_indication_analysis():
     )
     
     fig.add_trace(
-        go.Bar(x=indications, y=clinical_programs, name='Clinical Programs',
+        go.Bar(x=names, y=indications['clinical_programs'].to_numpy(), name='Clinical Programs',
                marker_color='#2ca02c'),
         row=1, col=1
     )
     
+    # Indications without a market estimate in the source data are left blank
     fig.add_trace(
-        go.Bar(x=indications, y=market_size, name='Market Size',
+        go.Bar(x=names, y=indications['market_size_busd'].to_numpy(), name='Market Size',
                marker_color='#ff7f0e'),
         row=1, col=2
     )
@@ -257,72 +279,183 @@ def create_indication_analysis():
     
     return fig
 
-def save_all_visualizations():
-    """Generate and save all visualizations"""
-    
-    # Create all figures
-    figs = {
-        'patent_filing_trends': create_patent_filing_trends(),
-        'geographic_distribution': create_geographic_distribution(),
-        'company_landscape': create_company_landscape(),
-        'chemical_scaffolds': create_chemical_scaffold_analysis(),
-        'clinical_pipeline': create_clinical_pipeline(),
-        'indication_analysis': create_indication_analysis()
-    }
-    
-    # Save as HTML files
-    for name, fig in figs.items():
-        fig.write_html(f'/home/ubuntu/{name}.html')
-        print(f"Saved {name}.html")
-    
-    # Create a combined dashboard
-    dashboard_html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>cGAS Inhibitor Patent Landscape Dashboard</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 20px; }
-            .chart-container { margin: 20px 0; }
-            h1, h2 { color: #333; }
-        </style>
-    </head>
-    <body>
-        <h1>cGAS Inhibitor Patent Landscape Dashboard</h1>
-        <div class="chart-container">
-            <h2>Patent Filing Trends</h2>
-            <iframe src="patent_filing_trends.html" width="100%" height="600"></iframe>
-        </div>
-        <div class="chart-container">
-            <h2>Geographic Distribution</h2>
-            <iframe src="geographic_distribution.html" width="100%" height="600"></iframe>
-        </div>
-        <div class="chart-container">
-            <h2>Competitive Landscape</h2>
-            <iframe src="company_landscape.html" width="100%" height="900"></iframe>
-        </div>
-        <div class="chart-container">
-            <h2>Chemical Scaffolds</h2>
-            <iframe src="chemical_scaffolds.html" width="100%" height="600"></iframe>
-        </div>
-        <div class="chart-container">
-            <h2>Clinical Pipeline</h2>
-            <iframe src="clinical_pipeline.html" width="100%" height="600"></iframe>
-        </div>
-        <div class="chart-container">
-            <h2>Target Indications</h2>
-            <iframe src="indication_analysis.html" width="100%" height="600"></iframe>
-        </div>
-    </body>
-    </html>
-    """
+def create_family_portfolio(families: Optional[pd.DataFrame] = None,
+                            webgl_threshold: int = WEBGL_POINT_THRESHOLD,
+                            bin_threshold: int = BIN_POINT_THRESHOLD,
+                            max_assignees: int = MAX_CATEGORIES):
+    """Create patent family portfolio map (assignee x priority year)"""
+    if families is None:
+        families = load_landscape().families
+    dated = families.dropna(subset=['priority_year'])
+    assignees = dated['assignee'].astype(str).replace('', 'Unknown').to_numpy()
+    
+    # Pre-aggregate family records into an assignee x year count grid
+    years = dated['priority_year'].to_numpy(dtype=np.int64)
+    first_year = int(years.min()) if len(years) else 0
+    year_labels = np.arange(first_year, int(years.max()) + 1 if len(years) else first_year)
+    labels, codes = fold_categories(*category_codes(assignees), max_assignees)
+    grid = grid_counts(years - first_year, codes, len(year_labels), len(labels))
     
-    with open('/home/ubuntu/cgas_dashboard.html', 'w') as f:
-        f.write(dashboard_html)
+    fig = go.Figure()
     
-    print("Created comprehensive dashboard: cgas_dashboard.html")
+    if len(dated) > bin_threshold:
+        # Binned raster: trace size depends on the grid, not the family count
+        fig.add_trace(go.Heatmap(
+            z=grid,
+            x=year_labels,
+            y=labels,
+            colorscale='Blues',
+            colorbar=dict(title='Families')
+        ))
+    else:
+        cell_y, cell_x = np.nonzero(grid)
+        counts = grid[cell_y, cell_x]
+        fig.add_trace(point_trace(
+            year_labels[cell_x], labels[cell_y], webgl_threshold,
+            mode='markers',
+            name='Patent Families',
+            text=[f'{c} families' for c in counts],
+            marker=dict(size=8 + 22 * np.sqrt(counts / counts.max()) if len(counts) else 8,
+                        color='#1f77b4', opacity=0.7)
+        ))
+    
+    fig.update_layout(
+        title='cGAS Inhibitor Patent Family Portfolio',
+        xaxis_title='Priority Year',
+        yaxis_title='Assignee',
+        template='plotly_white',
+        width=1000,
+        height=max(500, 20 * len(labels))
+    )
+    
+    return fig
+
+def with_patent_families(pipeline: pd.DataFrame, crossref: CrossReferenceIndex) -> pd.DataFrame:
+    """Clinical pipeline frame plus the patent families covering each compound"""
+    families = [', '.join(crossref.names('compound', compound, 'family')) for compound in pipeline.index]
+    return pipeline.assign(patent_families=families)
+
+def figure_jobs(data: Optional[LandscapeData] = None, webgl_threshold: int = WEBGL_POINT_THRESHOLD,
+                bin_threshold: int = BIN_POINT_THRESHOLD, max_categories: int = MAX_CATEGORIES,
+                crossref: Optional[CrossReferenceIndex] = None):
+    """(name, builder, frame) for every chart, with all frames taken from one LandscapeData"""
+    data = data or load_landscape()
+    pipeline = data.clinical_pipeline()
+    if crossref is not None:
+        pipeline = with_patent_families(pipeline, crossref)
+    return [
+        ('patent_filing_trends', create_patent_filing_trends, data.filings_per_year()),
+        ('geographic_distribution', create_geographic_distribution, data.filings_per_jurisdiction()),
+        ('company_landscape', partial(create_company_landscape, max_companies=max_categories),
+         data.company_summary()),
+        ('chemical_scaffolds', partial(create_chemical_scaffold_analysis, max_scaffolds=max_categories),
+         data.scaffold_summary()),
+        ('clinical_pipeline', create_clinical_pipeline, pipeline),
+        ('indication_analysis', partial(create_indication_analysis, max_indications=max_categories),
+         data.indication_summary()),
+        ('family_portfolio', partial(create_family_portfolio, webgl_threshold=webgl_threshold,
+                                     bin_threshold=bin_threshold, max_assignees=max_categories),
+         data.families[['assignee', 'priority_year']])
+    ]
+
+def build_figures(data: Optional[LandscapeData] = None, **scaling):
+    """Build every chart from one loaded LandscapeData"""
+    return {name: builder(frame) for name, builder, frame in figure_jobs(data, **scaling)}
+
+def save_all_visualizations(data: Optional[LandscapeData] = None, output_dir: str = DATA_DIR,
+                            layout: str = 'iframes', plotlyjs: str = 'directory',
+                            formats: Optional[Sequence[str]] = None, workers: int = 1,
+                            cache_dir: Optional[str] = None, cache_max_mb: float = CACHE_MAX_MB, **scaling):
+    """Generate and save all visualizations
+    
+    Figures whose data slice and options match a cached entry are reused; pass
+    cache_dir='' to rebuild everything. The cache defaults to output_dir/.figure_cache.
+    formats=None writes per-figure HTML only for the iframes layout, which needs it.
+    """
+    
+    # Build and export the changed figures, in parallel when workers > 1
+    formats = list(formats or [])
+    if layout == 'iframes' and 'html' not in formats:
+        formats.insert(0, 'html')
+    if cache_dir is None:
+        cache_dir = os.path.join(output_dir, CACHE_DIRNAME)
+    cache = FigureCache(cache_dir, cache_max_mb) if cache_dir else None
+    with span('charts.aggregate'):
+        jobs = figure_jobs(data, **scaling)
+    with span('charts.export', figures=len(jobs), workers=workers):
+        figs, paths = export_figures(jobs, output_dir, formats, workers, cache=cache)
+    for name, written in paths.items():
+        for path in written.values():
+            progress(f"Saved {os.path.basename(path)}")
+    if cache is not None:
+        print(cache.report())
+    
+    with span('dashboard.write', layout=layout):
+        if layout == 'single':
+            # One page, one shared plotly.js, charts rendered as they scroll into view
+            path = write_dashboard(figs, output_dir, plotlyjs)
+        else:
+            # Per-figure HTML files were written above; the page combines them with iframes
+            path = write_iframe_dashboard(figs, output_dir, write_figures=False)
+    
+    print(f"Created comprehensive dashboard: {os.path.basename(path)}")
     
     return figs
 
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Create the cGAS inhibitor patent landscape visualizations")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory holding the landscape JSON files")
+    parser.add_argument("--output-dir", default=DATA_DIR)
+    parser.add_argument("--crossref-index", default=None,
+                        help=f"Cross-reference index file (default: <output-dir>/{INDEX_FILENAME})")
+    parser.add_argument("--layout", choices=["iframes", "single"], default="iframes",
+                        help="Per-figure HTML files in iframes, or one self-contained dashboard page")
+    parser.add_argument("--plotlyjs", choices=PLOTLYJS_MODES, default="directory",
+                        help="How the single-page dashboard includes plotly.js (directory/inline need no CDN)")
+    parser.add_argument("--formats", default=None,
+                        help=f"Comma-separated per-figure exports ({','.join(EXPORT_FORMATS)}); static formats need kaleido "
+                             "(default: html for the iframes layout, none for single)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for building and exporting figures")
+    parser.add_argument("--webgl-threshold", type=int, default=WEBGL_POINT_THRESHOLD,
+                        help="Points per trace above which scatter traces switch to WebGL")
+    parser.add_argument("--bin-threshold", type=int, default=BIN_POINT_THRESHOLD,
+                        help="Family records above which the portfolio map is binned into a heatmap")
+    parser.add_argument("--max-categories", type=int, default=MAX_CATEGORIES,
+                        help="Companies, scaffolds, indications and assignees shown per chart (0: no limit)")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Figure cache directory (default: <output-dir>/{CACHE_DIRNAME})")
+    parser.add_argument("--cache-max-mb", type=float, default=CACHE_MAX_MB,
+                        help="Least recently used figures are evicted past this cache size")
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild every figure")
+    parser.add_argument("--compare-layouts", action="store_true",
+                        help="Report bytes and load time of both dashboard layouts")
+    parser.add_argument("--trace", default=None, help="Write the run's span trace to this file")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="chrome",
+                        help="chrome: Trace Event JSON for chrome://tracing / Perfetto; json: spans, counters, summary")
+    parser.add_argument("--verbose", action="store_true", help="Print every file written")
+    args = parser.parse_args(argv)
+    if args.max_categories < 0:
+        parser.error("--max-categories must be 0 (no limit) or positive")
+    
+    recorder = instrumentation.enable()
+    instrumentation.set_verbose(args.verbose)
+    with span('crossref.refresh'):
+        crossref = load_crossref(args.data_dir, args.crossref_index or os.path.join(args.output_dir, INDEX_FILENAME))
+    with span('landscape.load'):
+        data = load_landscape(args.data_dir)
+    figs = save_all_visualizations(data, output_dir=args.output_dir, layout=args.layout, plotlyjs=args.plotlyjs,
+                                   formats=parse_formats(args.formats) if args.formats else None, workers=args.workers,
+                                   cache_dir='' if args.no_cache else args.cache_dir,
+                                   cache_max_mb=args.cache_max_mb,
+                                   webgl_threshold=args.webgl_threshold, bin_threshold=args.bin_threshold,
+                                   max_categories=args.max_categories, crossref=crossref)
+    if args.compare_layouts:
+        print_layout_report(compare_layouts(figs, args.plotlyjs))
+    
+    recorder.print_summary("Visualizations")
+    if args.trace:
+        print(f"Trace saved: {recorder.export(args.trace, args.trace_format)}")
+
 if __name__ == "__main__":
-    save_all_visualizations()
+    main()
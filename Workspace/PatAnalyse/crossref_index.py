@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Compound / patent family / trial / company cross-reference index
+Extracts the links between compounds, patent families, clinical trials and
+companies from the workspace JSON files into a SQLite index, re-extracting only
+the files whose content changed, and loads it into dictionaries keyed by
+matching key so lookups in either direction are a hash lookup
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from family_dedup import canonical_publication_number, company_key, compound_key
+
+# The workspace directory and JSON files (as in landscape_data, which pulls in pandas;
+# the index only needs json, so 'patanalyse xref' starts without it)
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+PATENT_DATA_FILE = "patent_data_structured.json"
+LANDSCAPE_FILE = "cgas_inhibitor_patent_landscape_data.json"
+CLINICAL_FILE = "clinical_competitive_intelligence.json"
+FINDINGS_FILE = "cgas_additional_findings.json"
+
+INDEX_FILENAME = "crossref_index.sqlite"
+STRUCTURES_FILE = os.path.join("cgas_structures", "cgas_structures_master.json")
+# Bump when extraction changes, so every source is re-extracted once
+EXTRACTOR_VERSION = 1
+
+KINDS = ('compound', 'family', 'trial', 'company')
+KEY_FUNCTIONS = {
+    'compound': compound_key,
+    'family': canonical_publication_number,
+    # 'VENT-03 Phase 2' and 'VENT03 Phase 2' are the same trial
+    'trial': compound_key,
+    'company': company_key
+}
+
+# '<compound>_link' fields in patent_data_structured.json that say there is no link
+NO_LINK_PATTERN = re.compile(r'^\s*no\b', re.IGNORECASE)
+PHASE_PATTERN = re.compile(r'phase[\s_]*(\d)', re.IGNORECASE)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sources (
+        name TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime_ns INTEGER,
+        sha256 TEXT,
+        extractor_version INTEGER,
+        indexed_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS entities (
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        source TEXT NOT NULL,
+        name TEXT,
+        attrs TEXT,
+        PRIMARY KEY (kind, key, source)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_entities_source ON entities(source);
+
+    CREATE TABLE IF NOT EXISTS links (
+        kind_a TEXT NOT NULL,
+        key_a TEXT NOT NULL,
+        kind_b TEXT NOT NULL,
+        key_b TEXT NOT NULL,
+        source TEXT NOT NULL,
+        detail TEXT,
+        PRIMARY KEY (kind_a, key_a, kind_b, key_b, source)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_links_source ON links(source);
+"""
+
+
+def phase_of(text: str) -> int:
+    """'Phase 2', 'phase_1_completed' -> 2, 1; 0 when no phase is named"""
+    match = PHASE_PATTERN.search(str(text))
+    return int(match.group(1)) if match else 0
+
+
+def trial_name(compound: str, phase: int) -> str:
+    """Trials are matched across files by compound and phase ('VENT-03 Phase 2')"""
+    return f"{compound} Phase {phase}"
+
+
+def file_fingerprint(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Extraction:
+    """Entities and links found in one source file, keyed by matching key"""
+
+    def __init__(self):
+        self.entities: Dict[Tuple[str, str], Dict] = {}
+        self.links: Dict[Tuple[str, str, str, str], Dict] = {}
+
+    def entity(self, kind: str, name: str, named: bool = True, **attrs) -> Optional[str]:
+        """Add or extend an entity; returns its key (None for an empty name)
+
+        named=False records a reference whose spelling (e.g. 'vent03') should not become the display name.
+        """
+        key = KEY_FUNCTIONS[kind](name) if name else ''
+        if not key:
+            return None
+        entry = self.entities.setdefault((kind, key), {'name': None, 'attrs': {}})
+        if named and entry['name'] is None:
+            entry['name'] = name
+        for attr, value in attrs.items():
+            if value not in (None, '', [], {}):
+                entry['attrs'].setdefault(attr, value)
+        return key
+
+    def link(self, kind_a: str, name_a: str, kind_b: str, name_b: str, named: bool = True, **detail):
+        key_a = self.entity(kind_a, name_a, named)
+        key_b = self.entity(kind_b, name_b)
+        if key_a and key_b:
+            self.links.setdefault((kind_a, key_a, kind_b, key_b), {}).update(
+                {attr: value for attr, value in detail.items() if value not in (None, '')})
+
+
+def extract_patent_data(data: Dict, found: Extraction):
+    """Families, their assignees, potency, and the compounds their '<compound>_link' fields name"""
+    for group, patents in data.get('patent_families', {}).items():
+        for number, patent in patents.items():
+            potency = {name: value for name, value in patent.get('potency_data', {}).items()
+                       if isinstance(value, str)}
+            found.entity('family', number, title=patent.get('title'), priority_date=patent.get('priority_date'),
+                         scaffold=patent.get('core_scaffold'), significance=patent.get('significance'),
+                         potency=potency)
+            if patent.get('assignee'):
+                found.link('family', number, 'company', patent['assignee'], relation='assignee')
+            for field, text in patent.items():
+                if field.endswith('_link') and isinstance(text, str) and not NO_LINK_PATTERN.match(text):
+                    found.link('compound', field[:-len('_link')], 'family', number, named=False,
+                               relation='covered_by', evidence=text)
+    for overlap in data.get('fto_landscape', {}).get('novel_scaffolds', {}).values():
+        if overlap.get('patent') and overlap.get('company'):
+            found.link('family', overlap['patent'], 'company', overlap['company'], relation='assignee')
+
+
+def extract_clinical(data: Dict, found: Extraction):
+    """Trials from clinical_pipeline: '<stage>.<compound>[_<indication>]'"""
+    for stage, programs in data.get('clinical_pipeline', {}).items():
+        phase = phase_of(stage)
+        for program, info in programs.items():
+            compound = program.split('_')[0]
+            trial = trial_name(compound, phase)
+            found.entity('trial', trial, phase=phase, stage=stage, status=info.get('status'),
+                         indication=info.get('indication'),
+                         registry_id=info.get('design', {}).get('trial_id'))
+            found.link('trial', trial, 'compound', compound, relation='tests')
+            if info.get('company'):
+                found.link('trial', trial, 'company', info['company'], relation='sponsor')
+                found.link('compound', compound, 'company', info['company'], relation='developer')
+
+
+def extract_landscape(data: Dict, found: Extraction):
+    """Clinical candidates and their trials, company compounds, and scaffold lead compounds and patents"""
+    for compound, info in data.get('clinical_candidates', {}).items():
+        found.entity('compound', compound, status=info.get('status'), mechanism=info.get('mechanism'))
+        if info.get('company'):
+            found.link('compound', compound, 'company', info['company'], relation='developer')
+        design = info.get('phase_1_design')
+        if design:
+            trial = trial_name(compound, 1)
+            found.entity('trial', trial, phase=1, registry_id=design.get('trial_id'),
+                         study_type=design.get('study_type'))
+            found.link('trial', trial, 'compound', compound, relation='tests')
+
+    for group, companies in data.get('key_companies', {}).items():
+        for company, profile in companies.items():
+            found.entity('company', company, company_type=group, chemical_focus=profile.get('chemical_focus'))
+            for compound in profile.get('key_compounds', []) + [profile.get('lead_candidate', '')]:
+                if compound:
+                    found.link('compound', compound, 'company', company, relation='developer')
+
+    for scaffold, info in data.get('chemical_scaffolds', {}).items():
+        lead = info.get('lead_compound')
+        if lead:
+            found.entity('compound', lead, scaffold=scaffold)
+        if lead and info.get('patent'):
+            found.link('compound', lead, 'family', info['patent'], relation='covered_by',
+                       potency=info.get('potency'))
+
+
+def extract_findings(data: Dict, found: Extraction):
+    """Recent patents and their applicants, and clinical trials"""
+    data = data.get('cgas_additional_findings_2022_2025', {})
+    for patent in data.get('recent_patents', []):
+        number = patent['patent_number']
+        found.entity('family', number, title=patent.get('title'), priority_year=patent.get('priority_year'),
+                     scaffold=patent.get('chemical_class'), status=patent.get('status'))
+        if patent.get('applicant'):
+            found.link('family', number, 'company', patent['applicant'], relation='assignee')
+
+    for trial_info in data.get('clinical_trials', []):
+        compound = trial_info['compound']
+        phase = phase_of(trial_info.get('phase', ''))
+        trial = trial_name(compound, phase)
+        indication = trial_info.get('indication')
+        found.entity('trial', trial, phase=phase, indication=', '.join(indication)
+                     if isinstance(indication, list) else indication, findings_id=trial_info.get('id'))
+        found.link('trial', trial, 'compound', compound, relation='tests')
+        if trial_info.get('company'):
+            found.link('trial', trial, 'company', trial_info['company'], relation='sponsor')
+            found.link('compound', compound, 'company', trial_info['company'], relation='developer')
+
+
+def extract_structures(data: Dict, found: Extraction):
+    """Generated structures: SMILES, structure key and the developing company"""
+    for compound in data.get('compounds', []):
+        name = compound['compound_name']
+        found.entity('compound', name, smiles=compound.get('smiles'), structure_key=compound.get('structure_key'),
+                     compound_type=compound.get('type'), scaffold=compound.get('scaffold'),
+                     image_path=compound.get('image_path'))
+        if compound.get('company'):
+            found.link('compound', name, 'company', compound['company'], relation='developer')
+
+
+# Source file (relative to the data directory) -> extractor; earlier sources win attribute conflicts
+SOURCES = {
+    PATENT_DATA_FILE: extract_patent_data,
+    CLINICAL_FILE: extract_clinical,
+    LANDSCAPE_FILE: extract_landscape,
+    FINDINGS_FILE: extract_findings,
+    STRUCTURES_FILE: extract_structures
+}
+
+
+class CrossReferenceIndex:
+    """Persisted cross-reference index with in-memory lookups in both directions"""
+
+    def __init__(self, path: str, data_dir: str = DATA_DIR):
+        self.path = path
+        self.data_dir = data_dir
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.entities: Dict[Tuple[str, str], Dict] = {}
+        # (kind, key) -> other kind -> other key -> link details (one per source)
+        self.adjacency: Dict[Tuple[str, str], Dict[str, Dict[str, List[Dict]]]] = {}
+        self.loaded = False
+
+    def update(self) -> List[str]:
+        """Re-extract the source files whose content changed; returns their names"""
+        stored = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT name, size, mtime_ns, sha256, extractor_version FROM sources")}
+        changed = []
+        for name, extractor in SOURCES.items():
+            path = os.path.join(self.data_dir, name)
+            if not os.path.exists(path):
+                if name in stored:
+                    self._replace(name, None)
+                    changed.append(name)
+                continue
+
+            size, mtime_ns = file_fingerprint(path)
+            previous = stored.get(name)
+            if previous and previous[:2] == (size, mtime_ns) and previous[3] == EXTRACTOR_VERSION:
+                continue
+            sha256 = file_sha256(path)
+            if previous and previous[2] == sha256 and previous[3] == EXTRACTOR_VERSION:
+                # Touched but unchanged: remember the new stat so the next check is stat-only
+                with self.conn:
+                    self.conn.execute("UPDATE sources SET size = ?, mtime_ns = ? WHERE name = ?",
+                                      (size, mtime_ns, name))
+                continue
+
+            found = Extraction()
+            with open(path, 'r', encoding='utf-8') as f:
+                extractor(json.load(f), found)
+            self._replace(name, found, (size, mtime_ns, sha256))
+            changed.append(name)
+
+        if changed:
+            self.loaded = False
+        return changed
+
+    def _replace(self, source: str, found: Optional[Extraction], stat: Optional[Tuple] = None):
+        with self.conn:
+            self.conn.execute("DELETE FROM entities WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM links WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM sources WHERE name = ?", (source,))
+            if found is None:
+                return
+            self.conn.executemany(
+                "INSERT INTO entities (kind, key, source, name, attrs) VALUES (?, ?, ?, ?, ?)",
+                ((kind, key, source, entry['name'], json.dumps(entry['attrs'], ensure_ascii=False))
+                 for (kind, key), entry in found.entities.items()))
+            self.conn.executemany(
+                "INSERT INTO links (kind_a, key_a, kind_b, key_b, source, detail) VALUES (?, ?, ?, ?, ?, ?)",
+                ((*link, source, json.dumps(detail, ensure_ascii=False)) for link, detail in found.links.items()))
+            self.conn.execute(
+                "INSERT INTO sources (name, size, mtime_ns, sha256, extractor_version, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, *stat, EXTRACTOR_VERSION, time.strftime('%Y-%m-%d %H:%M:%S')))
+
+    def load(self) -> 'CrossReferenceIndex':
+        """Build the lookup dictionaries from the stored entities and links"""
+        order = {name: i for i, name in enumerate(SOURCES)}
+        entities = {}
+        rows = sorted(self.conn.execute("SELECT kind, key, source, name, attrs FROM entities"),
+                      key=lambda row: order.get(row[2], len(order)))
+        for kind, key, source, name, attrs in rows:
+            entry = entities.setdefault((kind, key), {'kind': kind, 'key': key, 'name': None, 'sources': []})
+            entry['sources'].append(source)
+            entry['name'] = entry['name'] or name
+            for attr, value in json.loads(attrs).items():
+                entry.setdefault(attr, value)
+
+        adjacency = {}
+        for kind_a, key_a, kind_b, key_b, source, detail in self.conn.execute("SELECT * FROM links"):
+            detail = dict(json.loads(detail), source=source)
+            adjacency.setdefault((kind_a, key_a), {}).setdefault(kind_b, {}).setdefault(key_b, []).append(detail)
+            adjacency.setdefault((kind_b, key_b), {}).setdefault(kind_a, {}).setdefault(key_a, []).append(detail)
+
+        for entry in entities.values():
+            entry['name'] = entry['name'] or entry['key']
+        self.entities = entities
+        self.adjacency = adjacency
+        self.loaded = True
+        return self
+
+    def refresh(self) -> 'CrossReferenceIndex':
+        """Update from the source files and reload the lookups if anything changed"""
+        changed = self.update()
+        if changed:
+            print(f"Cross-reference index updated from {', '.join(changed)}")
+        return self if self.loaded else self.load()
+
+    # Lookups
+
+    def entity(self, kind: str, name: str) -> Optional[Dict]:
+        """Merged attributes of a compound, family, trial or company, by any spelling of its name"""
+        return self.entities.get((kind, KEY_FUNCTIONS[kind](name)))
+
+    def related(self, kind: str, name: str, other_kind: str) -> List[Dict]:
+        """Entities of other_kind linked to this one, each with the details of its links"""
+        linked = self.adjacency.get((kind, KEY_FUNCTIONS[kind](name)), {}).get(other_kind, {})
+        return [dict(self.entities.get((other_kind, key), {'kind': other_kind, 'key': key, 'name': key}),
+                     links=details) for key, details in linked.items()]
+
+    def names(self, kind: str, name: str, other_kind: str) -> List[str]:
+        return [entry['name'] for entry in self.related(kind, name, other_kind)]
+
+    def count(self) -> Dict[str, int]:
+        counts = {kind: 0 for kind in KINDS}
+        for kind, _ in self.entities:
+            counts[kind] += 1
+        counts['links'] = self.conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+        return counts
+
+    def pipeline_families(self, phases: Iterable[int] = (1, 2)) -> List[Dict]:
+        """Patent families covering compounds with a trial in one of these phases, with potency"""
+        phases = set(phases)
+        rows = []
+        for (kind, key), trial in self.entities.items():
+            if kind != 'trial' or trial.get('phase') not in phases:
+                continue
+            for compound in self.related('trial', key, 'compound'):
+                for family in self.related('compound', compound['key'], 'family'):
+                    potency = dict(family.get('potency', {}))
+                    for link in family['links']:
+                        if link.get('potency'):
+                            potency.setdefault('summary', link['potency'])
+                    rows.append({'trial': trial['name'], 'phase': trial['phase'], 'compound': compound['name'],
+                                 'family': family['name'], 'title': family.get('title', ''),
+                                 'potency': potency})
+        return rows
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def load_crossref(data_dir: str = DATA_DIR, index_path: Optional[str] = None) -> CrossReferenceIndex:
+    """Shared, up-to-date index per data directory and index file (default: <data_dir>/crossref_index.sqlite)"""
+    return CrossReferenceIndex(index_path or os.path.join(data_dir, INDEX_FILENAME), data_dir).refresh()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or query the compound/family/trial/company cross-reference")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--db", default=None, help=f"Index file (default: <data-dir>/{INDEX_FILENAME})")
+    parser.add_argument("--compound", help="Families, trials and companies linked to a compound")
+    parser.add_argument("--family", help="Compounds and companies linked to a patent family")
+    parser.add_argument("--company", help="Compounds, families and trials linked to a company")
+    parser.add_argument("--phases", default="1,2",
+                        help="Without a lookup: families covering compounds in these trial phases")
+    args = parser.parse_args(argv)
+
+    db = args.db or os.path.join(args.data_dir, INDEX_FILENAME)
+    start = time.perf_counter()
+    with CrossReferenceIndex(db, args.data_dir) as index:
+        index.refresh()
+        print(f"Index ready in {(time.perf_counter() - start) * 1000:.1f} ms: "
+              + ', '.join(f"{count} {kind}" for kind, count in index.count().items()))
+
+        lookups = [(kind, name) for kind, name in
+                   (('compound', args.compound), ('family', args.family), ('company', args.company)) if name]
+        for kind, name in lookups:
+            entity = index.entity(kind, name)
+            print(json.dumps(entity, ensure_ascii=False) if entity else f"Unknown {kind}: {name}")
+            for other_kind in KINDS:
+                if other_kind != kind:
+                    linked = index.names(kind, name, other_kind)
+                    if linked:
+                        print(f"  {other_kind}: {', '.join(linked)}")
+        if not lookups:
+            for row in index.pipeline_families(int(phase) for phase in args.phases.split(',')):
+                print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Patent family deduplication and assignee normalization
+Publication numbers are canonicalized ('WO 2024/137752' == 'WO2024137752A1') and
+merged by hash; assignee spellings are clustered by fuzzy matching inside hash
+blocks (with a sorted-neighbourhood window for oversized blocks), so the work
+grows close to linearly with the number of records instead of pairwise
+"""
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional
+
+# Names whose keys are at least this similar are treated as one assignee
+ASSIGNEE_SIMILARITY = 0.88
+# Blocks larger than this are compared within a sliding window of sorted keys
+MAX_BLOCK_SIZE = 200
+NEIGHBOURHOOD_WINDOW = 20
+
+# Corporate suffixes dropped when matching company names across sources
+COMPANY_SUFFIXES = {'ag', 'inc', 'co', 'corp', 'corporation', 'ltd', 'llc', 'gmbh', 'plc', 'sa',
+                    'therapeutics', 'pharma', 'pharmaceuticals', 'u', 's', 'us'}
+
+
+def company_key(name: str) -> str:
+    """Matching key for a company name ('Novartis AG', 'Roche/Genentech' -> 'novartis', 'roche')"""
+    first = str(name).split('/')[0].lower()
+    words = [w for w in re.split(r'[^a-z0-9]+', first) if w and w not in COMPANY_SUFFIXES]
+    return ' '.join(words)
+
+
+def compound_key(name: str) -> str:
+    """Matching key for a compound code ('IMSB-301' and 'IMSB301' -> 'imsb301')"""
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+def canonical_publication_number(number: str) -> str:
+    """Country code + digits without kind code: 'WO 2024/137752 A1' -> 'WO2024137752', 'US12,091,387' -> 'US12091387'"""
+    text = re.sub(r'[\s,./-]', '', str(number).upper())
+    match = re.match(r'^([A-Z]{2})(\d+)([A-Z]\d?)?$', text)
+    if not match:
+        return text
+    country, digits, _ = match.groups()
+    if country == 'WO':
+        # WO numbers are year + 6-digit serial; older two-digit years ('WO 99/12345') are expanded
+        slash = re.match(r'^\s*WO\s*(\d{2,4})\s*/\s*(\d+)', str(number).upper())
+        if slash:
+            year, serial = slash.groups()
+            if len(year) == 2:
+                year = ('19' if int(year) > 50 else '20') + year
+            digits = f"{year}{int(serial):06d}"
+    return country + digits
+
+
+def ascii_fold(text: str) -> str:
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+class AssigneeResolver:
+    """Clusters assignee spellings and maps each to one canonical key and display name"""
+
+    def __init__(self, similarity: float = ASSIGNEE_SIMILARITY, max_block_size: int = MAX_BLOCK_SIZE,
+                 window: int = NEIGHBOURHOOD_WINDOW):
+        self.similarity = similarity
+        self.max_block_size = max_block_size
+        self.window = window
+        self.counts = {}     # normalized key -> occurrences
+        self.spellings = {}  # normalized key -> {original spelling: occurrences}
+        self.parent = {}
+        self.resolved = False
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return company_key(ascii_fold(str(name or '')))
+
+    def add(self, name: str, count: int = 1):
+        key = self.normalize(name)
+        if not key:
+            return
+        self.counts[key] = self.counts.get(key, 0) + count
+        spellings = self.spellings.setdefault(key, {})
+        spellings[name] = spellings.get(name, 0) + count
+        self.resolved = False
+
+    def add_all(self, names: Iterable[str]) -> 'AssigneeResolver':
+        for name in names:
+            self.add(name)
+        return self
+
+    def _find(self, key: str) -> str:
+        root = key
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while key != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+
+    def _union(self, a: str, b: str):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            # The more frequent spelling becomes the canonical key
+            if (self.counts[root_a], root_a) < (self.counts[root_b], root_b):
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+    def _blocks(self) -> Dict[str, List[str]]:
+        """Hash blocks on the key prefix and on the prefix of its longest (most distinctive) token"""
+        blocks = {}
+        for key in self.counts:
+            longest = max(key.split(), key=len)
+            for block in {f"p:{key[:3]}", f"t:{longest[:3]}"}:
+                blocks.setdefault(block, []).append(key)
+        return blocks
+
+    def _similar(self, a: str, b: str) -> bool:
+        # Numbered entities ('Company 1' / 'Company 12') differ however close the spelling is
+        if re.sub(r'\D', '', a) != re.sub(r'\D', '', b):
+            return False
+        matcher = SequenceMatcher(None, a, b)
+        return (matcher.real_quick_ratio() >= self.similarity and matcher.quick_ratio() >= self.similarity
+                and matcher.ratio() >= self.similarity)
+
+    def resolve(self):
+        if self.resolved:
+            return
+        self.parent = {key: key for key in self.counts}
+        for keys in self._blocks().values():
+            if len(keys) <= self.max_block_size:
+                pairs = ((keys[i], keys[j]) for i in range(len(keys)) for j in range(i + 1, len(keys)))
+            else:
+                keys = sorted(keys)
+                pairs = ((keys[i], keys[j]) for i in range(len(keys))
+                         for j in range(i + 1, min(i + 1 + self.window, len(keys))))
+            for a, b in pairs:
+                if self._find(a) != self._find(b) and self._similar(a, b):
+                    self._union(a, b)
+        self.resolved = True
+
+    def key(self, name: str) -> str:
+        """Canonical key for a spelling ('' for blank names)"""
+        self.resolve()
+        key = self.normalize(name)
+        return self._find(key) if key in self.parent else key
+
+    def display_name(self, key: str) -> str:
+        """Most common original spelling within the cluster"""
+        self.resolve()
+        members = [k for k in self.counts if self._find(k) == key] or [key]
+        spellings = {}
+        for member in members:
+            for spelling, count in self.spellings.get(member, {}).items():
+                spellings[spelling] = spellings.get(spelling, 0) + count
+        return max(spellings, key=lambda s: (spellings[s], len(s))) if spellings else key
+
+    def mapping(self) -> Dict[str, str]:
+        """Every seen spelling -> canonical key"""
+        self.resolve()
+        return {spelling: self._find(key) for key, spellings in self.spellings.items() for spelling in spellings}
+
+
+def merge_records(existing: Dict, record: Dict) -> Dict:
+    """Fill gaps in the first-seen record from a duplicate and union the jurisdictions"""
+    for field, value in record.items():
+        if field == 'jurisdictions':
+            existing['jurisdictions'] = sorted(set(existing.get('jurisdictions') or []) | set(value or []))
+        elif existing.get(field) in (None, '') and value not in (None, ''):
+            existing[field] = value
+    return existing
+
+
+def deduplicate_families(records: Iterable[Dict], resolver: Optional[AssigneeResolver] = None) -> List[Dict]:
+    """One record per canonical publication number, with canonical assignee keys
+
+    Each returned record gains 'family_key' (canonical number) and 'assignee_key'.
+    """
+    merged = {}
+    for record in records:
+        family_key = canonical_publication_number(record['publication_number'])
+        if family_key in merged:
+            merge_records(merged[family_key], record)
+        else:
+            merged[family_key] = dict(record, family_key=family_key)
+
+    families = list(merged.values())
+    if resolver is None:
+        resolver = AssigneeResolver().add_all(family['assignee'] for family in families)
+    keys = {}
+    for family in families:
+        name = family['assignee']
+        if name not in keys:
+            keys[name] = resolver.key(name)
+        family['assignee_key'] = keys[name]
+    return families
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+On-disk figure cache for the cGAS patent landscape charts
+Each entry holds a figure's JSON and its exported HTML/PNG/SVG/PDF files, keyed
+by a hash of the aggregated data slice, the builder, its layout options and the
+chart helper modules it depends on, so unchanged charts are copied from the cache
+instead of being rebuilt; the least recently used entries are evicted once the
+cache grows past its size limit
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import shutil
+from functools import lru_cache, partial
+from typing import Callable, Dict, Optional, Sequence
+
+import pandas as pd
+import plotly
+import plotly.io as pio
+
+CACHE_DIRNAME = ".figure_cache"
+CACHE_MAX_MB = 500
+FIGURE_FILENAME = "figure.json"
+
+# Only a builder's own source is hashed, so edits to what it calls do not show up in
+# its key. Modules listed here are hashed whole into every key; bump the version
+# after changing anything else a builder depends on (module-level constants such as
+# FILING_ANNOTATIONS, shared helpers in create_patent_visualizations).
+FIGURE_CACHE_VERSION = 1
+BUILDER_DEPENDENCIES = ('landscape_scaling',)
+
+
+def frame_digest(frame) -> str:
+    """Content hash of a Series / DataFrame slice, including index, names and dtypes"""
+    digest = hashlib.sha256()
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame()
+    if isinstance(frame, pd.DataFrame):
+        digest.update(repr((list(frame.columns), [str(dtype) for dtype in frame.dtypes],
+                            frame.index.name)).encode('utf-8'))
+        try:
+            digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        except TypeError:
+            # List-valued cells (e.g. jurisdictions) are not hashable by pandas
+            digest.update(frame.to_json(orient='split', date_format='iso').encode('utf-8'))
+    else:
+        digest.update(json.dumps(frame, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def module_digest(module_name: str) -> str:
+    """Hash of a module's source file, or '' when it has no source"""
+    try:
+        module = importlib.import_module(module_name)
+        return hashlib.sha256(inspect.getsource(module).encode('utf-8')).hexdigest()
+    except (ImportError, OSError, TypeError):
+        return ''
+
+
+def builder_signature(builder: Callable) -> Dict:
+    """Builder identity, keyword options and a hash of its code, so editing a chart invalidates it
+
+    The code hash also covers the BUILDER_DEPENDENCIES modules and FIGURE_CACHE_VERSION.
+    """
+    keywords = {}
+    while isinstance(builder, partial):
+        keywords = {**builder.keywords, **keywords}
+        builder = builder.func
+    try:
+        code_hash = hashlib.sha256(inspect.getsource(builder).encode('utf-8')).hexdigest()
+    except (OSError, TypeError):
+        code_hash = ''
+    return {
+        'builder': f"{builder.__module__}.{builder.__qualname__}",
+        'options': keywords,
+        'code': code_hash,
+        'dependencies': {name: module_digest(name) for name in BUILDER_DEPENDENCIES},
+        'version': FIGURE_CACHE_VERSION
+    }
+
+
+def figure_key(name: str, builder: Callable, frame) -> str:
+    """Cache key of one (name, builder, frame) figure job"""
+    payload = json.dumps({
+        'name': name,
+        'data': frame_digest(frame),
+        'plotly': plotly.__version__,
+        **builder_signature(builder)
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FigureCache:
+    """Content-addressed figure entries under one directory with LRU eviction by total size"""
+
+    def __init__(self, cache_dir: str, max_mb: float = CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def lookup(self, name: str, key: str, formats: Sequence[str], output_dir: str):
+        """Figure and exported paths from the cache, copied into output_dir, or None if any part is missing"""
+        entry = self.entry_dir(key)
+        sources = {fmt: os.path.join(entry, f"{name}.{fmt}") for fmt in formats}
+        figure_path = os.path.join(entry, FIGURE_FILENAME)
+        if not os.path.exists(figure_path) or not all(os.path.exists(path) for path in sources.values()):
+            self.misses += 1
+            return None
+
+        fig = pio.read_json(figure_path)
+        paths = {}
+        for fmt, source in sources.items():
+            paths[fmt] = os.path.join(output_dir, f"{name}.{fmt}")
+            shutil.copyfile(source, paths[fmt])
+        # Touch the entry so eviction sees it as recently used
+        os.utime(entry)
+        self.hits += 1
+        return fig, paths
+
+    def store(self, key: str, fig, paths: Dict[str, str]):
+        """Keep the figure JSON and copies of its exports (call evict() once the batch is stored)"""
+        entry = self.entry_dir(key)
+        os.makedirs(entry, exist_ok=True)
+        pio.write_json(fig, os.path.join(entry, FIGURE_FILENAME))
+        for path in paths.values():
+            shutil.copyfile(path, os.path.join(entry, os.path.basename(path)))
+        os.utime(entry)
+
+    def entries(self):
+        """(last used, bytes, path) for every entry, oldest first"""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry = self.entry_dir(key)
+            if not os.path.isdir(entry):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+            entries.append((os.path.getmtime(entry), size, entry))
+        return sorted(entries)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Remove least recently used entries until the cache fits; returns the number removed"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        self.evict(max_bytes=0)
+
+    def report(self) -> str:
+        return f"Figure cache: {self.hits} reused, {self.misses} rebuilt ({self.size() / 1024 / 1024:.1f} MB in {self.cache_dir})"
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Parallel figure build and export for the cGAS patent landscape charts
+Each worker process builds its figures from the aggregated frames and writes
+HTML and static PNG/SVG/PDF exports, keeping one kaleido renderer alive per
+worker instead of starting a browser for every image; unchanged figures can be
+served from a FigureCache instead
+"""
+
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import instrumentation
+from figure_cache import FigureCache, figure_key
+from instrumentation import span
+
+try:
+    import kaleido
+except ImportError:
+    kaleido = None
+
+EXPORT_FORMATS = ('html', 'png', 'svg', 'pdf')
+STATIC_FORMATS = ('png', 'svg', 'pdf')
+
+_renderer_started = False
+
+
+def parse_formats(text: str) -> List[str]:
+    """'html,png' -> ['html', 'png'], rejecting unknown formats"""
+    formats = [fmt.strip().lower() for fmt in text.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export formats: {', '.join(unknown)} (available: {', '.join(EXPORT_FORMATS)})")
+    return formats
+
+
+def start_renderer():
+    """Start this process's persistent kaleido renderer once (kaleido >= 1.0 runs a browser per call otherwise)"""
+    global _renderer_started
+    if _renderer_started or kaleido is None:
+        return
+    if hasattr(kaleido, 'start_sync_server'):
+        kaleido.start_sync_server(silence_warnings=True)
+        atexit.register(kaleido.stop_sync_server, silence_warnings=True)
+    _renderer_started = True
+
+
+def export_figure(name: str, builder: Callable, frame, output_dir: str,
+                  formats: Sequence[str]) -> Tuple[str, object, Dict[str, str]]:
+    """Build one figure from its frame and write it in every requested format"""
+    with span('figure.build', figure=name):
+        fig = builder(frame)
+    paths = {}
+    for fmt in formats:
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        with span(f"figure.write_{fmt}", figure=name):
+            if fmt == 'html':
+                fig.write_html(path)
+            else:
+                fig.write_image(path, format=fmt)
+        paths[fmt] = path
+    return name, fig, paths
+
+
+def _export_job(job: Tuple) -> Tuple[str, object, Dict[str, str], Optional[Dict]]:
+    name, builder, frame, output_dir, formats, state = job
+    with instrumentation.worker_scope(state) as recorder:
+        # HTML needs no renderer; only static exports pay for starting kaleido
+        if set(STATIC_FORMATS) & set(formats):
+            with span('figure.start_renderer'):
+                start_renderer()
+        name, fig, paths = export_figure(name, builder, frame, output_dir, formats)
+        return name, fig, paths, recorder.snapshot() if recorder is not None else None
+
+
+def export_figures(jobs: List[Tuple[str, Callable, object]], output_dir: str,
+                   formats: Sequence[str] = ('html',), workers: int = 1,
+                   executor: Optional[ProcessPoolExecutor] = None,
+                   cache: Optional[FigureCache] = None) -> Tuple[Dict, Dict[str, Dict[str, str]]]:
+    """Build and export (name, builder, frame) jobs, in a process pool when workers > 1
+
+    With a cache, jobs whose data slice and options are unchanged are copied from
+    it and only the rest are built. Returns the figures and the written paths per
+    figure, both in job order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    formats = list(formats)
+    static = [fmt for fmt in formats if fmt in STATIC_FORMATS]
+    if static and kaleido is None:
+        print(f"Skipping {', '.join(static)} export (pip install kaleido)")
+        formats = [fmt for fmt in formats if fmt not in STATIC_FORMATS]
+
+    cached, keys, tasks = {}, {}, []
+    state = instrumentation.worker_state()
+    for name, builder, frame in jobs:
+        if cache is not None:
+            with span('figure.cache_lookup', figure=name):
+                keys[name] = figure_key(name, builder, frame)
+                hit = cache.lookup(name, keys[name], formats, output_dir)
+            instrumentation.count('figure_cache.hits' if hit is not None else 'figure_cache.misses')
+            if hit is not None:
+                cached[name] = hit
+                continue
+        tasks.append((name, builder, frame, output_dir, formats, state))
+
+    if not tasks:
+        results = []
+    elif executor is not None:
+        results = list(executor.map(_export_job, tasks))
+    elif workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_export_job, tasks))
+    else:
+        results = [_export_job(task) for task in tasks]
+
+    built = {}
+    recorder = instrumentation.active()
+    for name, fig, written, snapshot in results:
+        built[name] = fig, written
+        if recorder is not None:
+            recorder.merge(snapshot)
+    if cache is not None:
+        with span('figure.cache_store'):
+            for name, (fig, written) in built.items():
+                cache.store(keys[name], fig, written)
+            instrumentation.count('figure_cache.evicted', cache.evict())
+
+    ordered = [(name, cached.get(name) or built[name]) for name, _, _ in jobs]
+    figs = {name: fig for name, (fig, _) in ordered}
+    paths = {name: written for name, (_, written) in ordered}
+    return figs, paths
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Run instrumentation for the structure and chart pipelines
+Span timers and counters recorded through module-level hooks that cost one
+global lookup when disabled; spans from pool workers are shipped back with their
+results, and a run exports to a Chrome trace (chrome://tracing, Perfetto) or
+plain JSON and prints a per-stage summary table instead of per-item progress
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+TRACE_FORMATS = ('chrome', 'json')
+
+_NULL_SPAN = nullcontext()
+_recorder = None
+_verbose = True
+
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'args', 'start')
+
+    def __init__(self, recorder: 'Recorder', name: str, args: Dict):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.recorder.spans.append((self.name, self.start, end - self.start, os.getpid(),
+                                    threading.get_ident(), self.args))
+
+
+class Recorder:
+    """Spans as (name, start, seconds, pid, thread, args) tuples and named counters"""
+
+    def __init__(self):
+        # perf_counter is CLOCK_MONOTONIC on Linux, so worker spans share this time base
+        self.origin = time.perf_counter()
+        self.spans: List[tuple] = []
+        self.counters: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def span(self, name: str, **args) -> _Span:
+        return _Span(self, name, args)
+
+    def count(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict:
+        """Picklable spans and counters, for returning from a worker process"""
+        return {'spans': list(self.spans), 'counters': dict(self.counters)}
+
+    def merge(self, snapshot: Optional[Dict]):
+        if not snapshot:
+            return
+        self.spans.extend(snapshot['spans'])
+        for name, value in snapshot['counters'].items():
+            self.count(name, value)
+
+    def summary(self) -> List[Dict]:
+        """Calls, total, mean and max seconds per span name, slowest total first"""
+        stats = {}
+        for name, _, seconds, _, _, _ in self.spans:
+            entry = stats.setdefault(name, {'span': name, 'calls': 0, 'total': 0.0, 'max': 0.0})
+            entry['calls'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+        for entry in stats.values():
+            entry['mean'] = entry['total'] / entry['calls']
+        return sorted(stats.values(), key=lambda entry: -entry['total'])
+
+    def print_summary(self, title: str = "Run summary"):
+        wall = time.perf_counter() - self.origin
+        print(f"\n=== {title} ({wall:.2f} s wall) ===")
+        print(f"{'span':<28} {'calls':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9}")
+        for entry in self.summary():
+            print(f"{entry['span']:<28} {entry['calls']:>7} {entry['total']:>9.3f} "
+                  f"{entry['mean'] * 1000:>9.2f} {entry['max'] * 1000:>9.2f}")
+        for name, value in sorted(self.counters.items()):
+            print(f"{name:<28} {value:>7g}")
+
+    def chrome_trace(self) -> Dict:
+        """Trace Event Format: complete ('X') events per span, counters in the metadata"""
+        events = [{
+            'name': name, 'ph': 'X', 'ts': (start - self.origin) * 1e6, 'dur': seconds * 1e6,
+            'pid': pid, 'tid': tid, 'args': args
+        } for name, start, seconds, pid, tid, args in self.spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'counters': self.counters}}
+
+    def to_json(self) -> Dict:
+        return {
+            'spans': [{'name': name, 'start': start - self.origin, 'seconds': seconds, 'pid': pid, 'thread': tid,
+                       'args': args} for name, start, seconds, pid, tid, args in self.spans],
+            'counters': self.counters,
+            'summary': self.summary()
+        }
+
+    def export(self, path: str, trace_format: str = 'chrome') -> str:
+        data = self.chrome_trace() if trace_format == 'chrome' else self.to_json()
+        with open(path, 'w') as f:
+            json.dump(data, f, default=str)
+        return path
+
+
+def enable(recorder: Optional[Recorder] = None) -> Recorder:
+    """Start recording spans and counters in this process"""
+    global _recorder
+    _recorder = recorder or Recorder()
+    return _recorder
+
+
+def disable() -> Optional[Recorder]:
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def active() -> Optional[Recorder]:
+    return _recorder
+
+
+def span(name: str, **args):
+    """Time a block when recording is enabled; a shared no-op context otherwise"""
+    if _recorder is None:
+        return _NULL_SPAN
+    return _recorder.span(name, **args)
+
+
+def count(name: str, value: float = 1):
+    if _recorder is not None:
+        _recorder.count(name, value)
+
+
+def set_verbose(verbose: bool):
+    global _verbose
+    _verbose = verbose
+
+
+def progress(message: str):
+    """Per-item progress line, shown only in verbose runs"""
+    if _verbose:
+        print(message)
+
+
+def worker_state() -> Dict:
+    """Settings a pool worker needs to mirror this process's instrumentation"""
+    return {'trace': _recorder is not None, 'verbose': _verbose}
+
+
+@contextmanager
+def worker_scope(state: Optional[Dict]):
+    """Apply the parent's settings inside a pool task; yields the task's Recorder (or None)
+
+    Return recorder.snapshot() with the task result and merge() it in the parent.
+    """
+    global _recorder, _verbose
+    previous = _recorder, _verbose
+    state = state or {}
+    _recorder = Recorder() if state.get('trace') else None
+    _verbose = state.get('verbose', _verbose)
+    try:
+        yield _recorder
+    finally:
+        _recorder, _verbose = previous
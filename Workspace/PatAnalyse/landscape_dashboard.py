@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Single-page dashboard writer for the cGAS patent landscape figures
+Every figure goes into one HTML page that includes plotly.js once (inline, as a
+local file next to the page, or from the CDN) and renders each chart only when
+it scrolls into view. The legacy one-file-per-figure iframe layout is kept for
+comparison of page bytes and load time.
+"""
+
+import os
+import re
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:
+    sync_playwright = None
+
+DASHBOARD_FILENAME = "cgas_dashboard.html"
+PLOTLYJS_FILENAME = "plotly.min.js"
+PLOTLYJS_MODES = ('directory', 'inline', 'cdn')
+
+DASHBOARD_TITLE = "cGAS Inhibitor Patent Landscape Dashboard"
+
+# (figure name, section heading, container height in px), in page order
+DASHBOARD_SECTIONS = [
+    ('patent_filing_trends', 'Patent Filing Trends', 600),
+    ('geographic_distribution', 'Geographic Distribution', 600),
+    ('company_landscape', 'Competitive Landscape', 900),
+    ('chemical_scaffolds', 'Chemical Scaffolds', 600),
+    ('clinical_pipeline', 'Clinical Pipeline', 600),
+    ('indication_analysis', 'Target Indications', 600),
+    ('family_portfolio', 'Patent Family Portfolio', 600)
+]
+
+PAGE_STYLE = """
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        .chart-container { margin: 20px 0; }
+        h1, h2 { color: #333; }"""
+
+# Charts are drawn when they come within one screen of the viewport
+LAZY_RENDER_SCRIPT = """
+    <script>
+        function renderChart(el) {
+            var spec = JSON.parse(document.getElementById(el.id + '-data').textContent);
+            Plotly.newPlot(el, spec.data, spec.layout, {responsive: true});
+        }
+        var charts = document.querySelectorAll('.chart');
+        if ('IntersectionObserver' in window) {
+            var observer = new IntersectionObserver(function (entries) {
+                entries.forEach(function (entry) {
+                    if (entry.isIntersecting) {
+                        observer.unobserve(entry.target);
+                        renderChart(entry.target);
+                    }
+                });
+            }, {rootMargin: '100% 0px'});
+            charts.forEach(function (el) { observer.observe(el); });
+        } else {
+            charts.forEach(renderChart);
+        }
+    </script>"""
+
+
+def plotlyjs_tag(mode: str, output_dir: str) -> str:
+    """Script tag for the one shared plotly.js include"""
+    if mode == 'inline':
+        return f"<script>{get_plotlyjs()}</script>"
+    if mode == 'cdn':
+        return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js" charset="utf-8"></script>'
+    if mode == 'directory':
+        bundle_path = os.path.join(output_dir, PLOTLYJS_FILENAME)
+        if not os.path.exists(bundle_path):
+            with open(bundle_path, 'w', encoding='utf-8') as f:
+                f.write(get_plotlyjs())
+        return f'<script src="{PLOTLYJS_FILENAME}" charset="utf-8"></script>'
+    raise ValueError(f"Unknown plotly.js mode: {mode} (choose from {', '.join(PLOTLYJS_MODES)})")
+
+
+def figure_sections(figs: Dict) -> List:
+    """Known sections in dashboard order, then any extra figures by name"""
+    known = {name for name, _, _ in DASHBOARD_SECTIONS}
+    sections = [section for section in DASHBOARD_SECTIONS if section[0] in figs]
+    sections += [(name, name.replace('_', ' ').title(), 600) for name in figs if name not in known]
+    return sections
+
+
+def write_dashboard(figs: Dict, output_dir: str, plotlyjs: str = 'directory',
+                    filename: str = DASHBOARD_FILENAME) -> str:
+    """Write all figures into one lazily rendered page sharing a single plotly.js"""
+    os.makedirs(output_dir, exist_ok=True)
+    sections = []
+    for name, heading, height in figure_sections(figs):
+        # '</' inside the JSON would close the data script early
+        spec = figs[name].to_json().replace('</', '<\\/')
+        sections.append(f"""
+    <div class="chart-container">
+        <h2>{heading}</h2>
+        <div id="{name}" class="chart" style="height: {height}px;"></div>
+        <script type="application/json" id="{name}-data">{spec}</script>
+    </div>""")
+
+    html = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{DASHBOARD_TITLE}</title>
+    <style>{PAGE_STYLE}
+    </style>
+    {plotlyjs_tag(plotlyjs, output_dir)}
+</head>
+<body>
+    <h1>{DASHBOARD_TITLE}</h1>{''.join(sections)}
+{LAZY_RENDER_SCRIPT}
+</body>
+</html>
+"""
+    path = os.path.join(output_dir, filename)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return path
+
+
+def write_iframe_dashboard(figs: Dict, output_dir: str, filename: str = DASHBOARD_FILENAME,
+                           write_figures: bool = True) -> str:
+    """Legacy layout: one standalone HTML file per figure, embedded with iframes"""
+    os.makedirs(output_dir, exist_ok=True)
+    sections = []
+    for name, heading, height in figure_sections(figs):
+        if write_figures:
+            figs[name].write_html(os.path.join(output_dir, f"{name}.html"))
+        sections.append(f"""
+    <div class="chart-container">
+        <h2>{heading}</h2>
+        <iframe src="{name}.html" width="100%" height="{height}"></iframe>
+    </div>""")
+
+    html = f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>{DASHBOARD_TITLE}</title>
+    <style>{PAGE_STYLE}
+    </style>
+</head>
+<body>
+    <h1>{DASHBOARD_TITLE}</h1>{''.join(sections)}
+</body>
+</html>
+"""
+    path = os.path.join(output_dir, filename)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return path
+
+
+def page_bytes(path: str) -> Dict:
+    """Bytes of a page plus the local iframes and scripts it pulls in"""
+    base_dir = os.path.dirname(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    local = [src for src in re.findall(r'<(?:iframe|script)[^>]*\bsrc="([^"]+)"', html)
+             if '://' not in src and os.path.exists(os.path.join(base_dir, src))]
+    total = os.path.getsize(path) + sum(os.path.getsize(os.path.join(base_dir, src)) for src in local)
+    return {'files': 1 + len(local), 'total_bytes': total}
+
+
+def page_load_seconds(path: str) -> Optional[float]:
+    """Time to the load event of every frame in headless Chromium (None without playwright)"""
+    if sync_playwright is None:
+        return None
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        page = browser.new_page()
+        start = time.perf_counter()
+        page.goto(f"file://{os.path.abspath(path)}", wait_until='load')
+        elapsed = time.perf_counter() - start
+        browser.close()
+    return round(elapsed, 3)
+
+
+def compare_layouts(figs: Dict, plotlyjs: str = 'directory') -> Dict[str, Dict]:
+    """Bytes and load time of the iframe layout against the single-page dashboard"""
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout, writer in [('iframes', write_iframe_dashboard),
+                               (f'single ({plotlyjs})', lambda f, d: write_dashboard(f, d, plotlyjs))]:
+            path = writer(figs, os.path.join(tmp, layout.split()[0]))
+            report[layout] = dict(page_bytes(path), load_seconds=page_load_seconds(path))
+    if sync_playwright is None:
+        print("Skipping page load timing (pip install playwright && playwright install chromium)")
+    return report
+
+
+def print_layout_report(report: Dict[str, Dict]):
+    print(f"\n{'Layout':<20}{'Files':>7}{'Total bytes':>14}{'Load (s)':>10}")
+    for layout, stats in report.items():
+        load = stats['load_seconds'] if stats['load_seconds'] is not None else '-'
+        print(f"{layout:<20}{stats['files']:>7}{stats['total_bytes']:>14}{load:>10}")
+
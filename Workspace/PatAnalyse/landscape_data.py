@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Data layer for the cGAS inhibitor patent landscape visualizations
+Loads the landscape JSON files once into indexed pandas frames and computes the
+chart aggregations (per year, jurisdiction, assignee, scaffold) with vectorized
+groupby operations instead of hard-coded lists
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+from family_dedup import AssigneeResolver, canonical_publication_number, company_key, compound_key, merge_records
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PATENT_DATA_FILE = "patent_data_structured.json"
+LANDSCAPE_FILE = "cgas_inhibitor_patent_landscape_data.json"
+CLINICAL_FILE = "clinical_competitive_intelligence.json"
+FINDINGS_FILE = "cgas_additional_findings.json"
+
+COMPANY_TYPES = {
+    'large_pharma': 'Large Pharma',
+    'biotech_companies': 'Biotech',
+    'academic_institutions': 'Academic'
+}
+
+JURISDICTION_CODES = {'Europe': 'EP', 'Japan': 'JP', 'China': 'CN', 'United States': 'US', 'WO_PCT': 'WO/PCT'}
+
+FAMILY_COLUMNS = ['assignee', 'title', 'priority_year', 'publication_year', 'scaffold', 'jurisdictions', 'source']
+
+RANGE_PATTERN = r'(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?'
+
+
+def load_json(path: str) -> Dict:
+    """JSON file contents, or an empty dict when the file is missing"""
+    if not os.path.exists(path):
+        print(f"Landscape data file not found: {path}")
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_range(values: pd.Series) -> pd.Series:
+    """'5-10' -> 7.5, '>75%' -> 75.0, '$2-3B' -> 2.5; NaN where no number is present"""
+    parts = values.astype(str).str.extract(RANGE_PATTERN).astype(float)
+    return parts.mean(axis=1)
+
+
+def parse_money_musd(values: pd.Series) -> pd.Series:
+    """First dollar amount in each string, in millions of USD"""
+    parts = values.fillna('').astype(str).str.extract(r'\$' + RANGE_PATTERN + r'\s*([MB])?')
+    amount = parts[[0, 1]].astype(float).mean(axis=1)
+    return amount.where(parts[2] != 'B', amount * 1000)
+
+
+def parse_phase(values: pd.Series) -> pd.Series:
+    """'Phase 2' -> 2; anything without a phase number counts as preclinical (0)"""
+    return values.fillna('').astype(str).str.extract(r'Phase\s*(\d)')[0].astype(float).fillna(0).astype(int)
+
+
+def display_name(key: str) -> str:
+    """'indole_derivatives' -> 'Indole Derivatives'; acronyms such as 'SLE' stay as they are"""
+    return key if key.isupper() else key.replace('_', ' ').title()
+
+
+def year_of(date: Optional[str]) -> Optional[int]:
+    return int(date[:4]) if isinstance(date, str) and date[:4].isdigit() else None
+
+
+def patent_family_records(patent_data: Dict) -> Iterator[Dict]:
+    """Flat family records from patent_data_structured.json (patent_families.<group>.<number>)"""
+    for group, patents in patent_data.get('patent_families', {}).items():
+        for number, patent in patents.items():
+            yield {
+                'publication_number': number,
+                'assignee': patent.get('assignee', ''),
+                'title': patent.get('title', ''),
+                'priority_date': patent.get('priority_date'),
+                'filing_date': patent.get('filing_date'),
+                'publication_date': patent.get('publication_date'),
+                'priority_year': year_of(patent.get('priority_date')),
+                'publication_year': year_of(patent.get('publication_date')),
+                'scaffold': patent.get('core_scaffold', ''),
+                'significance': patent.get('significance', ''),
+                'jurisdictions': [],
+                'source': f"patent_families.{group}"
+            }
+
+
+def finding_family_records(findings: Dict) -> Iterator[Dict]:
+    """Flat family records from the recent_patents list of cgas_additional_findings.json"""
+    for patent in findings.get('recent_patents', []):
+        yield {
+            'publication_number': patent['patent_number'],
+            'assignee': patent.get('applicant', ''),
+            'title': patent.get('title', ''),
+            'priority_date': None,
+            'filing_date': None,
+            'publication_date': None,
+            'priority_year': patent.get('priority_year'),
+            'publication_year': patent.get('year'),
+            'scaffold': patent.get('chemical_class', ''),
+            'significance': patent.get('status', ''),
+            'jurisdictions': [JURISDICTION_CODES.get(j, j) for j in patent.get('filing_jurisdictions', [])],
+            'source': 'recent_patents'
+        }
+
+
+class LandscapeData:
+    """Indexed frames built once from the landscape JSON files"""
+
+    def __init__(self, patent_data: Dict, landscape: Dict, clinical: Dict, findings: Optional[Dict] = None,
+                 families: Optional[pd.DataFrame] = None):
+        self.findings = (findings or {}).get('cgas_additional_findings_2022_2025', {})
+        # A prebuilt families frame (e.g. from landscape_stream) replaces the one built from the dicts
+        families = families if families is not None else self._build_families(patent_data)
+        self.resolver = self._build_resolver(families, landscape)
+        self.families = self._normalize_families(families)
+        self.filing_estimates = self._build_filing_estimates(patent_data, landscape)
+        self.jurisdiction_shares = self._build_jurisdiction_shares(landscape)
+        self.candidates = self._build_candidates(landscape)
+        self.companies = self._build_companies(landscape)
+        self.scaffolds = self._build_scaffolds(landscape)
+        self.indications = self._build_indications(landscape, clinical)
+
+    @classmethod
+    def load(cls, data_dir: str = DATA_DIR) -> 'LandscapeData':
+        return cls(load_json(os.path.join(data_dir, PATENT_DATA_FILE)),
+                   load_json(os.path.join(data_dir, LANDSCAPE_FILE)),
+                   load_json(os.path.join(data_dir, CLINICAL_FILE)),
+                   load_json(os.path.join(data_dir, FINDINGS_FILE)))
+
+    # Frame construction
+
+    def _build_families(self, patent_data: Dict) -> pd.DataFrame:
+        rows = list(patent_family_records(patent_data)) + list(finding_family_records(self.findings))
+        families = pd.DataFrame(rows, columns=['publication_number'] + FAMILY_COLUMNS)
+        families['priority_year'] = families['priority_year'].astype('float').astype('Int64')
+        families['publication_year'] = families['publication_year'].astype('float').astype('Int64')
+        return families.set_index('publication_number')
+
+    def _build_resolver(self, families: pd.DataFrame, landscape: Dict) -> AssigneeResolver:
+        """Assignee clusters over family assignees and every company named in the landscape files"""
+        resolver = AssigneeResolver()
+        for name, count in families['assignee'].value_counts().items():
+            resolver.add(name, count)
+        for companies in landscape.get('key_companies', {}).values():
+            for company in companies:
+                resolver.add(company)
+        for info in landscape.get('clinical_candidates', {}).values():
+            resolver.add(info.get('company', ''))
+        for change in self.findings.get('competitive_landscape_changes', []):
+            resolver.add(change['company'])
+        return resolver
+
+    def _normalize_families(self, families: pd.DataFrame) -> pd.DataFrame:
+        """Merge families sharing a canonical publication number and attach canonical assignee keys"""
+        keys = pd.Series(families.index.map(canonical_publication_number), index=families.index)
+        duplicated = keys.duplicated(keep=False).to_numpy()
+        families = families.assign(family_key=keys.to_numpy())
+
+        if duplicated.any():
+            order = families.index[~keys.duplicated().to_numpy()]
+            dups = families[duplicated].astype(object)
+            merged = {}
+            for record in dups.where(dups.notna(), None).reset_index().to_dict('records'):
+                key = record['family_key']
+                merged[key] = merge_records(merged[key], record) if key in merged else record
+            replacement = pd.DataFrame(list(merged.values())).set_index('publication_number')
+            families = pd.concat([families[~duplicated], replacement]).loc[order]
+            for column in ('priority_year', 'publication_year'):
+                families[column] = families[column].astype('Float64').astype('Int64')
+
+        names = {name: self.resolver.key(name) for name in families['assignee'].unique()}
+        families['assignee_key'] = families['assignee'].map(names)
+        return families
+
+    def _build_filing_estimates(self, patent_data: Dict, landscape: Dict) -> pd.DataFrame:
+        detailed = pd.DataFrame.from_dict(patent_data.get('filing_trends_detailed', {}), orient='index')
+        if detailed.empty:
+            return pd.DataFrame(columns=['estimated_families', 'activity'])
+        detailed.index = detailed.index.astype(int)
+        activity = pd.Series({year: trend.get('activity') for year, trend in
+                              landscape.get('patent_filing_trends', {}).items()}, dtype=object)
+        estimates = pd.DataFrame({'estimated_families': parse_range(detailed['estimated_families']),
+                                  'key_developments': detailed.get('key_developments')})
+        estimates['activity'] = activity.reindex(estimates.index.astype(str)).to_numpy()
+        estimates.index.name = 'year'
+        return estimates.sort_index()
+
+    def _build_jurisdiction_shares(self, landscape: Dict) -> pd.Series:
+        distribution = landscape.get('geographic_distribution', {})
+        shares = parse_range(pd.Series({code: entry.get('percentage', '') for code, entry in distribution.items()},
+                                       dtype=object))
+        shares.index = [JURISDICTION_CODES.get(code, code) for code in shares.index]
+        shares.index.name = 'jurisdiction'
+        return shares.rename('percentage')
+
+    def _build_candidates(self, landscape: Dict) -> pd.DataFrame:
+        trials = pd.DataFrame(self.findings.get('clinical_trials', []), columns=['compound', 'phase'])
+        trial_phase = pd.Series(parse_phase(trials['phase']).to_numpy(), index=trials['compound'].map(compound_key))
+        trial_phase = trial_phase.groupby(level=0).max()
+
+        # Compounds named only in a company's profile (e.g. Pfizer's key_compounds) get that company
+        mentioned_by = {}
+        for group in landscape.get('key_companies', {}).values():
+            for company, profile in group.items():
+                for compound in profile.get('key_compounds', []) + [profile.get('lead_candidate', '')]:
+                    mentioned_by.setdefault(compound_key(compound), company)
+
+        rows = []
+        for compound, info in landscape.get('clinical_candidates', {}).items():
+            primary = info.get('target_indications', {}).get('primary', '')
+            rows.append({
+                'compound': compound,
+                'company': info.get('company') or mentioned_by.get(compound_key(compound), ''),
+                'indication': primary.split(' (')[0] if primary else info.get('status', ''),
+                'status': info.get('status', '')
+            })
+        candidates = pd.DataFrame(rows, columns=['compound', 'company', 'indication', 'status'])
+        keys = candidates['compound'].map(compound_key)
+        candidates['phase'] = keys.map(trial_phase).fillna(parse_phase(candidates['status'])).astype(int)
+        candidates['company_key'] = candidates['company'].map(self.resolver.key)
+        return candidates.set_index('compound')
+
+    def _build_companies(self, landscape: Dict) -> pd.DataFrame:
+        rows = []
+        for group, companies in landscape.get('key_companies', {}).items():
+            for company, profile in companies.items():
+                rows.append({
+                    'company': company,
+                    'company_type': COMPANY_TYPES.get(group, display_name(group)),
+                    'chemical_focus': profile.get('chemical_focus', ''),
+                    'funding_text': profile.get('funding') or profile.get('key_activities', '')
+                })
+        for change in self.findings.get('competitive_landscape_changes', []):
+            rows.append({
+                'company': change['company'],
+                'company_type': 'Large Pharma' if 'Big Pharma' in change.get('status', '') else 'Biotech',
+                'chemical_focus': change.get('focus', ''),
+                'funding_text': change.get('investment', '')
+            })
+
+        companies = pd.DataFrame(rows, columns=['company', 'company_type', 'chemical_focus', 'funding_text'])
+        companies['company_key'] = companies['company'].map(self.resolver.key)
+        # The curated key_companies entries come first, so they win over later mentions
+        companies = companies.drop_duplicates('company_key').set_index('company')
+        companies['funding_musd'] = parse_money_musd(companies.pop('funding_text')).fillna(0.0)
+        return companies
+
+    def _build_scaffolds(self, landscape: Dict) -> pd.DataFrame:
+        rows = [{'scaffold': display_name(key), 'companies': info.get('companies', []),
+                 'lead_compound': info.get('lead_compound', '')}
+                for key, info in landscape.get('chemical_scaffolds', {}).items()]
+        return pd.DataFrame(rows, columns=['scaffold', 'companies', 'lead_compound']).set_index('scaffold')
+
+    def _build_indications(self, landscape: Dict, clinical: Dict) -> pd.DataFrame:
+        rows = []
+        for tier, indications in landscape.get('target_diseases', {}).items():
+            for key, info in indications.items():
+                candidates = info.get('clinical_candidates', []) if isinstance(info, dict) else []
+                rows.append({'indication': display_name(key), 'tier': tier.replace('_indications', ''),
+                             'candidates': candidates})
+        indications = pd.DataFrame(rows, columns=['indication', 'tier', 'candidates']).set_index('indication')
+
+        markets = clinical.get('market_dynamics', {})
+        sizes = pd.Series({key[:-len('_market')].upper(): entry.get('size', '')
+                           for key, entry in markets.items() if key.endswith('_market')}, dtype=object)
+        indications['market_size_busd'] = (parse_money_musd(sizes) / 1000).reindex(indications.index)
+        return indications
+
+    # Aggregations fed to the chart builders
+
+    def filings_per_year(self) -> pd.Series:
+        """Curated family estimates per year, else family records counted by priority year"""
+        if not self.filing_estimates.empty:
+            return self.filing_estimates['estimated_families'].rename('filings')
+        counts = self.families.dropna(subset=['priority_year']).groupby('priority_year').size()
+        return counts.rename('filings').rename_axis('year')
+
+    def filings_per_jurisdiction(self) -> pd.Series:
+        """Share of families filed per jurisdiction (%)"""
+        if not self.jurisdiction_shares.empty:
+            return self.jurisdiction_shares
+        exploded = self.families['jurisdictions'].explode().dropna()
+        if exploded.empty:
+            return pd.Series(dtype=float, name='percentage')
+        return (exploded.value_counts() / len(self.families) * 100).rename('percentage').rename_axis('jurisdiction')
+
+    def filings_per_assignee(self) -> pd.Series:
+        """Patent family count per company matching key"""
+        return self.families.groupby('assignee_key').size().rename('patent_families')
+
+    def filings_per_scaffold(self) -> pd.Series:
+        return self.families.groupby('scaffold').size().rename('patent_families')
+
+    def company_summary(self) -> pd.DataFrame:
+        """Clinical phase, patent families, funding and type for each tracked company"""
+        summary = self.companies[['company_type', 'funding_musd', 'company_key']].copy()
+        best_phase = self.candidates.groupby('company_key')['phase'].max()
+        summary['clinical_phase'] = summary['company_key'].map(best_phase).fillna(0).astype(int)
+        summary['patent_families'] = summary['company_key'].map(self.filings_per_assignee()).fillna(0).astype(int)
+        return summary.drop(columns='company_key')
+
+    def scaffold_summary(self) -> pd.DataFrame:
+        """Companies and clinical-stage lead compounds per scaffold"""
+        summary = pd.DataFrame(index=self.scaffolds.index)
+        summary['companies'] = self.scaffolds['companies'].str.len().fillna(0).astype(int)
+        phases = self.candidates['phase'].rename(index=compound_key)
+        lead_phase = self.scaffolds['lead_compound'].map(compound_key).map(phases)
+        summary['clinical_candidates'] = (lead_phase > 0).astype(int)
+        return summary
+
+    def clinical_pipeline(self) -> pd.DataFrame:
+        return self.candidates[['phase', 'company', 'indication']]
+
+    def indication_summary(self) -> pd.DataFrame:
+        """Clinical programs and market size (billion USD, NaN when unknown) per indication"""
+        summary = pd.DataFrame(index=self.indications.index)
+        summary['clinical_programs'] = self.indications['candidates'].str.len().fillna(0).astype(int)
+        summary['market_size_busd'] = self.indications['market_size_busd']
+        return summary
+
+
+@lru_cache(maxsize=None)
+def load_landscape(data_dir: str = DATA_DIR) -> LandscapeData:
+    """Shared LandscapeData per data directory, so every builder reads the JSON once"""
+    return LandscapeData.load(data_dir)
+
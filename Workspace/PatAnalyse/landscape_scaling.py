@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Large-landscape helpers for the cGAS patent visualizations
+Family-level records are pre-aggregated in NumPy (category codes, bincount
+grids, top-N folding) so traces carry a bounded number of points; above a
+configurable point count the builders switch to WebGL traces and then to
+binned heatmaps, keeping HTML size and browser frame time flat
+"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Points drawn with SVG below this, with WebGL (Scattergl) above
+WEBGL_POINT_THRESHOLD = 1000
+# Records binned into a count raster above this, datashader style
+BIN_POINT_THRESHOLD = 20000
+# Bars / heatmap rows shown before the tail is folded into 'Other'
+MAX_CATEGORIES = 40
+
+OTHER_LABEL = 'Other'
+
+
+def category_codes(values: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted unique labels and an integer code per value"""
+    labels, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return labels, codes.ravel()
+
+
+def fold_categories(labels: np.ndarray, codes: np.ndarray,
+                    max_categories: int = MAX_CATEGORIES) -> Tuple[np.ndarray, np.ndarray]:
+    """Order categories by frequency and fold everything past max_categories - 1 into 'Other'
+
+    max_categories <= 0 means no limit, as in top_rows.
+    """
+    counts = np.bincount(codes, minlength=len(labels))
+    order = np.argsort(-counts, kind='stable')
+    folded = 0 < max_categories < len(labels)
+    keep = order[:max_categories - 1] if folded else order
+
+    remap = np.full(len(labels), len(keep), dtype=np.int64)
+    remap[keep] = np.arange(len(keep))
+    new_labels = labels[keep]
+    if folded:
+        new_labels = np.append(new_labels, OTHER_LABEL)
+    return new_labels, remap[codes]
+
+
+def grid_counts(x_codes: np.ndarray, y_codes: np.ndarray, nx: int, ny: int) -> np.ndarray:
+    """Record count per (y, x) cell in one bincount pass"""
+    return np.bincount(y_codes * nx + x_codes, minlength=nx * ny).reshape(ny, nx)
+
+
+def top_rows(frame: pd.DataFrame, max_rows: int, sort_by: Sequence[str]) -> pd.DataFrame:
+    """Largest rows by sort_by when a category frame is longer than max_rows, else unchanged"""
+    if max_rows <= 0 or len(frame) <= max_rows:
+        return frame
+    return frame.sort_values(list(sort_by), ascending=False, kind='stable').head(max_rows)
+
+
+def point_trace(x: np.ndarray, y: np.ndarray, webgl_threshold: int = WEBGL_POINT_THRESHOLD, **kwargs):
+    """Scatter for small point counts, Scattergl past the WebGL threshold"""
+    trace_class = go.Scattergl if len(x) > webgl_threshold else go.Scatter
+    return trace_class(x=x, y=y, **kwargs)
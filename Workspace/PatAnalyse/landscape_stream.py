@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Streaming ingestion for large landscape JSON exports
+Parses patent_data_structured.json / cgas_additional_findings.json shaped files
+with ijson events, turning each patent family into a compact __slots__ record
+as soon as it has been read, and packs records into NumPy structured arrays for
+the chart aggregations, so the full JSON tree is never materialized
+"""
+
+import os
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from landscape_data import (CLINICAL_FILE, DATA_DIR, FAMILY_COLUMNS, FINDINGS_FILE, JURISDICTION_CODES,
+                            LANDSCAPE_FILE, PATENT_DATA_FILE, LandscapeData, load_json, year_of)
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+FINDINGS_KEY = 'cgas_additional_findings_2022_2025'
+
+# JSON field -> FamilyRecord attribute, per source shape
+PATENT_FAMILY_FIELDS = {
+    'assignee': 'assignee', 'title': 'title', 'priority_date': 'priority_date', 'filing_date': 'filing_date',
+    'publication_date': 'publication_date', 'core_scaffold': 'scaffold', 'significance': 'significance'
+}
+RECENT_PATENT_FIELDS = {
+    'patent_number': 'publication_number', 'applicant': 'assignee', 'title': 'title',
+    'priority_year': 'priority_year', 'year': 'publication_year', 'chemical_class': 'scaffold',
+    'status': 'significance'
+}
+
+# Small summary sections kept whole while the family lists stream past
+PATENT_DATA_SECTIONS = [('filing_trends_detailed',)]
+FINDINGS_SECTIONS = [(FINDINGS_KEY, 'clinical_trials'), (FINDINGS_KEY, 'competitive_landscape_changes')]
+
+FAMILY_DTYPE = np.dtype([
+    ('priority_year', 'i2'),
+    ('publication_year', 'i2'),
+    ('assignee', 'i4'),
+    ('scaffold', 'i4'),
+    ('source', 'i4')
+])
+MISSING_YEAR = -1
+
+
+class FamilyRecord:
+    """One patent family, normalized from either source shape"""
+
+    __slots__ = ('publication_number', 'assignee', 'title', 'priority_date', 'filing_date', 'publication_date',
+                 'priority_year', 'publication_year', 'scaffold', 'significance', 'jurisdictions', 'source')
+
+    def __init__(self, publication_number: str = '', source: str = ''):
+        self.publication_number = publication_number
+        self.assignee = ''
+        self.title = ''
+        self.priority_date = None
+        self.filing_date = None
+        self.publication_date = None
+        self.priority_year = None
+        self.publication_year = None
+        self.scaffold = ''
+        self.significance = ''
+        self.jurisdictions = []
+        self.source = source
+
+    def finish(self) -> 'FamilyRecord':
+        """Fill years from dates where only the dates were given"""
+        if self.priority_year is None:
+            self.priority_year = year_of(self.priority_date)
+        if self.publication_year is None:
+            self.publication_year = year_of(self.publication_date)
+        return self
+
+    def as_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def require_ijson():
+    if ijson is None:
+        raise ImportError("ijson is required for streaming ingestion (pip install ijson)")
+
+
+def stream_family_records(path: str, sections: Optional[Dict[Tuple, object]] = None) -> Iterator[FamilyRecord]:
+    """Yield family records from a landscape JSON file as the parser reaches them
+
+    Handles patent_families.<group>.<number> maps and recent_patents lists. Paths
+    given as keys of sections are built whole into that dict (they must be small).
+    """
+    require_ijson()
+    capture = set(sections or ())
+    stack = []
+    record, record_depth, fields = None, None, None
+    builder, builder_path = None, None
+
+    with open(path, 'rb') as f:
+        for _, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                if event != 'map_key' or len(stack) > len(builder_path):
+                    builder.event(event, value)
+
+            if event == 'map_key':
+                stack[-1] = value
+                if builder is None and tuple(stack) in capture:
+                    builder, builder_path = ijson.ObjectBuilder(), tuple(stack)
+                continue
+
+            if event in ('start_map', 'start_array'):
+                if record is None and event == 'start_map':
+                    if len(stack) == 3 and stack[0] == 'patent_families':
+                        record = FamilyRecord(stack[2], f"patent_families.{stack[1]}")
+                        record_depth, fields = len(stack), PATENT_FAMILY_FIELDS
+                    elif len(stack) >= 2 and stack[-2:] == ['recent_patents', 'item']:
+                        record = FamilyRecord(source='recent_patents')
+                        record_depth, fields = len(stack), RECENT_PATENT_FIELDS
+                stack.append(None if event == 'start_map' else 'item')
+                continue
+
+            if event in ('end_map', 'end_array'):
+                stack.pop()
+                if record is not None and len(stack) == record_depth:
+                    yield record.finish()
+                    record = None
+            elif record is not None:
+                relative = stack[record_depth:]
+                if len(relative) == 1 and relative[0] in fields:
+                    setattr(record, fields[relative[0]], value)
+                elif relative == ['filing_jurisdictions', 'item'] and fields is RECENT_PATENT_FIELDS:
+                    record.jurisdictions.append(JURISDICTION_CODES.get(value, value))
+
+            if builder is not None and len(stack) == len(builder_path):
+                sections[builder_path] = builder.value
+                builder, builder_path = None, None
+
+
+def nest_sections(sections: Dict[Tuple, object]) -> Dict:
+    """{('a', 'b'): value} -> {'a': {'b': value}}"""
+    tree = {}
+    for path, value in sections.items():
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return tree
+
+
+class FamilyTable:
+    """Columnar family table filled one record at a time
+
+    Rows live in FAMILY_DTYPE structured arrays; assignee, scaffold and source strings
+    are interned to integer codes and jurisdictions are kept as CSR codes/offsets.
+    Publication numbers and titles are unique per family and kept as plain lists.
+    """
+
+    def __init__(self, chunk_rows: int = 65536):
+        self.chunk_rows = chunk_rows
+        self.chunks = []
+        self.buffer = np.zeros(chunk_rows, dtype=FAMILY_DTYPE)
+        self.filled = 0
+        self.labels = {'assignee': {}, 'scaffold': {}, 'source': {}, 'jurisdiction': {}}
+        self.publication_numbers = []
+        self.titles = []
+        self.jurisdiction_codes = []
+        self.jurisdiction_offsets = [0]
+
+    def intern(self, table: str, text: str) -> int:
+        codes = self.labels[table]
+        code = codes.get(text)
+        if code is None:
+            code = codes[text] = len(codes)
+        return code
+
+    def append(self, record: FamilyRecord):
+        row = self.buffer[self.filled]
+        row['priority_year'] = record.priority_year if record.priority_year is not None else MISSING_YEAR
+        row['publication_year'] = record.publication_year if record.publication_year is not None else MISSING_YEAR
+        row['assignee'] = self.intern('assignee', record.assignee or '')
+        row['scaffold'] = self.intern('scaffold', record.scaffold or '')
+        row['source'] = self.intern('source', record.source)
+        self.publication_numbers.append(record.publication_number)
+        self.titles.append(record.title)
+        self.jurisdiction_codes.extend(self.intern('jurisdiction', j) for j in record.jurisdictions)
+        self.jurisdiction_offsets.append(len(self.jurisdiction_codes))
+
+        self.filled += 1
+        if self.filled == self.chunk_rows:
+            self.chunks.append(self.buffer)
+            self.buffer = np.zeros(self.chunk_rows, dtype=FAMILY_DTYPE)
+            self.filled = 0
+
+    def extend(self, records) -> 'FamilyTable':
+        for record in records:
+            self.append(record)
+        return self
+
+    def rows(self) -> np.ndarray:
+        return np.concatenate(self.chunks + [self.buffer[:self.filled]])
+
+    def label_array(self, table: str) -> np.ndarray:
+        return np.array(list(self.labels[table]), dtype=object)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Families frame with the columns and dtypes LandscapeData._build_families produces"""
+        rows = self.rows()
+        jurisdictions = self.label_array('jurisdiction')
+        offsets = np.array(self.jurisdiction_offsets)
+        codes = np.array(self.jurisdiction_codes, dtype=np.int64)
+
+        def years(column):
+            values = rows[column].astype('float')
+            values[rows[column] == MISSING_YEAR] = np.nan
+            return pd.array(values, dtype='Int64')
+
+        def labels(column):
+            return self.label_array(column)[rows[column]].tolist()
+
+        frame = pd.DataFrame({
+            'assignee': labels('assignee'),
+            'title': self.titles,
+            'priority_year': years('priority_year'),
+            'publication_year': years('publication_year'),
+            'scaffold': labels('scaffold'),
+            'jurisdictions': [list(jurisdictions[codes[start:stop]]) for start, stop in zip(offsets[:-1], offsets[1:])],
+            'source': labels('source'),
+        }, index=pd.Index(self.publication_numbers, name='publication_number'))
+        # Repeated publication numbers are merged by LandscapeData, as for loaded files
+        return frame[FAMILY_COLUMNS]
+
+
+def stream_landscape(data_dir: str = DATA_DIR, family_files: Optional[Sequence[str]] = None) -> LandscapeData:
+    """LandscapeData whose families come from streamed files instead of json.load
+
+    A drop-in replacement for LandscapeData.load: the families frame has the same
+    columns, dtypes and row order. The curated landscape and clinical summaries are
+    small and still loaded whole.
+    """
+    family_files = family_files or [os.path.join(data_dir, PATENT_DATA_FILE), os.path.join(data_dir, FINDINGS_FILE)]
+    sections = {path: None for path in PATENT_DATA_SECTIONS + FINDINGS_SECTIONS}
+    table = FamilyTable()
+    for path in family_files:
+        if not os.path.exists(path):
+            print(f"Landscape data file not found: {path}")
+            continue
+        table.extend(stream_family_records(path, sections))
+
+    tree = nest_sections({path: value for path, value in sections.items() if value is not None})
+    findings = {FINDINGS_KEY: tree.pop(FINDINGS_KEY, {})}
+    return LandscapeData(tree, load_json(os.path.join(data_dir, LANDSCAPE_FILE)),
+                         load_json(os.path.join(data_dir, CLINICAL_FILE)), findings, families=table.to_frame())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unified command line for the cGAS patent analysis workspace
+    patanalyse.py structures|charts|dashboard|query|pdfs|xref|report|bench [options]
+Each subcommand imports its modules (and with them pandas, plotly or RDKit)
+only when it runs, so a store query or --help does not pay for the chart and
+structure stacks; --startup-report measures the cold start of every subcommand
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+WORKSPACE_DIR = os.path.dirname(os.path.abspath(__file__))
+STRUCTURES_DIR = os.path.join(WORKSPACE_DIR, "cgas_structures")
+
+
+def load_structures() -> Callable:
+    # The structure modules import each other as flat siblings
+    if STRUCTURES_DIR not in sys.path:
+        sys.path.insert(0, STRUCTURES_DIR)
+    from generate_cgas_structures import main
+    return main
+
+
+def load_charts() -> Callable:
+    from create_patent_visualizations import main
+    return main
+
+
+def load_query() -> Callable:
+    from patent_store import main
+    return main
+
+
+def load_pdfs() -> Callable:
+    from pdf_ingest import main
+    return main
+
+
+def load_xref() -> Callable:
+    from crossref_index import main
+    return main
+
+
+def load_report() -> Callable:
+    from report_builder import main
+    return main
+
+
+def load_bench() -> Callable:
+    from benchmark_visualizations import main
+    return main
+
+
+# name -> (loader of the subcommand's main, leading arguments, help)
+COMMANDS: Dict[str, Tuple[Callable, List[str], str]] = {
+    'structures': (load_structures, [], "Generate compound structures, images and descriptors"),
+    'charts': (load_charts, [], "Build and export the patent landscape charts"),
+    # Later --layout options still win over the leading one
+    'dashboard': (load_charts, ['--layout', 'single'], "Build the charts into the single-page dashboard"),
+    'query': (load_query, [], "Build or query the SQLite patent family store"),
+    'pdfs': (load_pdfs, [], "Extract patent numbers and compound mentions from the uploaded PDFs"),
+    'xref': (load_xref, [], "Look up compounds, patent families, trials and companies in the cross-reference index"),
+    'report': (load_report, [], "Render the Markdown/PDF reports from report_templates/, re-rendering changed sections"),
+    'bench': (load_bench, [], "Benchmark the charts on synthetic landscapes and check for size/time regressions")
+}
+
+
+def startup_times(commands: Optional[List[str]] = None, repeats: int = 5) -> Dict[str, float]:
+    """Median wall time (seconds) of a fresh interpreter running '<command> --help'
+
+    --help makes each subcommand import everything it needs and exit before doing
+    any work, so this is the cold-start cost a user pays on every invocation.
+    """
+    script = os.path.abspath(__file__)
+    times = {}
+    for command in [None] + list(commands or COMMANDS):
+        argv = [sys.executable, script] + ([command] if command else []) + ['--help']
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            samples.append(time.perf_counter() - start)
+        times[command or '(none)'] = statistics.median(samples)
+    return times
+
+
+def print_startup_report(times: Dict[str, float]):
+    print(f"{'subcommand':<12} {'cold start':>12}")
+    for command, seconds in times.items():
+        print(f"{command:<12} {seconds * 1000:>9.0f} ms")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="patanalyse", description="cGAS patent analysis workspace",
+        epilog="Options after the subcommand are passed to it; run 'patanalyse <subcommand> --help' for them")
+    parser.add_argument("--time", action="store_true", help="Report the import and run time of the subcommand")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Measure the cold-start time of every subcommand and exit")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per subcommand for --startup-report")
+    parser.add_argument("command", nargs="?", choices=list(COMMANDS),
+                        help="; ".join(f"{name}: {text}" for name, (_, _, text) in COMMANDS.items()))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.startup_report:
+        print_startup_report(startup_times(repeats=args.repeats))
+        return
+    if args.command is None:
+        parser.print_help()
+        return
+
+    loader, leading, _ = COMMANDS[args.command]
+    start = time.perf_counter()
+    command_main = loader()
+    imported = time.perf_counter()
+    try:
+        command_main(leading + args.args)
+    finally:
+        if args.time:
+            print(f"patanalyse {args.command}: imports {imported - start:.2f} s, "
+                  f"run {time.perf_counter() - imported:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Local SQLite store for cGAS patent families
+Ingests the family records from the workspace JSON files into an indexed table
+(publication number, assignee, priority dates, jurisdiction) with an FTS5 index
+over title, significance and scaffold text, and answers filtered queries
+without walking the nested JSON trees
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from family_dedup import AssigneeResolver, canonical_publication_number, merge_records
+
+# The workspace directory (landscape_data.DATA_DIR); landscape_data pulls in pandas,
+# so it is only imported when the store is built from the JSON files
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STORE_FILENAME = "patent_store.sqlite"
+INGEST_BATCH_SIZE = 10000
+# Bumped when the table layout changes; older stores are dropped and rebuilt on open
+SCHEMA_VERSION = 3
+
+FAMILY_FIELDS = ['publication_number', 'family_key', 'assignee', 'assignee_key', 'title', 'priority_date', 'filing_date',
+                 'publication_date', 'priority_year', 'publication_year', 'scaffold', 'significance', 'source']
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS families (
+        id INTEGER PRIMARY KEY,
+        publication_number TEXT NOT NULL UNIQUE,
+        family_key TEXT NOT NULL UNIQUE,
+        assignee TEXT,
+        assignee_key TEXT,
+        title TEXT,
+        priority_date TEXT,
+        filing_date TEXT,
+        publication_date TEXT,
+        priority_year INTEGER,
+        publication_year INTEGER,
+        scaffold TEXT,
+        significance TEXT,
+        source TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_families_assignee ON families(assignee);
+    CREATE INDEX IF NOT EXISTS idx_families_assignee_key ON families(assignee_key);
+    CREATE INDEX IF NOT EXISTS idx_families_priority ON families(priority_year, priority_date);
+    CREATE INDEX IF NOT EXISTS idx_families_publication_year ON families(publication_year);
+
+    CREATE TABLE IF NOT EXISTS family_jurisdictions (
+        jurisdiction TEXT NOT NULL,
+        family_id INTEGER NOT NULL REFERENCES families(id) ON DELETE CASCADE,
+        PRIMARY KEY (jurisdiction, family_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_family_jurisdictions_family ON family_jurisdictions(family_id);
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS families_fts USING fts5(
+        title, significance, scaffold, content='families', content_rowid='id'
+    );
+    CREATE TRIGGER IF NOT EXISTS families_ai AFTER INSERT ON families BEGIN
+        INSERT INTO families_fts(rowid, title, significance, scaffold)
+        VALUES (new.id, new.title, new.significance, new.scaffold);
+    END;
+    CREATE TRIGGER IF NOT EXISTS families_ad AFTER DELETE ON families BEGIN
+        INSERT INTO families_fts(families_fts, rowid, title, significance, scaffold)
+        VALUES ('delete', old.id, old.title, old.significance, old.scaffold);
+    END;
+"""
+
+DROP_SCHEMA = """
+    DROP TRIGGER IF EXISTS families_ai;
+    DROP TRIGGER IF EXISTS families_ad;
+    DROP TABLE IF EXISTS families_fts;
+    DROP TABLE IF EXISTS family_jurisdictions;
+    DROP TABLE IF EXISTS families;
+"""
+
+
+def fts_terms(text: str) -> str:
+    """Quoted FTS5 prefix terms, so 'indol' finds indole/indolone and '[4,5-b]' is not parsed as syntax"""
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+
+class PatentStore:
+    """Indexed patent-family table with a filter and full-text query API"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript(DROP_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+        self._resolver = None  # AssigneeResolver over the stored spellings, rebuilt after each ingest
+
+    def ingest(self, records: Iterable[Dict], batch_size: int = INGEST_BATCH_SIZE) -> int:
+        """Insert or replace family records in batched transactions; returns the number of records read
+
+        Records are keyed by canonical publication number. A record with the stored
+        family's own publication number replaces it; a differently formatted number
+        for the same family is merged into it as in family_dedup.deduplicate_families.
+        """
+        records = iter(records)
+        count = 0
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                self.resolve_assignees()
+                return count
+            with self.conn:
+                families = self._merge_families(batch)
+                keys = [(key,) for key in families]
+                # Replacing goes through DELETE so the FTS trigger and jurisdiction rows follow
+                self.conn.executemany("DELETE FROM families WHERE family_key = ?", keys)
+                self.conn.executemany(
+                    f"INSERT INTO families ({', '.join(FAMILY_FIELDS)}) VALUES ({', '.join('?' * len(FAMILY_FIELDS))})",
+                    ([dict(family, assignee_key=AssigneeResolver.normalize(family.get('assignee'))).get(field)
+                      for field in FAMILY_FIELDS] for family in families.values())
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO family_jurisdictions (jurisdiction, family_id) "
+                    "SELECT ?, id FROM families WHERE family_key = ?",
+                    ((jurisdiction, key) for key, family in families.items()
+                     for jurisdiction in family.get('jurisdictions') or [])
+                )
+            count += len(batch)
+
+    def _merge_families(self, batch: List[Dict]) -> Dict[str, Dict]:
+        """Batch records by family key, merged with each other and with the stored families"""
+        families = {}
+        for record in batch:
+            key = canonical_publication_number(record['publication_number'])
+            record = dict(record, family_key=key)
+            existing = families.get(key)
+            if existing is None or existing['publication_number'] == record['publication_number']:
+                families[key] = record
+            else:
+                merge_records(existing, record)
+
+        keys = list(families)
+        for start in range(0, len(keys), 900):
+            chunk = keys[start:start + 900]
+            rows = [dict(row) for row in self.conn.execute(
+                f"SELECT * FROM families WHERE family_key IN ({', '.join('?' * len(chunk))})", chunk)]
+            for stored in self._attach_jurisdictions(rows):
+                family = families[stored['family_key']]
+                if stored['publication_number'] != family['publication_number']:
+                    families[stored['family_key']] = merge_records(stored, family)
+        return families
+
+    def load_resolver(self) -> AssigneeResolver:
+        """AssigneeResolver over every stored assignee spelling, weighted by its family count"""
+        resolver = AssigneeResolver()
+        for assignee, families in self.conn.execute(
+                "SELECT assignee, COUNT(*) FROM families WHERE assignee IS NOT NULL GROUP BY assignee"):
+            resolver.add(assignee, families)
+        return resolver
+
+    def resolve_assignees(self):
+        """Re-key every family by its assignee's cluster, as deduplicate_families does in memory
+
+        Runs after each ingest, since new spellings can join or merge clusters.
+        """
+        self._resolver = self.load_resolver()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE families SET assignee_key = ? WHERE assignee = ? AND assignee_key IS NOT ?",
+                ((key, spelling, key) for spelling, key in self._resolver.mapping().items()))
+
+    def assignee_key(self, name: str) -> str:
+        """Stored cluster key for an assignee spelling; unseen spellings are matched against the stored ones"""
+        if self._resolver is None:
+            self._resolver = self.load_resolver()
+        if AssigneeResolver.normalize(name) in self._resolver.counts:
+            return self._resolver.key(name)
+        # A zero count joins the spelling to a cluster without changing which key the cluster has
+        resolver = self.load_resolver()
+        resolver.add(name, 0)
+        return resolver.key(name)
+
+    def ingest_workspace(self, data_dir: str = DATA_DIR) -> int:
+        """Load the family records of patent_data_structured.json and the additional findings"""
+        from landscape_data import (FINDINGS_FILE, PATENT_DATA_FILE, finding_family_records, load_json,
+                                    patent_family_records)
+
+        patent_data = load_json(os.path.join(data_dir, PATENT_DATA_FILE))
+        findings = load_json(os.path.join(data_dir, FINDINGS_FILE)).get('cgas_additional_findings_2022_2025', {})
+        count = self.ingest(patent_family_records(patent_data))
+        count += self.ingest(finding_family_records(findings))
+        return count
+
+    def ingest_stream(self, paths) -> int:
+        """Stream family records out of large JSON exports without loading them whole"""
+        from landscape_stream import stream_family_records
+
+        return sum(self.ingest(record.as_dict() for record in stream_family_records(path)) for path in paths)
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM families").fetchone()[0]
+
+    def get(self, publication_number: str) -> Optional[Dict]:
+        rows = self.query(publication_number=publication_number, limit=1)
+        return rows[0] if rows else None
+
+    def query(self, text: Optional[str] = None, assignee: Optional[str] = None, scaffold: Optional[str] = None,
+              jurisdiction: Optional[str] = None, priority_after: Optional[str] = None,
+              priority_before: Optional[str] = None, publication_number: Optional[str] = None,
+              limit: Optional[int] = 100) -> List[Dict]:
+        """Families matching every given filter
+
+        text searches title and significance, scaffold searches the scaffold text (words
+        match as prefixes), assignee is resolved to the same cluster of spellings as at ingest
+        ('Ventus' finds 'Ventus Therapeutics U.S., Inc.'), and priority bounds are exclusive
+        ISO dates or years ('2020' as priority_after means 2021 onwards). Families known only
+        by priority year match a date bound when that year overlaps it. Full-text results
+        are ranked by relevance, everything else by priority date.
+        """
+        joins, where, params = [], [], []
+        order = "f.priority_year IS NULL, f.priority_year, f.priority_date, f.publication_number"
+
+        match = []
+        if text:
+            match.append(f"{{title significance}} : ({fts_terms(text)})")
+        if scaffold:
+            match.append(f"scaffold : ({fts_terms(scaffold)})")
+        if match:
+            joins.append("JOIN families_fts ON families_fts.rowid = f.id")
+            where.append("families_fts MATCH ?")
+            params.append(' AND '.join(match))
+            order = "families_fts.rank"
+
+        if jurisdiction:
+            joins.append("JOIN family_jurisdictions j ON j.family_id = f.id AND j.jurisdiction = ?")
+            params.insert(0, jurisdiction.upper())
+        if assignee:
+            where.append("f.assignee_key = ?")
+            params.append(self.assignee_key(assignee))
+        if publication_number:
+            where.append("f.family_key = ?")
+            params.append(canonical_publication_number(publication_number))
+        if priority_after:
+            bound = str(priority_after)
+            if len(bound) == 4:
+                where.append("f.priority_year > ?")
+                params.append(int(bound))
+            else:
+                where.append("f.priority_year >= ? AND (f.priority_date IS NULL OR f.priority_date > ?)")
+                params.extend([int(bound[:4]), bound])
+        if priority_before:
+            bound = str(priority_before)
+            if len(bound) == 4:
+                where.append("f.priority_year < ?")
+                params.append(int(bound))
+            else:
+                where.append("f.priority_year <= ? AND (f.priority_date IS NULL OR f.priority_date < ?)")
+                params.extend([int(bound[:4]), bound])
+
+        sql = f"SELECT f.* FROM families f {' '.join(joins)}"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        sql += f" ORDER BY {order}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = [dict(row) for row in self.conn.execute(sql, params)]
+        return self._attach_jurisdictions(rows)
+
+    def _attach_jurisdictions(self, rows: List[Dict]) -> List[Dict]:
+        if not rows:
+            return rows
+        ids = [row['id'] for row in rows]
+        by_family = {}
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            for family_id, jurisdiction in self.conn.execute(
+                    f"SELECT family_id, jurisdiction FROM family_jurisdictions "
+                    f"WHERE family_id IN ({', '.join('?' * len(chunk))})", chunk):
+                by_family.setdefault(family_id, []).append(jurisdiction)
+        for row in rows:
+            row['jurisdictions'] = sorted(by_family.get(row.pop('id'), []))
+        return rows
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or query the cGAS patent family store")
+    parser.add_argument("--db", default=os.path.join(DATA_DIR, STORE_FILENAME))
+    parser.add_argument("--build", action="store_true", help="Ingest the workspace JSON files first")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--stream", nargs="+", metavar="JSON", help="Stream families from large JSON exports")
+    parser.add_argument("--text", help="Full-text search over titles and significance")
+    parser.add_argument("--assignee")
+    parser.add_argument("--scaffold")
+    parser.add_argument("--jurisdiction")
+    parser.add_argument("--priority-after", help="ISO date or year (exclusive)")
+    parser.add_argument("--priority-before", help="ISO date or year (exclusive)")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    with PatentStore(args.db) as store:
+        if args.build:
+            count = store.ingest_workspace(args.data_dir)
+            print(f"Ingested {count} family records into {args.db} ({store.count()} stored)")
+        if args.stream:
+            count = store.ingest_stream(args.stream)
+            print(f"Streamed {count} family records into {args.db} ({store.count()} stored)")
+
+        start = time.perf_counter()
+        rows = store.query(args.text, args.assignee, args.scaffold, args.jurisdiction,
+                           args.priority_after, args.priority_before, limit=args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        print(f"{len(rows)} families in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
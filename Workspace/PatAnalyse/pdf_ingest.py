@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Text extraction for the patent and report PDFs dropped in Uploads/
+Pages are extracted in a process pool and cached in SQLite by file hash and
+page number, and by a digest of each page's content stream and resources, so
+re-uploaded files are not opened at all and an edited report only re-parses the
+pages that changed. The text is scanned for publication numbers and compound codes, which
+come out as recent_patents-style family records and compound-mention records
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import instrumentation
+from family_dedup import canonical_publication_number, compound_key
+from instrumentation import progress, span
+
+# The workspace directory (landscape_data.DATA_DIR); landscape_data pulls in pandas, and
+# pypdf/pdfplumber are imported on first use, so 'patanalyse pdfs --help' stays cheap
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+pypdf = None
+
+UPLOADS_DIR = os.path.join(DATA_DIR, "Uploads")
+PAGE_CACHE_FILENAME = "pdf_page_cache.sqlite"
+OUTPUT_FILENAME = "pdf_extracted_records.json"
+
+# Bump when extraction changes so pages cached by older code are parsed again
+EXTRACTOR_VERSION = 1
+# Characters of surrounding text kept with each mention
+CONTEXT_CHARS = 80
+
+# 'WO2024137752A1', 'WO 2024/137752', 'US 12,091,387 B2', 'US20240246979', 'JP2022531755A'
+PATENT_NUMBER_PATTERN = re.compile(
+    r'\b(WO|US|EP|CN|JP|KR|CA|AU)\s?(\d{2,4}\s?/\s?\d{5,6}|\d[\d,]{5,13}\d)(?:\s?([ABCU]\d?))?\b')
+# Hyphenated development codes ('VENT-03', 'PF-06928215', 'H-151') not already known by name
+COMPOUND_CODE_PATTERN = re.compile(r'\b[A-Z]{1,5}\d?-\d{2,8}\b')
+# Hyphenated codes in these reports that are not compounds
+NON_COMPOUND_CODES = {'COVID-19', 'SARS-2', 'IFN-1', 'ISO-9001'}
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        file_sha256 TEXT PRIMARY KEY,
+        pages INTEGER NOT NULL,
+        version INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS pages (
+        digest TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        tables TEXT,
+        PRIMARY KEY (digest, version)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS file_pages (
+        file_sha256 TEXT NOT NULL,
+        page INTEGER NOT NULL,
+        digest TEXT NOT NULL,
+        PRIMARY KEY (file_sha256, page)
+    ) WITHOUT ROWID;
+"""
+
+
+def require_pypdf():
+    global pypdf
+    if pypdf is None:
+        try:
+            import pypdf as module
+        except ImportError:
+            raise ImportError("pypdf is required for PDF text extraction (pip install pypdf)") from None
+        pypdf = module
+
+
+def has_pdfplumber() -> bool:
+    return importlib.util.find_spec('pdfplumber') is not None
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def object_digest(obj, memo: Dict, path: frozenset = frozenset()) -> str:
+    """Digest of a PDF object with its indirect references resolved (fonts, images, form XObjects)
+
+    memo holds the digest of every indirect object already seen in this file, so
+    resources shared by many pages are hashed once.
+    """
+    if isinstance(obj, pypdf.generic.IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref in memo:
+            return memo[ref]
+        if ref in path:
+            # Reference cycle; the object is already being hashed further up
+            return f"ref {ref}"
+        memo[ref] = object_digest(obj.get_object(), memo, path | {ref})
+        return memo[ref]
+
+    digest = hashlib.sha256()
+    if isinstance(obj, pypdf.generic.DictionaryObject):
+        for key in sorted(obj):
+            # /Parent leads back up the page tree, not to anything drawn on the page
+            if key != '/Parent':
+                digest.update(f"{key}={object_digest(obj.raw_get(key), memo, path)};".encode('utf-8'))
+        if isinstance(obj, pypdf.generic.StreamObject):
+            digest.update(obj.get_data())
+    elif isinstance(obj, pypdf.generic.ArrayObject):
+        for item in obj:
+            digest.update(f"{object_digest(item, memo, path)},".encode('utf-8'))
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def page_digests(path: str) -> List[str]:
+    """Hash of every page's content stream and resolved /Resources
+
+    Unchanged pages keep their digest across edits; swapping only a font or an
+    image changes the page's resources and so its digest.
+    """
+    require_pypdf()
+    reader = pypdf.PdfReader(path)
+    memo = {}
+    digests = []
+    for page in reader.pages:
+        contents = page.get_contents()
+        digest = hashlib.sha256(contents.get_data() if contents is not None else b'')
+        digest.update(object_digest(page.raw_get('/Resources') if '/Resources' in page else None, memo).encode())
+        digests.append(digest.hexdigest())
+    return digests
+
+
+class PageCache:
+    """Extracted page text keyed by content digest, plus each file's page -> digest map"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def file_pages(self, sha256: str) -> Optional[List[Dict]]:
+        """Every page of a file seen before, in order, or None"""
+        row = self.conn.execute("SELECT pages FROM files WHERE file_sha256 = ? AND version = ?",
+                                (sha256, EXTRACTOR_VERSION)).fetchone()
+        if row is None:
+            return None
+        pages = self.conn.execute(
+            "SELECT fp.page, p.text, p.tables FROM file_pages fp "
+            "JOIN pages p ON p.digest = fp.digest AND p.version = ? "
+            "WHERE fp.file_sha256 = ? ORDER BY fp.page", (EXTRACTOR_VERSION, sha256)).fetchall()
+        if len(pages) != row[0]:
+            return None
+        return [{'page': page, 'text': text, 'tables': json.loads(tables) if tables else []}
+                for page, text, tables in pages]
+
+    def pages(self, digests: Sequence[str]) -> Dict[str, Dict]:
+        """Cached text and tables for whichever of these page digests are known"""
+        found = {}
+        unique = list(dict.fromkeys(digests))
+        for start in range(0, len(unique), 900):
+            chunk = unique[start:start + 900]
+            for digest, text, tables in self.conn.execute(
+                    f"SELECT digest, text, tables FROM pages WHERE version = ? "
+                    f"AND digest IN ({', '.join('?' * len(chunk))})", [EXTRACTOR_VERSION] + chunk):
+                found[digest] = {'text': text, 'tables': json.loads(tables) if tables else []}
+        return found
+
+    def store(self, sha256: str, digests: Sequence[str], extracted: Dict[str, Dict]):
+        """Record a file's page digests and any newly extracted pages"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pages (digest, version, text, tables) VALUES (?, ?, ?, ?)",
+                ((digest, EXTRACTOR_VERSION, page['text'], json.dumps(page['tables']))
+                 for digest, page in extracted.items()))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO file_pages (file_sha256, page, digest) VALUES (?, ?, ?)",
+                ((sha256, number, digest) for number, digest in enumerate(digests, start=1)))
+            self.conn.execute("INSERT OR REPLACE INTO files (file_sha256, pages, version) VALUES (?, ?, ?)",
+                              (sha256, len(digests), EXTRACTOR_VERSION))
+
+    def close(self):
+        self.conn.close()
+
+
+# Readers opened by this (worker) process, so a file is parsed once per worker, not once per page
+_readers = {}
+
+
+def extract_page(path: str, page_number: int, tables: bool = False) -> Dict:
+    """Text (and with pdfplumber, tables as lists of rows) of one 1-based page"""
+    if path not in _readers:
+        require_pypdf()
+        _readers[path] = pypdf.PdfReader(path)
+    with span('pdf.extract_text'):
+        text = _readers[path].pages[page_number - 1].extract_text() or ''
+    page_tables = []
+    if tables:
+        import pdfplumber
+        with span('pdf.extract_tables'):
+            with pdfplumber.open(path, pages=[page_number]) as pdf:
+                page_tables = pdf.pages[0].extract_tables()
+    return {'page': page_number, 'text': text, 'tables': page_tables}
+
+
+def _extract_job(job: Tuple) -> Tuple[str, Dict, Optional[Dict]]:
+    digest, path, page_number, tables, state = job
+    with instrumentation.worker_scope(state) as recorder:
+        page = extract_page(path, page_number, tables)
+        return digest, page, recorder.snapshot() if recorder is not None else None
+
+
+def extract_pdfs(paths: Sequence[str], cache: PageCache, workers: int = 1,
+                 tables: bool = False) -> Dict[str, List[Dict]]:
+    """Pages of every PDF, parsing only pages whose content is not in the cache
+
+    Pages missing from all files go through one process pool together.
+    """
+    require_pypdf()
+    if tables and not has_pdfplumber():
+        print("Skipping table extraction (pip install pdfplumber)")
+        tables = False
+
+    results, pending = {}, {}
+    for path in paths:
+        with span('pdf.hash'):
+            sha256 = file_sha256(path)
+        cached = cache.file_pages(sha256)
+        if cached is not None:
+            instrumentation.count('pdf.cached_files')
+            progress(f"{os.path.basename(path)}: {len(cached)} pages from cache")
+            results[path] = cached
+            continue
+        with span('pdf.page_digests'):
+            digests = page_digests(path)
+        pending[path] = sha256, digests
+
+    known = cache.pages([digest for _, digests in pending.values() for digest in digests])
+    jobs, queued = [], set()
+    state = instrumentation.worker_state()
+    for path, (_, digests) in pending.items():
+        for number, digest in enumerate(digests, start=1):
+            if digest not in known and digest not in queued:
+                queued.add(digest)
+                jobs.append((digest, path, number, tables, state))
+    instrumentation.count('pdf.cached_pages', sum(len(d) for _, d in pending.values()) - len(jobs))
+    instrumentation.count('pdf.extracted_pages', len(jobs))
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_extract_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        outcomes = [_extract_job(job) for job in jobs]
+
+    extracted = {}
+    recorder = instrumentation.active()
+    for digest, page, snapshot in outcomes:
+        extracted[digest] = {'text': page['text'], 'tables': page['tables']}
+        if recorder is not None:
+            recorder.merge(snapshot)
+    known.update(extracted)
+
+    for path, (sha256, digests) in pending.items():
+        cache.store(sha256, digests, {digest: known[digest] for digest in digests if digest in extracted})
+        results[path] = [dict(known[digest], page=number) for number, digest in enumerate(digests, start=1)]
+        progress(f"{os.path.basename(path)}: {len(digests)} pages, "
+                 f"{sum(digest in extracted for digest in set(digests))} parsed")
+    return {path: results[path] for path in paths}
+
+
+def context(text: str, start: int, end: int) -> str:
+    return text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS].strip()
+
+
+def publication_year(key: str) -> Optional[int]:
+    """Publication year encoded in WO and US pre-grant numbers ('WO2024137752', 'US20240246979')"""
+    digits = key[2:]
+    if key.startswith('WO') or (key.startswith('US') and len(digits) == 11):
+        year = int(digits[:4])
+        return year if 1978 <= year <= 2100 else None
+    return None
+
+
+def scan_patent_numbers(text: str) -> Iterator[Tuple[str, str, int, int]]:
+    """(display number, canonical key, start, end) for each publication number in the text"""
+    for match in PATENT_NUMBER_PATTERN.finditer(text):
+        display = re.sub(r'[\s,]', '', match.group(0))
+        yield display, canonical_publication_number(match.group(0)), match.start(), match.end()
+
+
+def scan_compounds(text: str, known: Dict[str, str]) -> Iterator[Tuple[str, bool, int, int]]:
+    """(compound name, is a known compound, start, end) for known names and hyphenated codes"""
+    for match in COMPOUND_CODE_PATTERN.finditer(text):
+        code = match.group(0)
+        if code in NON_COMPOUND_CODES or PATENT_NUMBER_PATTERN.match(code):
+            continue
+        name = known.get(compound_key(code))
+        yield name or code, name is not None, match.start(), match.end()
+    for key, name in known.items():
+        # Known names also match without their hyphen ('IMSB301', 'G150')
+        if '-' not in name:
+            pattern = re.escape(name)
+        else:
+            pattern = re.escape(name).replace(r'\-', '-?')
+        for match in re.finditer(rf'\b{pattern}\b', text):
+            if '-' in match.group(0):
+                continue  # Already found by COMPOUND_CODE_PATTERN
+            yield name, True, match.start(), match.end()
+
+
+def known_compounds(data_dir: str = DATA_DIR) -> Dict[str, str]:
+    """compound_key -> name for every compound named in the workspace JSON files"""
+    from landscape_data import CLINICAL_FILE, FINDINGS_FILE, LANDSCAPE_FILE, load_json
+
+    names = []
+    landscape = load_json(os.path.join(data_dir, LANDSCAPE_FILE))
+    names.extend(landscape.get('clinical_candidates', {}))
+    clinical = load_json(os.path.join(data_dir, CLINICAL_FILE))
+    for stage in clinical.get('clinical_pipeline', {}).values():
+        names.extend(stage)
+    findings = load_json(os.path.join(data_dir, FINDINGS_FILE)).get('cgas_additional_findings_2022_2025', {})
+    names.extend(trial.get('compound', '') for trial in findings.get('clinical_trials', []))
+    names.extend(scaffold.get('lead_compound', '') for scaffold in findings.get('new_chemical_scaffolds', []))
+    known = {}
+    for name in names:
+        if name and compound_key(name) not in known:
+            known[compound_key(name)] = name
+    return known
+
+
+def build_records(pages_by_file: Dict[str, List[Dict]], known: Dict[str, str]) -> Dict[str, List[Dict]]:
+    """recent_patents-style family records and compound-mention records with their page provenance
+
+    Patent records carry only what the PDFs state (number, publication year);
+    applicant, title and class are left empty for curation.
+    """
+    patents, compounds = {}, {}
+    for path, pages in pages_by_file.items():
+        source = os.path.basename(path)
+        for page in pages:
+            text = re.sub(r'\s+', ' ', page['text'])
+            for display, key, start, end in scan_patent_numbers(text):
+                record = patents.setdefault(key, {
+                    'patent_number': display,
+                    'year': publication_year(key),
+                    'priority_year': None,
+                    'applicant': '',
+                    'title': '',
+                    'chemical_class': '',
+                    'filing_jurisdictions': [],
+                    'status': '',
+                    'source_url': None,
+                    'mentions': []
+                })
+                # Prefer the most specific spelling (with kind code)
+                if len(display) > len(record['patent_number']):
+                    record['patent_number'] = display
+                record['mentions'].append({'file': source, 'page': page['page'], 'context': context(text, start, end)})
+
+            for name, is_known, start, end in scan_compounds(text, known):
+                record = compounds.setdefault(compound_key(name), {
+                    'compound': name,
+                    'known': is_known,
+                    'mention_count': 0,
+                    'files': [],
+                    'mentions': []
+                })
+                record['mention_count'] += 1
+                if source not in record['files']:
+                    record['files'].append(source)
+                if len(record['mentions']) < 20:
+                    record['mentions'].append({'file': source, 'page': page['page'],
+                                               'context': context(text, start, end)})
+
+    # Numbers broken across lines ('WO2019153' / '002A1') leave prefixes of the full number
+    keys = sorted(patents)
+    for key, longer in zip(keys, keys[1:]):
+        if longer.startswith(key):
+            patents[longer]['mentions'].extend(patents.pop(key)['mentions'])
+
+    recent_patents = [dict(record, id=f"PDF_PAT_{i:03d}")
+                      for i, record in enumerate(sorted(patents.values(), key=lambda r: r['patent_number']), 1)]
+    compound_mentions = sorted(compounds.values(), key=lambda r: (not r['known'], -r['mention_count']))
+    return {'recent_patents': recent_patents, 'compound_mentions': compound_mentions}
+
+
+def ingest_uploads(paths: Optional[Sequence[str]] = None, output_path: Optional[str] = None,
+                   cache_path: Optional[str] = None, workers: int = 1, tables: bool = False,
+                   data_dir: str = DATA_DIR) -> Dict:
+    """Extract every PDF in Uploads/ (or the given paths) and write the records JSON"""
+    if not paths:
+        paths = sorted(os.path.join(UPLOADS_DIR, name) for name in os.listdir(UPLOADS_DIR)
+                       if name.lower().endswith('.pdf'))
+    # Identical uploads under different names are extracted and counted once
+    unique, duplicates = {}, {}
+    for path in paths:
+        sha256 = file_sha256(path)
+        if sha256 in unique:
+            duplicates.setdefault(os.path.basename(unique[sha256]), []).append(os.path.basename(path))
+        else:
+            unique[sha256] = path
+    paths = list(unique.values())
+    cache = PageCache(cache_path or os.path.join(data_dir, PAGE_CACHE_FILENAME))
+    try:
+        with span('pdf.extract', files=len(paths)):
+            pages_by_file = extract_pdfs(paths, cache, workers, tables)
+    finally:
+        cache.close()
+
+    with span('pdf.scan'):
+        records = build_records(pages_by_file, known_compounds(data_dir))
+    output = {
+        'metadata': {
+            'generated_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'extractor_version': EXTRACTOR_VERSION,
+            'files': [{'file': os.path.basename(path), 'pages': len(pages),
+                       'tables': sum(len(page['tables']) for page in pages)}
+                      for path, pages in pages_by_file.items()],
+            'duplicate_files': duplicates
+        },
+        **records
+    }
+    output_path = output_path or os.path.join(data_dir, OUTPUT_FILENAME)
+    with open(output_path, 'w') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"{len(records['recent_patents'])} publication numbers and {len(records['compound_mentions'])} "
+          f"compounds from {len(paths)} distinct PDFs saved to {output_path}")
+    return output
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extract patent numbers and compound mentions from uploaded PDFs")
+    parser.add_argument("pdfs", nargs="*", help=f"PDF files (default: every PDF in {UPLOADS_DIR})")
+    parser.add_argument("--output", default=None, help=f"Records JSON (default: <data-dir>/{OUTPUT_FILENAME})")
+    parser.add_argument("--cache", default=None, help=f"Page cache (default: <data-dir>/{PAGE_CACHE_FILENAME})")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes extracting pages in parallel")
+    parser.add_argument("--tables", action="store_true", help="Also extract tables (needs pdfplumber)")
+    parser.add_argument("--verbose", action="store_true", help="Print per-file progress")
+    args = parser.parse_args(argv)
+
+    recorder = instrumentation.enable()
+    instrumentation.set_verbose(args.verbose)
+    ingest_uploads(args.pdfs, args.output, args.cache, args.workers, args.tables, args.data_dir)
+    recorder.print_summary("PDF ingestion")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Report build stage for the cGAS patent landscape workspace
+Renders the landscape, strategy and structure reports from the Markdown
+templates in report_templates/, filling {{kind:name}} placeholders with chart
+exports, structure images and compound properties. Each '## ' section is cached
+under a hash of its template text and the data its placeholders read, so a
+change re-renders only the affected sections and their PDF pages
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import instrumentation
+from instrumentation import TRACE_FORMATS, progress, span
+
+# The PDF stack is imported on first use (require_pdf_modules), so Markdown-only
+# builds and --help neither pay for it nor see WeasyPrint's missing-library errors
+markdown = None
+weasyprint = None
+pypdf = None
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(DATA_DIR, "report_templates")
+STRUCTURES_DIR = os.path.join(DATA_DIR, "cgas_structures")
+STRUCTURES_FILE = "cgas_structures_master.json"
+CACHE_DIRNAME = ".report_cache"
+# Bump when rendering changes, so every cached section is rebuilt once
+BUILDER_VERSION = 1
+
+# name -> (template in report_templates/, output Markdown relative to the data directory; the PDF sits next to it)
+REPORTS: Dict[str, Tuple[str, str]] = {
+    'landscape': ("landscape_report.md", "cGAS_Inhibitor_Gold_Standard_Patent_Landscape_Report.md"),
+    'strategy': ("strategic_insights.md", "strategic_insights_and_recommendations.md"),
+    'structures': ("structure_report.md", os.path.join("cgas_structures", "cGAS_Inhibitor_Structure_Report.md"))
+}
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+):([^{}]+)\}\}')
+SECTION_PATTERN = re.compile(r'(?m)^(?=## )')
+# Chart exports in order of preference; only static formats show up in the PDF
+FIGURE_FORMATS = ('png', 'svg', 'jpeg', 'webp', 'html')
+SUBSCRIPTS = str.maketrans('0123456789', '₀₁₂₃₄₅₆₇₈₉')
+MARKDOWN_EXTENSIONS = ['tables', 'fenced_code', 'sane_lists']
+
+REPORT_CSS = """
+    @page { size: A4; margin: 2cm; }
+    body { font-family: 'DejaVu Sans', Arial, sans-serif; font-size: 10.5pt; line-height: 1.45; }
+    h1 { font-size: 20pt; } h2 { font-size: 15pt; border-bottom: 1px solid #ccc; } h3 { font-size: 12.5pt; }
+    table { border-collapse: collapse; margin: 0.6em 0; } th, td { border: 1px solid #bbb; padding: 3px 6px; }
+    code { font-size: 9.5pt; } img { max-width: 100%; max-height: 9cm; }
+"""
+
+
+def split_sections(text: str) -> List[str]:
+    """Preamble plus one chunk per '## ' heading; joining the chunks gives the text back"""
+    return [section for section in SECTION_PATTERN.split(text) if section]
+
+
+def section_title(section: str) -> str:
+    first = section.lstrip().split('\n', 1)[0]
+    return first.lstrip('#').strip() or '(preamble)'
+
+
+class ReportData:
+    """Resolves placeholders to Markdown text plus the dependency the section is keyed on"""
+
+    def __init__(self, data_dir: str = DATA_DIR, figures_dir: Optional[str] = None,
+                 structures_dir: Optional[str] = None):
+        self.data_dir = data_dir
+        self.figures_dir = figures_dir or data_dir
+        self.structures_dir = structures_dir or os.path.join(data_dir, "cgas_structures")
+        self._compounds: Optional[Dict[str, Dict]] = None
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+
+    @property
+    def compounds(self) -> Dict[str, Dict]:
+        if self._compounds is None:
+            path = os.path.join(self.structures_dir, STRUCTURES_FILE)
+            with open(path, encoding='utf-8') as f:
+                self._compounds = {c['compound_name']: c for c in json.load(f).get('compounds', [])}
+        return self._compounds
+
+    def file_digest(self, path: str) -> str:
+        """Content hash of a file, computed once per size and mtime"""
+        if not os.path.exists(path):
+            return 'missing'
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self._digests:
+            with open(path, 'rb') as f:
+                self._digests[key] = hashlib.sha256(f.read()).hexdigest()
+        return self._digests[key]
+
+    def compound(self, name: str) -> Dict:
+        if name not in self.compounds:
+            raise ValueError(f"Unknown compound '{name}' in report template")
+        return self.compounds[name]
+
+    def resolve(self, kind: str, name: str, report_dir: str) -> Tuple[str, str]:
+        """(replacement text, dependency) for one {{kind:name}} placeholder"""
+        if kind in ('smiles', 'formula', 'formula_subscript', 'mw'):
+            record = self.compound(name)
+            value = {
+                'smiles': record.get('smiles', ''),
+                'formula': record.get('molecular_formula', ''),
+                'formula_subscript': record.get('molecular_formula', '').translate(SUBSCRIPTS),
+                'mw': record.get('molecular_weight', '')
+            }[kind]
+            return value, value
+        if kind == 'image':
+            # image_path may come from another machine; the file name is what counts
+            filename = os.path.basename(self.compound(name).get('image_path', ''))
+            path = os.path.join(self.structures_dir, "images", filename)
+            return os.path.relpath(path, report_dir), self.file_digest(path)
+        if kind == 'figure':
+            paths = [os.path.join(self.figures_dir, f"{name}.{fmt}") for fmt in FIGURE_FORMATS]
+            path = next((p for p in paths if os.path.exists(p)), paths[-1])
+            return os.path.relpath(path, report_dir), self.file_digest(path)
+        if kind == 'count':
+            records = self.compounds.values()
+            value = str(len(self.compounds) if name == 'compounds' else sum(r.get('type') == name for r in records))
+            return value, value
+        raise ValueError(f"Unknown report placeholder '{{{{{kind}:{name}}}}}'")
+
+    def render(self, section: str, report_dir: str) -> Tuple[str, List[str]]:
+        """Section text with placeholders filled in, and the dependencies it read"""
+        dependencies = []
+
+        def replace(match):
+            text, dependency = self.resolve(match.group(1), match.group(2), report_dir)
+            dependencies.append(f"{match.group(0)}={dependency}")
+            return text
+
+        return PLACEHOLDER_PATTERN.sub(replace, section), dependencies
+
+
+def section_hash(section: str, dependencies: List[str]) -> str:
+    payload = json.dumps({'template': section, 'dependencies': dependencies, 'css': REPORT_CSS,
+                          'version': BUILDER_VERSION})
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def require_pdf_modules():
+    """Import markdown, weasyprint and pypdf, or raise ImportError naming what is missing"""
+    global markdown, weasyprint, pypdf
+    if markdown is not None and weasyprint is not None and pypdf is not None:
+        return
+    missing = []
+    try:
+        import markdown as markdown_module
+        markdown = markdown_module
+    except ImportError:
+        missing.append('markdown')
+    try:
+        import weasyprint as weasyprint_module
+        weasyprint = weasyprint_module
+    except ImportError:
+        missing.append('weasyprint')
+    except OSError as e:
+        # WeasyPrint is installed but its Pango libraries are not
+        raise ImportError(f"WeasyPrint is installed but cannot load its system libraries, install Pango ({e})") from None
+    try:
+        import pypdf as pypdf_module
+        pypdf = pypdf_module
+    except ImportError:
+        missing.append('pypdf')
+    if missing:
+        raise ImportError(f"{', '.join(missing)} required for PDF output (pip install {' '.join(missing)})")
+
+
+def render_section_pdf(text: str, base_url: str, path: str) -> str:
+    """One section as its own PDF, so unchanged sections keep their pages"""
+    # Worker processes start without the PDF stack when they are spawned rather than forked
+    require_pdf_modules()
+    body = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    html = f"<html><head><meta charset='utf-8'><style>{REPORT_CSS}</style></head><body>{body}</body></html>"
+    weasyprint.HTML(string=html, base_url=base_url).write_pdf(path)
+    return path
+
+
+class ReportBuilder:
+    """Builds reports section by section, reusing cached Markdown and PDF pages"""
+
+    def __init__(self, data_dir: str = DATA_DIR, templates_dir: str = TEMPLATES_DIR,
+                 figures_dir: Optional[str] = None, cache_dir: Optional[str] = None,
+                 pdf: bool = True, workers: int = 1, force: bool = False):
+        self.data_dir = data_dir
+        self.templates_dir = templates_dir
+        self.data = ReportData(data_dir, figures_dir)
+        self.cache_dir = cache_dir or os.path.join(data_dir, CACHE_DIRNAME)
+        self.pdf = pdf
+        self.workers = workers
+        self.force = force
+        if pdf:
+            require_pdf_modules()
+
+    def build(self, name: str) -> Dict:
+        """Render one report; returns section counts and output paths"""
+        template_name, output_name = REPORTS[name]
+        with open(os.path.join(self.templates_dir, template_name), encoding='utf-8') as f:
+            sections = split_sections(f.read())
+        md_path = os.path.join(self.data_dir, output_name)
+        report_dir = os.path.dirname(md_path)
+        cache_dir = os.path.join(self.cache_dir, name)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        rendered, hashes, stale = [], [], []
+        with span('report.sections', report=name, sections=len(sections)):
+            for section in sections:
+                text, dependencies = self.data.render(section, report_dir)
+                digest = section_hash(section, dependencies)
+                rendered.append(text)
+                hashes.append(digest)
+                if self.force or not os.path.exists(os.path.join(cache_dir, f"{digest}.md")):
+                    stale.append(len(hashes) - 1)
+                    progress(f"  {name}: section '{section_title(section)}' changed")
+            for i in stale:
+                with open(os.path.join(cache_dir, f"{hashes[i]}.md"), 'w', encoding='utf-8') as f:
+                    f.write(rendered[i])
+
+        markdown_text = ''.join(rendered)
+        previous = None
+        if os.path.exists(md_path):
+            with open(md_path, encoding='utf-8') as f:
+                previous = f.read()
+        if previous != markdown_text:
+            with open(md_path, 'w', encoding='utf-8') as f:
+                f.write(markdown_text)
+
+        summary = {'report': name, 'sections': len(sections), 'rendered': len(stale), 'markdown': md_path}
+        if self.pdf:
+            summary.update(self.build_pdf(name, rendered, hashes, report_dir, cache_dir,
+                                          os.path.splitext(md_path)[0] + '.pdf'))
+        self.prune(cache_dir, hashes)
+        instrumentation.count('report.sections_rendered', len(stale))
+        instrumentation.count('report.sections_cached', len(sections) - len(stale))
+        return summary
+
+    def build_pdf(self, name: str, rendered: List[str], hashes: List[str], report_dir: str,
+                  cache_dir: str, pdf_path: str) -> Dict:
+        """Render the PDF pages of changed sections, then merge all section PDFs into the report"""
+        paths = [os.path.join(cache_dir, f"{digest}.pdf") for digest in hashes]
+        stale = [i for i, path in enumerate(paths) if self.force or not os.path.exists(path)]
+        with span('report.pdf_sections', report=name, sections=len(stale), workers=self.workers):
+            args = ([rendered[i] for i in stale], [report_dir] * len(stale), [paths[i] for i in stale])
+            if self.workers > 1 and len(stale) > 1:
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    list(executor.map(render_section_pdf, *args))
+            else:
+                list(map(render_section_pdf, *args))
+
+        if stale or not os.path.exists(pdf_path):
+            with span('report.pdf_merge', report=name):
+                writer = pypdf.PdfWriter()
+                for path in paths:
+                    writer.append(path)
+                with open(pdf_path, 'wb') as f:
+                    writer.write(f)
+        return {'pdf_rendered': len(stale), 'pdf': pdf_path}
+
+    def prune(self, cache_dir: str, hashes: List[str]):
+        """Drop cached sections this report no longer uses"""
+        keep = set(hashes)
+        for filename in os.listdir(cache_dir):
+            if os.path.splitext(filename)[0] not in keep:
+                os.remove(os.path.join(cache_dir, filename))
+
+    def build_all(self, names: Optional[Sequence[str]] = None) -> List[Dict]:
+        results = []
+        for name in names or REPORTS:
+            with span('report.build', report=name):
+                summary = self.build(name)
+            line = (f"{name}: {summary['sections']} sections, {summary['rendered']} re-rendered -> "
+                    f"{os.path.relpath(summary['markdown'], self.data_dir)}")
+            if 'pdf' in summary:
+                line += f"; {summary['pdf_rendered']} PDF sections rendered -> {os.path.relpath(summary['pdf'], self.data_dir)}"
+            print(line)
+            results.append(summary)
+        return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build the Markdown/PDF reports from report_templates/")
+    parser.add_argument("--reports", default=','.join(REPORTS),
+                        help=f"Comma-separated reports to build ({', '.join(REPORTS)})")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--templates-dir", default=TEMPLATES_DIR)
+    parser.add_argument("--figures-dir", default=None,
+                        help="Where create_patent_visualizations.py wrote the charts (default: data dir)")
+    parser.add_argument("--cache-dir", default=None, help=f"Section cache (default: <data-dir>/{CACHE_DIRNAME})")
+    parser.add_argument("--no-pdf", action="store_true", help="Only write the Markdown reports")
+    parser.add_argument("--workers", type=int, default=1, help="Processes rendering changed PDF sections")
+    parser.add_argument("--force", action="store_true", help="Re-render every section")
+    parser.add_argument("--trace", default=None, help="Write the run's span trace to this file")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="chrome")
+    parser.add_argument("--verbose", action="store_true", help="List the sections that changed")
+    args = parser.parse_args(argv)
+
+    names = args.reports.split(',')
+    unknown = [name for name in names if name not in REPORTS]
+    if unknown:
+        parser.error(f"Unknown reports: {', '.join(unknown)} (available: {', '.join(REPORTS)})")
+
+    recorder = instrumentation.enable()
+    instrumentation.set_verbose(args.verbose)
+    try:
+        builder = ReportBuilder(args.data_dir, args.templates_dir, args.figures_dir, args.cache_dir,
+                                pdf=not args.no_pdf, workers=args.workers, force=args.force)
+    except ImportError as e:
+        parser.error(f"{e}; pass --no-pdf to write only the Markdown reports")
+    builder.build_all(names)
+
+    recorder.print_summary("Report build")
+    if args.trace:
+        print(f"Trace saved: {recorder.export(args.trace, args.trace_format)}")
+
+
+if __name__ == "__main__":
+    main()